@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import ZipCodeRecord
+
+
+@admin.register(ZipCodeRecord)
+class ZipCodeRecordAdmin(admin.ModelAdmin):
+    list_display = ("zip_code", "street", "neighborhood", "city", "state", "source", "updated_at")
+    list_filter = ("source", "state")
+    search_fields = ("zip_code", "street", "city")
+    readonly_fields = ("updated_at",)
+    list_per_page = 50
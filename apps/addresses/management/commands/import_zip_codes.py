@@ -0,0 +1,159 @@
+import csv
+import io
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.addresses.models import ZipCodeRecord
+
+# Nomes de coluna aceitos no cabeçalho do arquivo, por campo do modelo
+COLUMN_ALIASES = {
+    "zip_code": ("cep", "zip_code", "zipcode", "zip"),
+    "street": ("logradouro", "street", "endereco", "endereço"),
+    "neighborhood": ("bairro", "neighborhood", "district"),
+    "city": ("cidade", "localidade", "municipio", "município", "city"),
+    "state": ("uf", "estado", "state"),
+}
+# Ordem das colunas quando o arquivo não tem cabeçalho
+DEFAULT_COLUMNS = ["zip_code", "street", "neighborhood", "city", "state"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa em lote uma base de CEPs (CSV, ou ZIP contendo CSVs) para a tabela "
+        "local de CEPs, lendo o arquivo em streaming."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Caminho do arquivo .csv ou .zip.")
+        parser.add_argument(
+            "--delimiter",
+            help="Separador de colunas (padrão: detectado entre ';', ',', tab e '|').",
+        )
+        parser.add_argument(
+            "--encoding",
+            default="utf-8-sig",
+            help="Codificação do arquivo (padrão: utf-8-sig).",
+        )
+        parser.add_argument(
+            "--no-header",
+            action="store_true",
+            help="O arquivo não tem cabeçalho; colunas na ordem cep, logradouro, bairro, cidade, uf.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Quantidade de registros gravados por lote (padrão: 5000).",
+        )
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Atualiza CEPs já existentes (por padrão, eles são mantidos).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        self.batch_size = max(options["batch_size"], 1)
+        self.update = options["update"]
+        self.imported = 0
+        self.skipped = 0
+
+        try:
+            if zipfile.is_zipfile(path):
+                with zipfile.ZipFile(path) as archive:
+                    names = [name for name in archive.namelist() if name.lower().endswith((".csv", ".txt"))]
+                    if not names:
+                        raise CommandError(f"Nenhum arquivo CSV encontrado em '{path}'.")
+                    for name in names:
+                        with archive.open(name) as raw:
+                            self._import_stream(io.TextIOWrapper(raw, encoding=options["encoding"], newline=""), options)
+            else:
+                with open(path, encoding=options["encoding"], newline="") as stream:
+                    self._import_stream(stream, options)
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler '{path}': {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Importação concluída: {self.imported} CEP(s) processado(s), {self.skipped} linha(s) ignorada(s)."
+            )
+        )
+
+    def _import_stream(self, stream, options):
+        delimiter = options["delimiter"] or self._sniff_delimiter(stream)
+        reader = csv.reader(stream, delimiter=delimiter)
+
+        if options["no_header"]:
+            columns = {field: index for index, field in enumerate(DEFAULT_COLUMNS)}
+        else:
+            columns = self._map_header(next(reader, []))
+
+        # Dicionário por CEP: linhas repetidas no mesmo lote não geram conflito no upsert
+        batch = {}
+        for row in reader:
+            record = self._build_record(row, columns)
+            if record is None:
+                self.skipped += 1
+                continue
+            batch[record.zip_code] = record
+            if len(batch) >= self.batch_size:
+                self._flush(list(batch.values()))
+                batch = {}
+        if batch:
+            self._flush(list(batch.values()))
+
+    def _sniff_delimiter(self, stream) -> str:
+        sample = stream.read(4096)
+        stream.seek(0)
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=";,\t|").delimiter
+        except csv.Error:
+            return ";"
+
+    def _map_header(self, header) -> dict:
+        normalized = [column.strip().lower() for column in header]
+        columns = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias in normalized:
+                    columns[field] = normalized.index(alias)
+                    break
+        missing = {"zip_code", "city", "state"} - set(columns)
+        if missing:
+            raise CommandError(
+                f"Cabeçalho sem as colunas obrigatórias: {', '.join(sorted(missing))}. "
+                f"Use --no-header se o arquivo não tiver cabeçalho."
+            )
+        return columns
+
+    def _build_record(self, row, columns) -> ZipCodeRecord | None:
+        def value(field):
+            index = columns.get(field)
+            return row[index].strip() if index is not None and index < len(row) else ""
+
+        zip_code = "".join(filter(str.isdigit, value("zip_code")))
+        state = value("state").upper()
+        if len(zip_code) != 8 or len(state) != 2:
+            return None
+        return ZipCodeRecord(
+            zip_code=zip_code,
+            street=value("street")[:150],
+            neighborhood=value("neighborhood")[:100],
+            city=value("city")[:100],
+            state=state,
+            source="import",
+        )
+
+    def _flush(self, batch):
+        if self.update:
+            ZipCodeRecord.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["zip_code"],
+                update_fields=["street", "neighborhood", "city", "state", "source", "updated_at"],
+            )
+        else:
+            ZipCodeRecord.objects.bulk_create(batch, ignore_conflicts=True)
+        self.imported += len(batch)
+        self.stdout.write(f"{self.imported} CEP(s) processado(s)...")
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 16:10
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addresses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZipCodeRecord',
+            fields=[
+                ('zip_code', models.CharField(max_length=8, primary_key=True, serialize=False, validators=[django.core.validators.RegexValidator('^\\d{8}$', 'CEP deve ter 8 dígitos numéricos.')], verbose_name='CEP')),
+                ('street', models.CharField(blank=True, max_length=150, verbose_name='Logradouro')),
+                ('neighborhood', models.CharField(blank=True, max_length=100, verbose_name='Bairro')),
+                ('city', models.CharField(blank=True, max_length=100, verbose_name='Cidade')),
+                ('state', models.CharField(blank=True, choices=[('AC', 'Acre'), ('AL', 'Alagoas'), ('AP', 'Amapá'), ('AM', 'Amazonas'), ('BA', 'Bahia'), ('CE', 'Ceará'), ('DF', 'Distrito Federal'), ('ES', 'Espírito Santo'), ('GO', 'Goiás'), ('MA', 'Maranhão'), ('MT', 'Mato Grosso'), ('MS', 'Mato Grosso do Sul'), ('MG', 'Minas Gerais'), ('PA', 'Pará'), ('PB', 'Paraíba'), ('PR', 'Paraná'), ('PE', 'Pernambuco'), ('PI', 'Piauí'), ('RJ', 'Rio de Janeiro'), ('RN', 'Rio Grande do Norte'), ('RS', 'Rio Grande do Sul'), ('RO', 'Rondônia'), ('RR', 'Roraima'), ('SC', 'Santa Catarina'), ('SP', 'São Paulo'), ('SE', 'Sergipe'), ('TO', 'Tocantins')], max_length=2, verbose_name='UF')),
+                ('source', models.CharField(choices=[('import', 'Importação'), ('api', 'API externa')], default='import', max_length=10, verbose_name='Origem')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'CEP (base local)',
+                'verbose_name_plural': 'CEPs (base local)',
+                'ordering': ['zip_code'],
+            },
+        ),
+    ]
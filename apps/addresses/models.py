@@ -1,8 +1,8 @@
 from functools import cached_property
-from django.db import models
+from django.db import DatabaseError, models, transaction
+from django.db.models import Prefetch
 from django.core.validators import RegexValidator, MinLengthValidator
 from django.core.exceptions import ValidationError
-from django.core.cache import cache
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from core.services import fetch_address_data
@@ -22,8 +22,8 @@ class Address(models.Model):
     Inclui funcionalidades para:
     - Validar e limpar o formato do CEP.
     - Preencher automaticamente dados de endereço a partir do CEP, consultando
+      primeiro a base local de CEPs (`ZipCodeRecord`) e, em caso de ausência,
       uma API externa (`core.services.fetch_address_data`).
-    - Cachear os resultados da consulta de CEP para otimizar o desempenho.
     - Normalizar campos de texto (e.g., para Title Case).
     - Fornecer representações formatadas do endereço e do CEP.
     """
@@ -57,7 +57,6 @@ class Address(models.Model):
         ("SE", "Sergipe"),
         ("TO", "Tocantins"),
     ]
-    CEP_CACHE_TIMEOUT = 86400  # 24 horas em segundos
 
     street = models.CharField(max_length=100, blank=True, verbose_name="Logradouro")
     number = models.CharField(
@@ -196,12 +195,11 @@ class Address(models.Model):
 
     def get_cep_data(self) -> dict | None:
         """
-        Busca dados de endereço para o CEP atual, utilizando cache.
+        Busca dados de endereço para o CEP atual.
 
-        Se o CEP não estiver definido, retorna None.
-        Primeiro tenta obter os dados do cache. Se não encontrar, chama o serviço
-        `fetch_address_data` para buscar externamente e armazena o resultado
-        no cache para futuras consultas.
+        Se o CEP não estiver definido, retorna None. A consulta é delegada a
+        `ZipCodeRecord.lookup`, que responde a partir da base local de CEPs e só
+        recorre às APIs externas (`fetch_address_data`) quando o CEP não está lá.
 
         Returns:
             Um dicionário com os dados do endereço (street, neighborhood, city, state)
@@ -210,16 +208,7 @@ class Address(models.Model):
         if not self.zip_code:
             return None
 
-        cache_key = f"cep_data_{self.zip_code}"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return cached_data
-
-        data = fetch_address_data(self.zip_code)
-
-        if data:
-            cache.set(cache_key, data, timeout=self.CEP_CACHE_TIMEOUT)
-        return data
+        return ZipCodeRecord.lookup(self.zip_code)
 
     def _update_address_fields(self, api_data: dict):
         """
@@ -336,6 +325,154 @@ class Address(models.Model):
         )
 
 
+PRIMARY_ADDRESS_ATTR = "_prefetched_addresses"
+
+
+def prefetch_primary_address(lookup: str = "addresses") -> Prefetch:
+    """
+    Retorna o `Prefetch` que carrega, em uma única consulta, os endereços de
+    todos os objetos de um queryset para uso por `AddressOwnerMixin.address`.
+
+    Uso: `Customer.objects.prefetch_related(prefetch_primary_address())`.
+    Os endereços ficam em uma lista (`to_attr`) ordenada pela chave primária,
+    de modo que `address` devolve o mesmo registro com ou sem pré-carregamento.
+    """
+    return Prefetch(lookup, queryset=Address.objects.order_by("pk"), to_attr=PRIMARY_ADDRESS_ATTR)
+
+
+class AddressOwnerMixin:
+    """
+    Mixin para modelos com uma `GenericRelation` `addresses` que usam um único
+    endereço principal (Cliente, Fornecedor, Funcionário).
+
+    A propriedade `address` aproveita os endereços pré-carregados por
+    `prefetch_primary_address()` (ou por `prefetch_related("addresses")`),
+    evitando uma consulta por objeto em listagens, relatórios e no admin; sem
+    pré-carregamento, faz uma consulta. O endereço principal é sempre o de
+    menor chave primária (o primeiro criado), e não o primeiro na ordenação
+    padrão de `Address` (UF, cidade, logradouro), que pode ter empates.
+    """
+
+    @property
+    def address(self) -> "Address | None":
+        """Retorna o endereço principal (o de menor chave primária), ou `None`."""
+        prefetched = getattr(self, PRIMARY_ADDRESS_ATTR, None)
+        if prefetched is not None:
+            return next(iter(prefetched), None)
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("addresses")
+        if prefetched is None:
+            return self.addresses.order_by("pk").first()
+        # `prefetch_related("addresses")` segue a ordenação padrão de `Address`
+        return min(prefetched, key=lambda address: address.pk, default=None)
+
+    def clear_address_cache(self):
+        """Descarta os endereços pré-carregados após criar, alterar ou remover um endereço."""
+        self.__dict__.pop(PRIMARY_ADDRESS_ATTR, None)
+        getattr(self, "_prefetched_objects_cache", {}).pop("addresses", None)
+
+
+class ZipCodeRecord(models.Model):
+    """
+    Base local de CEPs (CEP -> logradouro, bairro, cidade, UF).
+
+    É preenchida em lote pelo comando `import_zip_codes` a partir de um dump
+    CSV/ZIP e complementada automaticamente com as respostas das APIs externas
+    (write-back). O CEP é a chave primária, de modo que cada consulta é uma
+    leitura indexada, sem depender de acesso à rede.
+    """
+
+    SOURCE_CHOICES = [
+        ("import", "Importação"),
+        ("api", "API externa"),
+    ]
+
+    zip_code = models.CharField(
+        max_length=8,
+        primary_key=True,
+        verbose_name="CEP",
+        validators=[RegexValidator(r"^\d{8}$", "CEP deve ter 8 dígitos numéricos.")],
+    )
+    street = models.CharField(max_length=150, blank=True, verbose_name="Logradouro")
+    neighborhood = models.CharField(max_length=100, blank=True, verbose_name="Bairro")
+    city = models.CharField(max_length=100, blank=True, verbose_name="Cidade")
+    state = models.CharField(
+        max_length=2, blank=True, verbose_name="UF", choices=Address.BRAZILIAN_STATES_CHOICES
+    )
+    source = models.CharField(
+        max_length=10, choices=SOURCE_CHOICES, default="import", verbose_name="Origem"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "CEP (base local)"
+        verbose_name_plural = "CEPs (base local)"
+        ordering = ["zip_code"]
+
+    def __str__(self):
+        return f"{self.zip_code} - {self.city}/{self.state}"
+
+    def as_address_data(self) -> dict:
+        """Retorna o registro no mesmo formato de `core.services.fetch_address_data`."""
+        return {
+            "zip_code": self.zip_code,
+            "street": self.street,
+            "neighborhood": self.neighborhood,
+            "city": self.city,
+            "state": self.state,
+        }
+
+    @classmethod
+    def lookup(cls, zip_code: str) -> dict | None:
+        """
+        Busca os dados de um CEP, primeiro na base local e depois nas APIs externas.
+
+        Em caso de ausência na base local, consulta `fetch_address_data` e grava
+        a resposta na tabela, para que as próximas consultas sejam locais.
+
+        Args:
+            zip_code: CEP a ser consultado (pode incluir formatação).
+
+        Returns:
+            Um dicionário com os dados do endereço ('zip_code', 'street',
+            'neighborhood', 'city', 'state') ou None se o CEP for inválido ou
+            não for encontrado.
+        """
+        zip_code = "".join(filter(str.isdigit, str(zip_code or "")))
+        if len(zip_code) != 8:
+            return None
+
+        record = cls.objects.filter(pk=zip_code).first()
+        if record:
+            return record.as_address_data()
+
+        data = fetch_address_data(zip_code)
+        if data:
+            cls._store_api_data(zip_code, data)
+        return data
+
+    @classmethod
+    def _store_api_data(cls, zip_code: str, data: dict):
+        """Grava (write-back) na base local uma resposta obtida das APIs externas."""
+        state = (data.get("state") or "").strip().upper()
+        if len(state) != 2:
+            return
+        try:
+            # Savepoint próprio: uma falha aqui não pode invalidar a transação de quem chamou.
+            with transaction.atomic():
+                cls.objects.update_or_create(
+                    zip_code=zip_code,
+                    defaults={
+                        "street": (data.get("street") or "").strip()[:150],
+                        "neighborhood": (data.get("neighborhood") or "").strip()[:100],
+                        "city": (data.get("city") or "").strip()[:100],
+                        "state": state,
+                        "source": "api",
+                    },
+                )
+        except DatabaseError as e:
+            logger.error(f"Erro ao gravar o CEP {zip_code} na base local: {e}")
+
+
 class DummyOwnerModel(models.Model): # A DEFINIÇÃO DE DUMMYOWNERMODEL ESTÁ AQUI
     name = models.CharField(max_length=50)
 
@@ -0,0 +1,69 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Max
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.addresses.models import Address, prefetch_primary_address
+from apps.customers.models import Customer
+
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+
+ADDRESS_DATA = {"street": "Rua A", "number": "10", "neighborhood": "Centro",
+                "city": "Campinas", "state": "SP", "zip_code": "13010000"}
+
+
+class PrimaryAddressAccessorTests(TestCase):
+    """Testa `AddressOwnerMixin.address` com e sem endereços pré-carregados."""
+
+    def setUp(self):
+        Customer(customer_type="IND", full_name="Com Endereço", tax_id=CPF_VALID_1).save(address_data=ADDRESS_DATA)
+        Customer(customer_type="IND", full_name="Sem Endereço", tax_id=CPF_VALID_2).save()
+
+    def test_prefetched_address_needs_no_extra_queries(self):
+        with self.assertNumQueries(2):
+            customers = list(Customer.objects.prefetch_related(prefetch_primary_address()).order_by("full_name"))
+            addresses = [customer.address for customer in customers]
+        self.assertEqual(addresses[0].street, "Rua A")
+        self.assertIsNone(addresses[1])
+
+    def test_plain_prefetch_related_is_also_used(self):
+        customers = list(Customer.objects.prefetch_related("addresses").order_by("full_name"))
+        with self.assertNumQueries(0):
+            self.assertEqual(customers[0].address.city, "Campinas")
+
+    def test_without_prefetch_falls_back_to_query(self):
+        customer = Customer.objects.get(full_name="Com Endereço")
+        expected = customer.addresses.first()
+        with self.assertNumQueries(1):
+            self.assertEqual(customer.address, expected)
+
+    def test_saving_address_refreshes_prefetched_value(self):
+        customer = Customer.objects.prefetch_related(prefetch_primary_address()).get(full_name="Sem Endereço")
+        self.assertIsNone(customer.address)
+        customer.save(address_data=ADDRESS_DATA)
+        self.assertEqual(customer.address.street, "Rua A")
+        customer.save(address_data={})
+        self.assertIsNone(customer.address)
+
+    def test_primary_address_is_lowest_pk_with_several_addresses(self):
+        """Com vários endereços, todos os caminhos devolvem o de menor chave primária (o primeiro criado)."""
+        customer = Customer.objects.get(full_name="Sem Endereço")
+        content_type = ContentType.objects.get_for_model(Customer)
+        next_pk = (Address.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        # Gravados fora da ordem da chave primária; a ordenação padrão (UF, cidade) poria "Rua Nova" primeiro
+        Address.objects.bulk_create([
+            Address(pk=next_pk + 10, content_type=content_type, object_id=customer.pk,
+                    street="Rua Nova", city="Olinda", state="PE"),
+            Address(pk=next_pk, content_type=content_type, object_id=customer.pk,
+                    street="Rua Antiga", city="Recife", state="PE"),
+        ])
+        queryset = Customer.objects.filter(pk=customer.pk)
+
+        with CaptureQueriesContext(connection) as context:
+            prefetched = queryset.prefetch_related(prefetch_primary_address()).get()
+        self.assertIn("ORDER BY", context.captured_queries[-1]["sql"].upper())
+        self.assertEqual(prefetched.address.street, "Rua Antiga")
+        self.assertEqual(queryset.prefetch_related("addresses").get().address.street, "Rua Antiga")
+        self.assertEqual(queryset.get().address.street, "Rua Antiga")
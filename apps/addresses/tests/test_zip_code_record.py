@@ -0,0 +1,93 @@
+import os
+import tempfile
+import zipfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.addresses.models import ZipCodeRecord
+
+PATH_TO_FETCH_ADDRESS = "apps.addresses.models.fetch_address_data"
+
+CSV_CONTENT = (
+    "cep;logradouro;bairro;cidade;uf\n"
+    "01001-000;Praça da Sé;Sé;São Paulo;SP\n"
+    "20040002;Rua da Assembleia;Centro;Rio de Janeiro;RJ\n"
+    "123;Linha inválida;;;\n"
+)
+
+
+class ZipCodeRecordLookupTests(TestCase):
+    """Testa a consulta local-first de `ZipCodeRecord.lookup`."""
+
+    def test_local_record_is_used_without_calling_api(self):
+        ZipCodeRecord.objects.create(
+            zip_code="01001000", street="Praça da Sé", neighborhood="Sé", city="São Paulo", state="SP"
+        )
+        with patch(PATH_TO_FETCH_ADDRESS) as mock_fetch:
+            data = ZipCodeRecord.lookup("01001-000")
+        mock_fetch.assert_not_called()
+        self.assertEqual(data["city"], "São Paulo")
+
+    def test_miss_falls_back_to_api_and_writes_back(self):
+        api_data = {"zip_code": "87654321", "street": "Rua API", "neighborhood": "Centro",
+                    "city": "Curitiba", "state": "PR"}
+        with patch(PATH_TO_FETCH_ADDRESS, return_value=api_data) as mock_fetch:
+            self.assertEqual(ZipCodeRecord.lookup("87654321"), api_data)
+            self.assertEqual(ZipCodeRecord.lookup("87654321")["city"], "Curitiba")
+        mock_fetch.assert_called_once_with("87654321")
+        self.assertEqual(ZipCodeRecord.objects.get(pk="87654321").source, "api")
+
+    def test_api_miss_is_not_written(self):
+        with patch(PATH_TO_FETCH_ADDRESS, return_value=None):
+            self.assertIsNone(ZipCodeRecord.lookup("00000000"))
+        self.assertFalse(ZipCodeRecord.objects.exists())
+
+    def test_search_zip_code_view_answers_from_local_table(self):
+        ZipCodeRecord.objects.create(zip_code="01001000", city="São Paulo", state="SP")
+        with patch(PATH_TO_FETCH_ADDRESS) as mock_fetch:
+            response = self.client.get(reverse("customers:search_zip_code"), {"zip_code": "01001-000"})
+        mock_fetch.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["city"], "São Paulo")
+
+
+class ImportZipCodesCommandTests(TestCase):
+    """Testa o comando de gerenciamento `import_zip_codes`."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmpdir.name, "ceps.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV_CONTENT)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_imports_csv_in_batches(self):
+        out = StringIO()
+        call_command("import_zip_codes", self.csv_path, "--batch-size", "1", stdout=out)
+        self.assertEqual(
+            list(ZipCodeRecord.objects.values_list("zip_code", "city")),
+            [("01001000", "São Paulo"), ("20040002", "Rio de Janeiro")],
+        )
+        self.assertIn("1 linha(s) ignorada(s)", out.getvalue())
+
+    def test_imports_csv_inside_zip(self):
+        zip_path = os.path.join(self.tmpdir.name, "ceps.zip")
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.write(self.csv_path, "ceps.csv")
+        call_command("import_zip_codes", zip_path, stdout=StringIO())
+        self.assertEqual(ZipCodeRecord.objects.count(), 2)
+
+    def test_existing_records_are_kept_unless_update(self):
+        ZipCodeRecord.objects.create(zip_code="01001000", city="Antiga", state="SP", source="api")
+        call_command("import_zip_codes", self.csv_path, stdout=StringIO())
+        self.assertEqual(ZipCodeRecord.objects.get(pk="01001000").city, "Antiga")
+
+        call_command("import_zip_codes", self.csv_path, "--update", stdout=StringIO())
+        record = ZipCodeRecord.objects.get(pk="01001000")
+        self.assertEqual((record.city, record.source), ("São Paulo", "import"))
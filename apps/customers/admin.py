@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from apps.addresses.models import prefetch_primary_address
 from .models import Customer
 
 
@@ -68,6 +69,9 @@ class CustomerAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(prefetch_primary_address())
+
     # Métodos customizados para exibição
     def customer_type_display(self, obj):
         return dict(Customer.CUSTOMER_TYPE_CHOICES).get(
@@ -105,7 +109,7 @@ class CustomerAdmin(admin.ModelAdmin):
     is_vip_display.short_description = "Tipo"
 
     def address_display(self, obj):
-        address = obj.addresses.first()
+        address = obj.address
         if address:
             return format_html(
                 """
@@ -5,7 +5,8 @@ from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 from django.utils.functional import cached_property
-from apps.addresses.models import Address
+from apps.addresses.models import Address, AddressOwnerMixin
+from core.enrichment import company_data_applied, enqueue_enrichment, is_enrichment_deferred
 from core.services import fetch_company_data
 from validate_docbr import CPF, CNPJ
 import logging
@@ -13,7 +14,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class Customer(models.Model):
+class Customer(AddressOwnerMixin, models.Model):
     """
     Representa um cliente, que pode ser uma Pessoa Física ou Jurídica.
 
@@ -75,8 +76,6 @@ class Customer(models.Model):
     interests = models.TextField(verbose_name="Interesses", blank=True, null=True)
     notes = models.TextField(verbose_name="Observações", blank=True, null=True)
 
-    _fetched_api_data_this_save = None
-
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
@@ -151,6 +150,11 @@ class Customer(models.Model):
         1.  **Busca de Dados Externos (PJ):** Se Pessoa Jurídica, tenta buscar dados da empresa
             (Razão Social, Nome Fantasia, Endereço) usando o CNPJ via serviço externo.
             Campos `full_name` e `preferred_name` podem ser atualizados.
+            No modo diferido (`defer_enrichment=True` ou `COMPANY_ENRICHMENT_MODE =
+            "deferred"`), a consulta não é feita aqui: o cliente é salvo com os dados
+            informados e uma tarefa é enfileirada em `core.enrichment`.
+            A consulta reaproveita o resultado obtido pelo formulário (cache de
+            consultas); `refresh_company_data=True` força uma nova consulta às APIs.
         2.  **Validação:** Executa `self.full_clean()`.
         3.  **Persistência:** Salva a instância do cliente.
         4.  **Endereço:** Gerencia o endereço com base no argumento `address_data` (opcional).
@@ -161,17 +165,26 @@ class Customer(models.Model):
 
         Args:
             *args: Argumentos posicionais para `super().save()`.
-            **kwargs: Argumentos nomeados para `super().save()`. Pode incluir `address_data`.
+            **kwargs: Argumentos nomeados para `super().save()`. Pode incluir
+                `address_data`, `defer_enrichment` e `refresh_company_data`.
         """
         address_data_from_form = kwargs.pop("address_data", None)
-        self._fetched_api_data_this_save = False
+        defer_enrichment = is_enrichment_deferred(kwargs.pop("defer_enrichment", None))
+        refresh_company_data = kwargs.pop("refresh_company_data", False)
 
         company_api_data = None
+        enrich_later = False
         if self.customer_type == "CORP":
             temp_cleaned_tax_id = "".join(filter(str.isdigit, self.tax_id or ""))
             if len(temp_cleaned_tax_id) == 14:
-                company_api_data = fetch_company_data(temp_cleaned_tax_id)
-                self._fetched_api_data_this_save = True
+                if defer_enrichment:
+                    enrich_later = True
+                elif refresh_company_data:
+                    company_api_data = fetch_company_data(temp_cleaned_tax_id, refresh=True)
+                else:
+                    # Normalmente já está no cache de consultas, preenchido pela busca
+                    # feita no formulário (search-cnpj/): não gera nova requisição externa.
+                    company_api_data = fetch_company_data(temp_cleaned_tax_id)
 
             if company_api_data:
                 if company_api_data.get("full_name"):
@@ -208,9 +221,6 @@ class Customer(models.Model):
             elif form_requested_clear_address:
                 perform_delete_address = True
             elif self.customer_type == "CORP" and not form_provided_data:
-                if not self._fetched_api_data_this_save and not company_api_data:
-                    company_api_data = fetch_company_data(self.tax_id)
-
                 if company_api_data:
                     api_address_payload = {
                         k: company_api_data.get(k)
@@ -234,8 +244,44 @@ class Customer(models.Model):
             elif perform_delete_address:
                 self._delete_existing_address()
 
-        if hasattr(self, "_fetched_api_data_this_save"):
-            delattr(self, "_fetched_api_data_this_save")
+            if enrich_later:
+                enqueue_enrichment(
+                    self, self.tax_id, update_address=not form_provided_data, refresh=refresh_company_data
+                )
+
+    def apply_company_data(self, company_data: dict, update_address: bool = True):
+        """
+        Aplica os dados de empresa obtidos pela API a um Cliente já salvo.
+
+        Usado pela fila de enriquecimento (`core.enrichment`). Atualiza apenas os
+        campos que a API retornou, diretamente no banco (sem passar por `save()`,
+        que enfileiraria uma nova tarefa), e cria/atualiza o endereço se
+        `update_address` for True.
+
+        Args:
+            company_data (dict): Dados retornados por `fetch_company_data`.
+            update_address (bool): Se True, usa o endereço retornado pela API.
+        """
+        updates = {
+            field: company_data[field][: self._meta.get_field(field).max_length]
+            for field in ("full_name", "preferred_name")
+            if company_data.get(field)
+        }
+        with transaction.atomic():
+            if updates:
+                type(self).objects.filter(pk=self.pk).update(**updates)
+                for field, value in updates.items():
+                    setattr(self, field, value)
+                self.__dict__.pop("display_name", None)
+                company_data_applied.send(sender=type(self), instance=self, fields=list(updates))
+
+            if update_address:
+                api_address_payload = {
+                    k: company_data.get(k)
+                    for k in ["zip_code", "street", "number", "complement", "neighborhood", "city", "state"]
+                }
+                if any(v for v in api_address_payload.values() if v not in [None, ""]):
+                    self._update_or_create_address_from_data(api_address_payload, from_api=True)
 
     def _update_or_create_address_from_data(
         self, address_data: dict, from_api: bool = False
@@ -273,6 +319,7 @@ class Customer(models.Model):
                 object_id=self.pk,
                 defaults=cleaned_address_data,
             )
+            self.clear_address_cache()
             action = "criado" if created else "atualizado"
             source_log = "API" if from_api else "formulário"
             logger.info(
@@ -285,19 +332,13 @@ class Customer(models.Model):
             raise
 
     def _delete_existing_address(self):
-        """Deleta o primeiro endereço associado a este cliente, se existir."""
-        existing_address = self.addresses.first()
+        """Deleta o endereço principal (o primeiro criado) associado a este cliente, se existir."""
+        existing_address = self.addresses.order_by("pk").first()
         if existing_address:
             existing_address.delete()
+            self.clear_address_cache()
             logger.info(f"Endereço existente deletado para Cliente ID {self.pk}.")
 
-    @property
-    def address(self) -> Address | None:
-        """
-        Retorna o primeiro endereço associado ao cliente, ou `None`.
-        """
-        return self.addresses.first()
-
     @cached_property
     def display_name(self) -> str:
         """
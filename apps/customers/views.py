@@ -6,6 +6,7 @@ from django.views.generic import ListView, DetailView, UpdateView, CreateView
 from django.http import HttpResponseRedirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 
+from apps.addresses.models import prefetch_primary_address
 from .models import Customer
 from .forms import CustomerForm
 import logging
@@ -32,7 +33,7 @@ class CustomerListView(LoginRequiredMixin, ListView):
 
         Filtra por `is_active=True`. Aplica filtros adicionais baseados
         nos parâmetros GET `customer_type` e `search`.
-        Otimiza com `prefetch_related('addresses')`.
+        Otimiza com `prefetch_primary_address()` (endereço principal sem uma consulta por cliente).
         """
         queryset = super().get_queryset().filter(is_active=True)
 
@@ -55,7 +56,7 @@ class CustomerListView(LoginRequiredMixin, ListView):
 
             queryset = queryset.filter(query_conditions)
 
-        return queryset.prefetch_related("addresses")
+        return queryset.prefetch_related(prefetch_primary_address())
 
     def get_context_data(self, **kwargs):
         """
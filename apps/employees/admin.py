@@ -46,6 +46,6 @@ class EmployeeAdmin(UserAdmin):
         """Garante que o address seja validado junto com o employee"""
         super().save_model(request, obj, form, change)
         if obj.addresses.exists():
-            obj.addresses.first().full_clean()
+            obj.addresses.order_by("pk").first().full_clean()
 
 admin.site.register(Employee, EmployeeAdmin)
\ No newline at end of file
@@ -4,12 +4,13 @@ from django.db import models
 from django.core.validators import RegexValidator
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import transaction
+from apps.addresses.models import AddressOwnerMixin
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class Employee(AbstractUser):
+class Employee(AddressOwnerMixin, AbstractUser):
     """
     Modelo customizado para representar um funcionário (usuário do sistema).
 
@@ -89,16 +90,6 @@ class Employee(AbstractUser):
         verbose_name_plural = "Funcionários"
         ordering = ["last_name", "first_name"]
 
-    @property
-    def address(self):
-        """
-        Retorna o primeiro endereço associado ao funcionário.
-
-        Acessa a `GenericRelation` `addresses` e retorna o primeiro objeto `Address`
-        encontrado, ou `None` se o funcionário não tiver nenhum endereço cadastrado.
-        """
-        return self.addresses.first()
-
     def save(self, *args, **kwargs):
         """
         Salva a instância do funcionário e tenta completar dados do seu endereço.
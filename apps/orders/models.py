@@ -93,6 +93,21 @@ class Order(models.Model):
     def __str__(self):
         return f"Pedido #{self.id} - {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        """
+        Salva o pedido sem sobrescrever `_stock_updated`.
+
+        A marcação só é gravada pela baixa de estoque da confirmação (UPDATE
+        condicional em `apps.orders.signals`): uma instância carregada antes
+        dela não pode desfazê-la ao ser salva, o que permitiria uma segunda baixa.
+        """
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != '_stock_updated'
+            ]
+        super().save(*args, **kwargs)
+
 
 class OrderItem(models.Model):
     """
@@ -1,10 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 from django.db import transaction
-from django.core.exceptions import ValidationError
+from django.db.models import Sum
 import logging
-from .models import Order
-from apps.stock.models import Stock, StockMovement
+from .models import Order, OrderItem
+from apps.stock.models import Stock, StockReservation
 from apps.employees.models import Employee 
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,11 @@ logger = logging.getLogger(__name__)
 @receiver(post_save, sender=Order)
 def update_stock_on_order_confirmation(sender, instance, created, **kwargs):
     """
-    Signal atualizado para funcionar melhor no admin
+    Dá baixa no estoque quando o pedido é confirmado.
+
+    Soma as quantidades dos itens por produto e aplica as baixas com
+    `Stock.decrement_many`: o que estiver reservado para o pedido sai da reserva
+    e o restante do estoque livre (baixa otimista, sem bloquear os estoques antes).
     """
     # Verifica se é um pedido confirmado e se o estoque ainda não foi atualizado
     if instance.status == 'confirmed' and not instance._stock_updated:
@@ -23,41 +27,34 @@ def update_stock_on_order_confirmation(sender, instance, created, **kwargs):
                 if not system_user:
                     logger.error("Usuário sistema não configurado")
                     return
-                
-                # Processa cada item do pedido
-                for item in instance.items.all():
-                    try:
-                        stock = Stock.objects.select_for_update().get(product=item.product)
-                        
-                        if stock.quantity < item.quantity:
-                            logger.error(f"Estoque insuficiente para {item.product.name}")
-                            raise ValidationError(
-                                f"Estoque insuficiente: {item.product.name}. "
-                                f"Disponível: {stock.quantity}, Necessário: {item.quantity}"
-                            )
-                        
-                        # Atualiza o estoque
-                        stock.quantity -= item.quantity
-                        stock.save()
-                        
-                        # Registra a movimentação
-                        StockMovement.objects.create(
-                            product=item.product,
-                            movement_type='OUT',
-                            quantity=item.quantity,
-                            reference_id=f"ORDER-{instance.id}",
-                            user=system_user,  
-                            notes=f"Baixa automática para pedido #{instance.id}"
-                        )
-                    
-                    except Stock.DoesNotExist:
-                        logger.error(f"Produto {item.product.name} sem registro de estoque")
-                        raise ValidationError(f"Produto {item.product.name} não encontrado no estoque")
-                
-                # Marca o pedido como processado
+
+                # Marca o pedido como processado; só uma confirmação concorrente consegue marcá-lo
+                claimed = Order.objects.filter(pk=instance.pk, _stock_updated=False).update(_stock_updated=True)
+                if not claimed:
+                    instance._stock_updated = True
+                    return
+
+                quantities = dict(
+                    instance.items.order_by()
+                    .values('product_id')
+                    .annotate(total=Sum('quantity'))
+                    .values_list('product_id', 'total')
+                )
+                Stock.decrement_many(
+                    quantities,
+                    user=system_user,
+                    reference_id=f"ORDER-{instance.id}",
+                    notes=f"Baixa automática para pedido #{instance.id}",
+                    reserved=StockReservation.consume_order(instance),
+                )
                 instance._stock_updated = True
-                instance.save(update_fields=['_stock_updated'])
-                
+
         except Exception as e:
             logger.error(f"Erro ao atualizar estoque: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+
+@receiver(pre_delete, sender=OrderItem)
+def release_reservations_on_item_delete(sender, instance, **kwargs):
+    """Devolve ao estoque livre as reservas ativas do item antes de excluí-lo (também na exclusão do pedido)."""
+    StockReservation.release(StockReservation.objects.filter(order_item=instance))
@@ -1,3 +1,116 @@
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
-# Create your tests here.
+from apps.employees.models import Employee
+from apps.stock.tests import _create_stocks
+
+# Os apps de pedidos e estoque ainda não estão em INSTALLED_APPS; os modelos só são importados nos testes
+ORDERS_INSTALLED = apps.is_installed('apps.orders') and apps.is_installed('apps.stock')
+
+
+@skipUnless(ORDERS_INSTALLED, "Apps de estoque e pedidos não instalados")
+class OrderConfirmationSignalTests(TestCase):
+    """Testa a baixa de estoque na confirmação do pedido (`update_stock_on_order_confirmation`)."""
+
+    def setUp(self):
+        from apps.orders.models import Order, OrderItem
+        from apps.stock.models import Stock, StockMovement, StockReservation
+        self.Order, self.OrderItem = Order, OrderItem
+        self.Stock, self.StockMovement, self.StockReservation = Stock, StockMovement, StockReservation
+
+        self.first, self.second = _create_stocks(10, 4)
+        self.user = get_user_model().objects.create_user(username='sistema', password='x')
+        # `Employee.get_system_user` ainda não existe neste projeto
+        system_user = patch.object(Employee, 'get_system_user', create=True, return_value=self.user)
+        self.get_system_user = system_user.start()
+        self.addCleanup(system_user.stop)
+
+    def _order(self, *items):
+        order = self.Order.objects.create()
+        self.OrderItem.objects.bulk_create(
+            self.OrderItem(order=order, product_id=product_id, quantity=qty, historical_price=2)
+            for product_id, qty in items
+        )
+        return order
+
+    def _confirm(self, order):
+        order.status = 'confirmed'
+        order.save()
+
+    def _stocks(self):
+        return list(self.Stock.objects.order_by('product_id').values_list('quantity', 'reserved'))
+
+    def test_confirmation_decrements_stock_once_per_product(self):
+        order = self._order((self.first, 2), (self.second, 1), (self.first, 3))
+
+        self._confirm(order)
+
+        self.assertEqual(self._stocks(), [(5, 0), (3, 0)])
+        self.assertEqual(
+            list(self.StockMovement.objects.order_by('product_id').values_list('product_id', 'quantity', 'reference_id')),
+            [(self.first, 5, f"ORDER-{order.pk}"), (self.second, 1, f"ORDER-{order.pk}")],
+        )
+        self.assertTrue(order._stock_updated)
+        self.assertTrue(self.Order.objects.get(pk=order.pk)._stock_updated)
+
+    def test_saving_again_does_not_decrement_twice(self):
+        order = self._order((self.first, 2))
+        stale = self.Order.objects.get(pk=order.pk)
+        self._confirm(order)
+
+        order.save()
+        self._confirm(stale)  # Cópia carregada antes da confirmação: a marcação no banco impede a segunda baixa
+
+        self.assertEqual(self._stocks(), [(8, 0), (4, 0)])
+        self.assertEqual(self.StockMovement.objects.count(), 1)
+        self.assertTrue(stale._stock_updated)
+
+    def test_confirmation_consumes_reservations(self):
+        order = self._order((self.first, 3), (self.second, 4))
+        self.StockReservation.reserve_order(order)
+        self.assertEqual(self._stocks(), [(10, 3), (4, 4)])
+
+        self._confirm(order)
+
+        self.assertEqual(self._stocks(), [(7, 0), (0, 0)])
+        self.assertEqual(set(order.reservations.values_list('status', flat=True)), {'consumed'})
+
+    def test_insufficient_stock_rolls_back_the_confirmation(self):
+        order = self._order((self.first, 3), (self.second, 5))
+        self.StockReservation.reserve_order(self._order((self.first, 1)))
+
+        with self.assertRaises(ValidationError):
+            self._confirm(order)
+
+        self.assertEqual(self._stocks(), [(10, 1), (4, 0)])
+        self.assertFalse(self.StockMovement.objects.exists())
+        self.assertFalse(self.Order.objects.get(pk=order.pk)._stock_updated)
+
+    def test_without_system_user_stock_is_untouched(self):
+        self.get_system_user.return_value = None
+        order = self._order((self.first, 2))
+
+        self._confirm(order)
+
+        self.assertEqual(self._stocks(), [(10, 0), (4, 0)])
+        self.assertFalse(self.Order.objects.get(pk=order.pk)._stock_updated)
+
+    def test_confirming_a_large_order_takes_constant_queries(self):
+        products = _create_stocks(*[10] * 50)
+        order = self._order(*[(product_id, 2) for product_id in products])
+        self.StockReservation.reserve_order(order)
+        order.status = 'confirmed'
+
+        # UPDATE do pedido, marcação, reservas (leitura e baixa), itens somados,
+        # um UPDATE dos estoques e um INSERT das movimentações (mais 4 pares de savepoint)
+        with self.assertNumQueries(15):
+            order.save()
+
+        self.assertEqual(
+            set(self.Stock.objects.filter(product_id__in=products).values_list('quantity', 'reserved')), {(8, 0)}
+        )
@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import ReportJob
 
-# Register your models here.
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "report", "output_format", "status", "processed_rows", "total_rows", "requested_by", "created_at", "expires_at")
+    list_filter = ("status", "report", "output_format")
+    readonly_fields = (
+        "uuid", "report", "filters", "output_format", "status", "total_rows", "processed_rows",
+        "file", "filename", "error", "requested_by", "created_at", "updated_at", "finished_at", "expires_at",
+    )
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
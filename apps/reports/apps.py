@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
-    verbose_name = "Relatórios"
\ No newline at end of file
+    verbose_name = "Relatórios"
+
+    def ready(self):
+        import apps.reports.signals
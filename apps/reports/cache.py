@@ -0,0 +1,215 @@
+## Cache dos arquivos de relatório gerados, por relatório + filtros + formato.
+import hashlib
+import io
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Model, QuerySet
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024  # bytes (0 desativa o cache)
+DEFAULT_MAX_ENTRY_SIZE = 8 * 1024 * 1024  # bytes
+DEFAULT_TTL = 60 * 10  # segundos
+
+GENERATION_PK = 1
+
+
+class CachedReport:
+    """
+    Relatório em cache: o arquivo gerado ou, nos formatos com data de geração
+    no conteúdo (Excel), as linhas intermediárias serializadas (`capture_rows`).
+    """
+
+    __slots__ = ("content", "content_type", "expires")
+
+    def __init__(self, content: bytes, content_type: str, expires: float):
+        self.content = content
+        self.content_type = content_type
+        self.expires = expires
+
+    def iter_rows(self):
+        """Linhas intermediárias guardadas por `ReportCache.capture_rows`, na ordem original."""
+        stream = io.BytesIO(self.content)
+        while stream.tell() < len(self.content):
+            yield pickle.load(stream)
+
+
+class ReportCache:
+    """
+    Cache em memória (por processo) dos arquivos de relatório já gerados.
+
+    A chave combina o relatório (`report_key` da view), os filtros do
+    formulário normalizados (`cleaned_data`, sem campos vazios nem os campos
+    de `non_filter_fields`) e o formato de saída, de modo que o mesmo relatório
+    pedido de novo é servido sem consultar o banco.
+
+    - Tamanho: as entradas ficam em uma LRU limitada pelo total de bytes
+      (`REPORT_CACHE_MAX_SIZE`); arquivos maiores que `REPORT_CACHE_MAX_ENTRY_SIZE`
+      não são guardados. As entradas expiram após `REPORT_CACHE_TTL` segundos.
+    - Invalidação: qualquer `post_save`/`post_delete` de Cliente, Fornecedor ou
+      Endereço (`apps.reports.signals`) incrementa a geração dos dados
+      (`ReportCacheGeneration`, no banco), que faz parte da chave: a invalidação
+      vale para todos os processos, qualquer que seja o backend do cache do Django.
+    - Cabeçalhos: o nome do arquivo (com data/hora) é gerado de novo a cada
+      resposta; no Excel, que traz a data de geração na planilha, são guardadas
+      as linhas intermediárias e a planilha é montada de novo, sem consultar o banco.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    @property
+    def max_size(self) -> int:
+        return int(getattr(settings, "REPORT_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE))
+
+    @property
+    def max_entry_size(self) -> int:
+        return int(getattr(settings, "REPORT_CACHE_MAX_ENTRY_SIZE", DEFAULT_MAX_ENTRY_SIZE))
+
+    @property
+    def ttl(self) -> int:
+        return int(getattr(settings, "REPORT_CACHE_TTL", DEFAULT_TTL))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def make_key(self, report_key: str, form) -> str:
+        """Chave do relatório para os filtros e o formato de saída de um formulário válido."""
+        filters = {
+            name: _normalize(value)
+            for name, value in form.cleaned_data.items()
+            if name not in form.non_filter_fields and value not in (None, "", [], ())
+        }
+        payload = json.dumps(
+            [report_key, form.cleaned_data["output_format"], filters], cls=DjangoJSONEncoder, sort_keys=True
+        )
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        return f"{self.generation()}:{digest}"
+
+    def generation(self) -> int:
+        """Geração atual dos dados dos relatórios (incrementada a cada invalidação)."""
+        from .models import ReportCacheGeneration
+
+        return ReportCacheGeneration.objects.filter(pk=GENERATION_PK).values_list("generation", flat=True).first() or 0
+
+    def get(self, key: str) -> CachedReport | None:
+        """Retorna o relatório em cache para a chave, ou None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            self._count("hits" if entry is not None else "misses")
+        return entry
+
+    def set(self, key: str, content: bytes, content_type: str):
+        """Guarda um relatório gerado, removendo os menos usados para respeitar o limite de bytes."""
+        if not self.enabled or len(content) > self.max_entry_size:
+            return
+        entry = CachedReport(content, content_type, time.monotonic() + self.ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._size += len(content)
+            while self._size > self.max_size and self._entries:
+                self._remove(next(iter(self._entries)))
+                self._count("evictions")
+
+    def capture(self, key: str, chunks, content_type: str):
+        """
+        Repassa os pedaços de uma resposta em streaming e, ao final, guarda o
+        arquivo completo no cache. Se o arquivo passar de `REPORT_CACHE_MAX_ENTRY_SIZE`,
+        os pedaços deixam de ser acumulados e nada é guardado.
+        """
+        parts, size = [], 0
+        for chunk in chunks:
+            if parts is not None:
+                size += len(chunk)
+                if size > self.max_entry_size:
+                    parts = None
+                else:
+                    parts.append(bytes(chunk))
+            yield chunk
+        if parts is not None:
+            self.set(key, b"".join(parts), content_type)
+
+    def capture_rows(self, key: str, rows, content_type: str):
+        """
+        Como `capture`, mas para as linhas intermediárias de um relatório: cada
+        linha é serializada à medida que passa e, se todas couberem em
+        `REPORT_CACHE_MAX_ENTRY_SIZE`, são guardadas ao final (ver `CachedReport.iter_rows`).
+        """
+        parts, size = [], 0
+        for row in rows:
+            if parts is not None:
+                data = pickle.dumps(row, pickle.HIGHEST_PROTOCOL)
+                size += len(data)
+                if size > self.max_entry_size:
+                    parts = None
+                else:
+                    parts.append(data)
+            yield row
+        if parts is not None:
+            self.set(key, b"".join(parts), content_type)
+
+    def invalidate(self):
+        """Invalida todos os relatórios em cache, em todos os processos."""
+        from .models import ReportCacheGeneration
+
+        if not ReportCacheGeneration.objects.filter(pk=GENERATION_PK).update(generation=F("generation") + 1):
+            _, created = ReportCacheGeneration.objects.get_or_create(pk=GENERATION_PK, defaults={"generation": 1})
+            if not created:
+                ReportCacheGeneration.objects.filter(pk=GENERATION_PK).update(generation=F("generation") + 1)
+        self.invalidate_local()
+
+    def invalidate_local(self):
+        """Descarta os relatórios em cache deste processo (sem alterar a geração compartilhada)."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def clear_local(self):
+        """Esvazia o cache deste processo e zera os contadores."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._counters.clear()
+
+    def stats(self) -> dict:
+        """
+        Retorna os contadores deste processo e a ocupação do cache.
+
+        Exemplo: {"hits": 3, "misses": 5, "evictions": 1, "entries": 4, "size": 183204}
+        """
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "size": self._size}
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.content)
+
+    def _count(self, counter):
+        self._counters[counter] = self._counters.get(counter, 0) + 1
+
+
+def _normalize(value):
+    """Converte valores de `cleaned_data` em algo serializável e estável para a chave."""
+    if isinstance(value, Model):
+        return value.pk
+    if isinstance(value, (QuerySet, list, tuple, set)):
+        return sorted(str(_normalize(item)) for item in value)
+    return value
+
+
+report_cache = ReportCache()
@@ -0,0 +1,125 @@
+"""
+Filtros declarativos dos formulários de relatório.
+
+Cada formulário descreve seus filtros em `filter_spec` (campo do formulário ->
+condição no modelo) e `compile_filters` converte os valores preenchidos em
+condições para `queryset.filter(*condições)`. Filtros de endereço viram
+subconsultas `EXISTS` sobre `Address` (content_type, object_id) em vez de
+joins pela relação genérica `addresses`, então o resultado não tem linhas
+repetidas e dispensa o `DISTINCT`.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.addresses.models import Address
+
+
+class ReportFilter:
+    """
+    Filtro de um campo do formulário.
+
+    Args:
+        field_name: Campo do formulário com o valor do filtro.
+        model_field: Campo do modelo filtrado (padrão: o mesmo nome do campo do formulário).
+    """
+
+    def __init__(self, field_name: str, model_field: str | None = None):
+        self.field_name = field_name
+        self.model_field = model_field or field_name
+
+    def condition(self, model, value):
+        """Condição (Q ou expressão booleana) para um valor preenchido."""
+        raise NotImplementedError("Subclasses de ReportFilter devem implementar condition()")
+
+
+class TextFilter(ReportFilter):
+    """Busca parcial sem diferenciar maiúsculas (`icontains`); `digits_only` mantém apenas os dígitos do valor."""
+
+    def __init__(self, field_name, model_field=None, digits_only=False):
+        super().__init__(field_name, model_field)
+        self.digits_only = digits_only
+
+    def condition(self, model, value):
+        if self.digits_only:
+            value = "".join(filter(str.isdigit, value))
+        return Q(**{f"{self.model_field}__icontains": value})
+
+
+class ChoiceFilter(ReportFilter):
+    """Igualdade com o valor escolhido."""
+
+    def condition(self, model, value):
+        return Q(**{self.model_field: value})
+
+
+class BooleanFilter(ReportFilter):
+    """Escolha "True"/"False" (ver `BOOLEAN_CHOICES_WITH_ALL`)."""
+
+    def condition(self, model, value):
+        return Q(**{self.model_field: value == "True"})
+
+
+class DateRangeFilter(ReportFilter):
+    """
+    Limite de um intervalo de datas sobre um campo de data/hora: `bound="start"`
+    inclui a partir do início do dia e `bound="end"` inclui o dia inteiro. Os
+    limites são convertidos para datas/horas no fuso atual, sem aplicar funções
+    à coluna, de modo que um índice nela continua utilizável.
+    """
+
+    def __init__(self, field_name, model_field, bound):
+        super().__init__(field_name, model_field)
+        if bound not in ("start", "end"):
+            raise ValueError(f"Limite de intervalo inválido: {bound}")
+        self.bound = bound
+
+    def condition(self, model, value):
+        if self.bound == "start":
+            return Q(**{f"{self.model_field}__gte": _start_of_day(value)})
+        return Q(**{f"{self.model_field}__lt": _start_of_day(value + timedelta(days=1))})
+
+
+class AddressFilter(ReportFilter):
+    """
+    Filtro por um campo do endereço (`Address`) do registro, como subconsulta
+    `EXISTS` correlacionada por content_type e object_id.
+
+    Args:
+        field_name: Campo do formulário.
+        address_lookup: Lookup sobre `Address` (ex: "city__icontains", "state").
+    """
+
+    def __init__(self, field_name, address_lookup):
+        super().__init__(field_name)
+        self.address_lookup = address_lookup
+
+    def condition(self, model, value):
+        addresses = Address.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id=OuterRef("pk"),
+            **{self.address_lookup: value},
+        )
+        return Exists(addresses)
+
+
+def compile_filters(model, filter_spec, cleaned_data) -> list:
+    """
+    Converte os filtros preenchidos em condições para `queryset.filter(*condições)`.
+    Valores vazios (None, '') são ignorados ("Todos").
+    """
+    conditions = []
+    for report_filter in filter_spec:
+        value = cleaned_data.get(report_filter.field_name)
+        if value is None or value == "":
+            continue
+        conditions.append(report_filter.condition(model, value))
+    return conditions
+
+
+def _start_of_day(day):
+    start = datetime.combine(day, time.min)
+    return timezone.make_aware(start) if settings.USE_TZ else start
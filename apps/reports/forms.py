@@ -1,7 +1,9 @@
 from django import forms
 from apps.customers.models import Customer
 from apps.suppliers.models import Supplier
-from apps.addresses.models import Address
+from apps.addresses.models import Address, prefetch_primary_address
+
+from .filters import AddressFilter, BooleanFilter, ChoiceFilter, DateRangeFilter, TextFilter, compile_filters
 
 
 BOOLEAN_CHOICES_WITH_ALL = (
@@ -18,18 +20,55 @@ class BaseReportForm(forms.Form):
             ('excel', 'Excel (.xlsx)'),
             ('csv', 'CSV (.csv)'),
             ('json', 'JSON (.json)'),
+            ('ndjson', 'NDJSON - um registro por linha (.ndjson)'),
+            ('parquet', 'Parquet - colunas tipadas (.parquet)'),
+            ('arrow', 'Arrow IPC - colunas tipadas (.arrow)'),
         ],
         widget=forms.Select(attrs={'class': 'form-select'}),
         initial='excel' # Definir um valor inicial pode ser útil
     )
+    run_in_background = forms.BooleanField(
+        label="Gerar em segundo plano",
+        required=False,
+        help_text="Para relatórios grandes: o arquivo é gerado fora da requisição e baixado quando ficar pronto.",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
+    # Campos que controlam a geração e não são filtros dos dados
+    non_filter_fields = ('output_format', 'run_in_background')
+
+    model = None      # Deve ser definido pela subclasse
+    filter_spec = ()  # Filtros declarativos (apps.reports.filters), na ordem de aplicação
+    ordering = ('full_name', 'pk')  # Única, para a paginação por chave da pré-visualização
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('registration_date_start')
+        end = cleaned_data.get('registration_date_end')
+        if start and end and start > end:
+            self.add_error('registration_date_end', "A data final deve ser igual ou posterior à data inicial.")
+        return cleaned_data
+
+    @property
+    def registration_date_fields(self):
+        """Campos do período de cadastro, na ordem de exibição (usado pelo template)."""
+        return [self[name] for name in ('registration_date_start', 'registration_date_end') if name in self.fields]
 
     def get_queryset(self):
         """
-        Este método DEVE ser implementado pelas subclasses.
-        Ele é responsável por retornar o queryset filtrado com base
-        nos campos do formulário específico.
+        Retorna o queryset de `model` filtrado pelos campos preenchidos, conforme
+        `filter_spec`. Os filtros de endereço são subconsultas EXISTS, então cada
+        registro aparece uma única vez sem precisar de `.distinct()`.
         """
-        raise NotImplementedError("Subclasses devem implementar get_queryset() para retornar os dados filtrados.")
+        if self.model is None:
+            raise NotImplementedError("Subclasses de BaseReportForm devem definir 'model'.")
+        queryset = self.model.objects.prefetch_related(prefetch_primary_address())
+
+        if not self.is_valid(): # Se o formulário não for válido, não aplicar filtros
+            return queryset.none()
+
+        conditions = compile_filters(self.model, self.filter_spec, self.cleaned_data)
+        return queryset.filter(*conditions).order_by(*self.ordering)
 
     def get_applied_filters_display(self):
         """
@@ -40,7 +79,7 @@ class BaseReportForm(forms.Form):
         applied_filters = []
         if self.is_valid(): # Garante que temos cleaned_data
             for field_name, field_obj in self.fields.items():
-                if field_name == 'output_format':
+                if field_name in self.non_filter_fields:
                     continue
 
                 value = self.cleaned_data.get(field_name)
@@ -122,73 +161,32 @@ class CustomerReportForm(BaseReportForm):
         required=False,
         widget=forms.Select(attrs={'class': 'form-select'})
     )
-    # Adicione outros filtros conforme necessário:
-    # registration_date_start = forms.DateField(label="Cadastrado de", required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
-    # registration_date_end = forms.DateField(label="Cadastrado até", required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
-
-    def get_queryset(self):
-        queryset = Customer.objects.prefetch_related('addresses').all() # Começa com todos
-        
-        if not self.is_valid(): # Se o formulário não for válido, não aplicar filtros
-            return queryset.none() # Ou queryset dependendo do comportamento desejado
-
-        # Filtros de texto
-        full_name = self.cleaned_data.get('full_name')
-        if full_name:
-            queryset = queryset.filter(full_name__icontains=full_name)
-
-        preferred_name = self.cleaned_data.get('preferred_name')
-        if preferred_name:
-            queryset = queryset.filter(preferred_name__icontains=preferred_name)
-
-        tax_id = self.cleaned_data.get('tax_id')
-        if tax_id:
-            cleaned_tax_id = "".join(filter(str.isdigit, tax_id))
-            queryset = queryset.filter(tax_id__icontains=cleaned_tax_id)
-        
-        phone = self.cleaned_data.get('phone')
-        if phone:
-            cleaned_phone = "".join(filter(str.isdigit, phone))
-            queryset = queryset.filter(phone__icontains=cleaned_phone)
-
-        email = self.cleaned_data.get('email')
-        if email:
-            queryset = queryset.filter(email__icontains=email)
-
-        # Filtros de endereço (MODIFICADO/ADICIONADO)
-        address_city = self.cleaned_data.get('address_city')
-        if address_city:
-            queryset = queryset.filter(addresses__city__icontains=address_city)
-
-        address_state = self.cleaned_data.get('address_state')
-        if address_state:
-            queryset = queryset.filter(addresses__state=address_state)
-
-        # Filtros de escolha
-        customer_type = self.cleaned_data.get('customer_type')
-        if customer_type: # Se não for '' (Todos)
-            queryset = queryset.filter(customer_type=customer_type)
-
-        is_active_filter = self.cleaned_data.get('is_active')
-        if is_active_filter: 
-            queryset = queryset.filter(is_active=(is_active_filter == 'True'))
+    registration_date_start = forms.DateField(
+        label="Cadastrado de",
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d')
+    )
+    registration_date_end = forms.DateField(
+        label="Cadastrado até",
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d')
+    )
 
-        is_vip_filter = self.cleaned_data.get('is_vip')
-        if is_vip_filter: 
-            queryset = queryset.filter(is_vip=(is_vip_filter == 'True'))
-        
-        # Exemplo com datas (descomente os campos no form se for usar)
-        # registration_date_start = self.cleaned_data.get('registration_date_start')
-        # if registration_date_start:
-        #     queryset = queryset.filter(registration_date__gte=registration_date_start)
-        #
-        # registration_date_end = self.cleaned_data.get('registration_date_end')
-        # if registration_date_end:
-        #     # Adiciona 1 dia para incluir o dia final completo se for apenas data
-        #     from datetime import timedelta
-        #     queryset = queryset.filter(registration_date__lte=registration_date_end + timedelta(days=1))
-            
-        return queryset.distinct().order_by('full_name')
+    model = Customer
+    filter_spec = (
+        TextFilter('full_name'),
+        TextFilter('preferred_name'),
+        TextFilter('tax_id', digits_only=True),
+        TextFilter('phone', digits_only=True),
+        TextFilter('email'),
+        AddressFilter('address_city', 'city__icontains'),
+        AddressFilter('address_state', 'state'),
+        ChoiceFilter('customer_type'),
+        BooleanFilter('is_active'),
+        BooleanFilter('is_vip'),
+        DateRangeFilter('registration_date_start', 'registration_date', bound='start'),
+        DateRangeFilter('registration_date_end', 'registration_date', bound='end'),
+    )
     
 
 class SupplierReportForm(BaseReportForm):
@@ -240,64 +238,28 @@ class SupplierReportForm(BaseReportForm):
         required=False,
         widget=forms.Select(attrs={'class': 'form-select'})
     )
-    # contact_person foi REMOVIDO
-    # registration_date_start = forms.DateField(label="Cadastrado de", required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
-    # registration_date_end = forms.DateField(label="Cadastrado até", required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
-
-    def get_queryset(self):
-        queryset = Supplier.objects.prefetch_related('addresses').all()
-
-        if not self.is_valid():
-            return queryset.none()
-
-        full_name = self.cleaned_data.get('full_name')
-        if full_name:
-            queryset = queryset.filter(full_name__icontains=full_name)
-
-        preferred_name = self.cleaned_data.get('preferred_name')
-        if preferred_name:
-            queryset = queryset.filter(preferred_name__icontains=preferred_name)
-
-        tax_id = self.cleaned_data.get('tax_id')
-        if tax_id:
-            cleaned_tax_id = "".join(filter(str.isdigit, tax_id))
-            queryset = queryset.filter(tax_id__icontains=cleaned_tax_id)
-
-        phone = self.cleaned_data.get('phone')
-        if phone:
-            cleaned_phone = "".join(filter(str.isdigit, phone))
-            queryset = queryset.filter(phone__icontains=cleaned_phone)
-
-        email = self.cleaned_data.get('email')
-        if email:
-            queryset = queryset.filter(email__icontains=email)
-
-        address_city = self.cleaned_data.get('address_city')
-        if address_city:
-            queryset = queryset.filter(addresses__city__icontains=address_city)
-
-        address_state = self.cleaned_data.get('address_state')
-        if address_state:
-            queryset = queryset.filter(addresses__state=address_state)
-
-        supplier_type = self.cleaned_data.get('supplier_type')
-        if supplier_type:
-            queryset = queryset.filter(supplier_type=supplier_type)
-
-        is_active_filter = self.cleaned_data.get('is_active')
-        if is_active_filter:
-            queryset = queryset.filter(is_active=(is_active_filter == 'True'))
-            
-        # Filtro por contact_person foi REMOVIDO
-        
-        # Exemplo com datas (descomente os campos no form se for usar)
-        # registration_date_start = self.cleaned_data.get('registration_date_start')
-        # if registration_date_start:
-        #     queryset = queryset.filter(registration_date__gte=registration_date_start)
-        #
-        # registration_date_end = self.cleaned_data.get('registration_date_end')
-        # if registration_date_end:
-        #     from datetime import timedelta
-        #     queryset = queryset.filter(registration_date__lte=registration_date_end + timedelta(days=1))
+    registration_date_start = forms.DateField(
+        label="Cadastrado de",
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d')
+    )
+    registration_date_end = forms.DateField(
+        label="Cadastrado até",
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d')
+    )
 
-        return queryset.distinct().order_by('full_name')
\ No newline at end of file
+    model = Supplier
+    filter_spec = (
+        TextFilter('full_name'),
+        TextFilter('preferred_name'),
+        TextFilter('tax_id', digits_only=True),
+        TextFilter('phone', digits_only=True),
+        TextFilter('email'),
+        AddressFilter('address_city', 'city__icontains'),
+        AddressFilter('address_state', 'state'),
+        ChoiceFilter('supplier_type'),
+        BooleanFilter('is_active'),
+        DateRangeFilter('registration_date_start', 'registration_date', bound='start'),
+        DateRangeFilter('registration_date_end', 'registration_date', bound='end'),
+    )
@@ -0,0 +1,154 @@
+## Geração de relatórios em segundo plano, fora do ciclo da requisição.
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.reports.models import ReportJob
+from core import jobs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60 * 60 * 24  # segundos
+DEFAULT_STALE_AFTER = 60 * 30  # segundos
+DEFAULT_PROGRESS_EVERY = 1000  # registros
+
+
+def enqueue_report_job(report_key: str, form, user=None) -> ReportJob:
+    """
+    Cria um ReportJob pendente com os filtros de um formulário de relatório válido.
+
+    Os filtros são gravados como os valores enviados no formulário (exceto o
+    formato de saída e a opção de segundo plano), para que o worker reconstrua
+    o mesmo formulário e, portanto, o mesmo queryset.
+    """
+    filters = {
+        name: form.data.get(name)
+        for name in form.fields
+        if name not in form.non_filter_fields and form.data.get(name) not in (None, "")
+    }
+    job = ReportJob.objects.create(
+        report=report_key,
+        filters=filters,
+        output_format=form.cleaned_data["output_format"],
+        requested_by=user if user is not None and user.is_authenticated else None,
+    )
+    logger.info(f"Relatório '{report_key}' ({job.output_format}) enfileirado: tarefa {job.pk}.")
+    return job
+
+
+def claim_jobs(limit: int = 1) -> list[ReportJob]:
+    """
+    Reserva até `limit` relatórios pendentes, marcando-os como "em execução".
+
+    Relatórios "em execução" sem atualização há mais de `REPORT_JOB_STALE_AFTER`
+    segundos (worker interrompido) voltam a ser elegíveis (ver `core.jobs.claim`).
+    """
+    stale_after = int(getattr(settings, "REPORT_JOB_STALE_AFTER", DEFAULT_STALE_AFTER))
+    return jobs.claim(
+        ReportJob.objects.all(),
+        Q(status="pending"),
+        order_by=("created_at", "id"),
+        limit=limit,
+        stale_after=stale_after,
+        processed_rows=0,
+    )
+
+
+def run_job(job: ReportJob) -> bool:
+    """
+    Gera o arquivo de um ReportJob e o grava no storage (`MEDIA_ROOT`).
+
+    O relatório é escrito em um arquivo temporário, com o progresso atualizado
+    a cada `REPORT_JOB_PROGRESS_EVERY` registros, e depois salvo em `job.file`.
+    Filtros inválidos ou erros na geração marcam o relatório como falho.
+
+    Returns:
+        True se o relatório foi concluído com sucesso.
+    """
+    from apps.reports.views import REPORT_VIEWS
+
+    view_class = REPORT_VIEWS.get(job.report)
+    if view_class is None:
+        return _finish(job, "failed", f"Relatório desconhecido: {job.report}.")
+
+    view = view_class()
+    form = view.get_form_class()(data={**job.filters, "output_format": job.output_format})
+    if not form.is_valid():
+        return _finish(job, "failed", f"Filtros inválidos: {form.errors.as_text()}")
+
+    try:
+        queryset = form.get_queryset()
+        job.total_rows = queryset.count()
+        job.save(update_fields=["total_rows", "updated_at"])
+
+        if job.output_format in view.TYPED_OUTPUT_FORMATS:
+            rows = _track_progress(job, view.iter_typed_frames(queryset), size=len)
+        else:
+            rows = _track_progress(job, view.iter_intermediate_data(queryset))
+        filename = view.get_output_filename(job.output_format)
+        with tempfile.TemporaryFile() as spool:
+            view.write_report(spool, queryset, form, job.output_format, rows=rows)
+            spool.seek(0)
+            job.file.save(filename, File(spool), save=False)
+        job.filename = filename
+    except Exception as e:
+        logger.exception(f"Erro ao gerar o relatório da tarefa {job.pk}.")
+        return _finish(job, "failed", f"Erro ao gerar o relatório: {e}")
+
+    return _finish(job, "done")
+
+
+def cleanup_expired_jobs(now=None) -> int:
+    """
+    Remove os arquivos de relatórios concluídos cujo prazo (`expires_at`) passou,
+    marcando-os como "expirado".
+
+    Returns:
+        Quantidade de relatórios expirados.
+    """
+    now = now or timezone.now()
+    expired = 0
+    for job in ReportJob.objects.filter(status="done", expires_at__lte=now).iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.status = "expired"
+        job.save(update_fields=["status", "file", "updated_at"])
+        expired += 1
+    if expired:
+        logger.info(f"{expired} relatório(s) em segundo plano expirado(s) e removido(s).")
+    return expired
+
+
+def _track_progress(job: ReportJob, items, size=None):
+    """
+    Repassa as linhas (ou blocos de linhas, com `size=len`), gravando
+    `processed_rows` a cada `REPORT_JOB_PROGRESS_EVERY` registros.
+    """
+    every = int(getattr(settings, "REPORT_JOB_PROGRESS_EVERY", DEFAULT_PROGRESS_EVERY))
+    processed = reported = 0
+    for item in items:
+        yield item
+        processed += size(item) if size else 1
+        if processed - reported >= every:
+            ReportJob.objects.filter(pk=job.pk).update(processed_rows=processed, updated_at=timezone.now())
+            reported = processed
+    job.processed_rows = processed
+
+
+def _finish(job: ReportJob, status: str, error: str = "") -> bool:
+    update_fields = ["processed_rows"]
+    if status == "done":
+        ttl = int(getattr(settings, "REPORT_JOB_TTL", DEFAULT_TTL))
+        job.expires_at = timezone.now() + timedelta(seconds=ttl)
+        update_fields += ["file", "filename", "expires_at"]
+    jobs.finish(job, status, error, update_fields=update_fields)
+    if status == "done":
+        logger.info(f"Relatório da tarefa {job.pk} concluído: {job.filename} ({job.processed_rows} registros).")
+    else:
+        logger.error(f"Relatório da tarefa {job.pk} falhou: {error}")
+    return status == "done"
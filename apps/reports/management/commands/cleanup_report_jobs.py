@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.reports.jobs import cleanup_expired_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove os arquivos de relatórios em segundo plano que passaram do prazo "
+        "(REPORT_JOB_TTL). Agende a execução periódica (ex: cron a cada hora)."
+    )
+
+    def handle(self, *args, **options):
+        expired = cleanup_expired_jobs()
+        self.stdout.write(self.style.SUCCESS(f"{expired} relatório(s) expirado(s) removido(s)."))
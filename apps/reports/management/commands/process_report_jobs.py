@@ -0,0 +1,26 @@
+from apps.reports.jobs import claim_jobs, run_job
+from apps.reports.models import ReportJob
+from core.jobs import JobQueueCommand
+
+
+class Command(JobQueueCommand):
+    help = (
+        "Processa a fila de relatórios em segundo plano, gerando os arquivos em MEDIA_ROOT "
+        "e atualizando o progresso exibido na tela de relatórios."
+    )
+    model = ReportJob
+    batch_size = 1
+    sleep = 2
+    empty_message = "Fila de relatórios vazia."
+    summary = "{processed} relatório(s) processado(s), {succeeded} concluído(s)."
+
+    def claim_jobs(self, limit):
+        return claim_jobs(limit=limit)
+
+    def run_job(self, job):
+        return run_job(job)
+
+    def describe(self, job, succeeded):
+        if succeeded:
+            return f"Relatório {job.pk} ({job.report}, {job.output_format}): concluído - {job.filename}"
+        return f"Relatório {job.pk} ({job.report}, {job.output_format}): falhou - {job.error}"
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:20
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('report', models.CharField(max_length=30, verbose_name='Relatório')),
+                ('filters', models.JSONField(blank=True, default=dict, verbose_name='Filtros')),
+                ('output_format', models.CharField(max_length=10, verbose_name='Formato de Saída')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em execução'), ('done', 'Concluído'), ('failed', 'Falhou'), ('expired', 'Expirado')], default='pending', max_length=10, verbose_name='Situação')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='Total de Registros')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Registros Processados')),
+                ('file', models.FileField(blank=True, upload_to='reports/%Y/%m/%d/', verbose_name='Arquivo')),
+                ('filename', models.CharField(blank=True, max_length=150, verbose_name='Nome do Arquivo')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Expira em')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Relatório em Segundo Plano',
+                'verbose_name_plural': 'Relatórios em Segundo Plano',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='report_job_queue_idx'), models.Index(fields=['expires_at'], name='report_job_expires_idx')],
+            },
+        ),
+    ]
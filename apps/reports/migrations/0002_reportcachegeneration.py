@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportCacheGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.PositiveBigIntegerField(default=0, verbose_name='Geração')),
+            ],
+            options={
+                'verbose_name': 'Geração do Cache de Relatórios',
+                'verbose_name_plural': 'Gerações do Cache de Relatórios',
+            },
+        ),
+    ]
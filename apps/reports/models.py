@@ -1,3 +1,88 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class ReportJob(models.Model):
+    """
+    Relatório gerado em segundo plano.
+
+    Criado quando o formulário de relatório é enviado com "Gerar em segundo
+    plano": os filtros do formulário são gravados em `filters` e o arquivo é
+    montado depois pelo comando `process_report_jobs` (`apps.reports.jobs`),
+    que atualiza o progresso (`processed_rows` / `total_rows`) e grava o
+    resultado em `MEDIA_ROOT`. A tela acompanha a situação pelo endpoint de
+    status e baixa o arquivo quando concluído; após `expires_at` o arquivo é
+    removido pelo comando `cleanup_report_jobs`.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pendente"),
+        ("running", "Em execução"),
+        ("done", "Concluído"),
+        ("failed", "Falhou"),
+        ("expired", "Expirado"),
+    ]
+
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    report = models.CharField(max_length=30, verbose_name="Relatório")
+    filters = models.JSONField(default=dict, blank=True, verbose_name="Filtros")
+    output_format = models.CharField(max_length=10, verbose_name="Formato de Saída")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="pending", verbose_name="Situação"
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True, verbose_name="Total de Registros")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Registros Processados")
+    file = models.FileField(upload_to="reports/%Y/%m/%d/", blank=True, verbose_name="Arquivo")
+    filename = models.CharField(max_length=150, blank=True, verbose_name="Nome do Arquivo")
+    error = models.TextField(blank=True, verbose_name="Erro")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="report_jobs",
+        verbose_name="Solicitado por",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finalizado em")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Expira em")
+
+    class Meta:
+        verbose_name = "Relatório em Segundo Plano"
+        verbose_name_plural = "Relatórios em Segundo Plano"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="report_job_queue_idx"),
+            models.Index(fields=["expires_at"], name="report_job_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.report} ({self.output_format}) #{self.pk} - {self.get_status_display()}"
+
+    @property
+    def progress(self) -> int:
+        """Percentual concluído (0 a 100)."""
+        if self.status == "done":
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, int(self.processed_rows * 100 / self.total_rows))
+
+
+class ReportCacheGeneration(models.Model):
+    """
+    Geração dos dados exibidos nos relatórios (linha única), parte da chave do
+    cache de relatórios (`apps.reports.cache`).
+
+    Fica no banco para que a invalidação feita por um processo valha para todos
+    os demais, qualquer que seja o backend do cache do Django.
+    """
+
+    generation = models.PositiveBigIntegerField(default=0, verbose_name="Geração")
+
+    class Meta:
+        verbose_name = "Geração do Cache de Relatórios"
+        verbose_name_plural = "Gerações do Cache de Relatórios"
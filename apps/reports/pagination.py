@@ -0,0 +1,53 @@
+"""
+Paginação por chave (keyset) da pré-visualização dos relatórios.
+
+Em vez de `OFFSET`, cada página começa depois da última linha da anterior,
+identificada pelos valores dos campos de ordenação (o cursor). Assim o custo
+de uma página não cresce com a sua posição no relatório.
+"""
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "apps.reports.preview"
+
+
+class InvalidCursor(ValueError):
+    """Cursor de paginação adulterado ou em formato inválido."""
+
+
+def encode_cursor(values) -> str:
+    """Codifica os valores de ordenação da última linha de uma página (assinado, seguro para URL)."""
+    return signing.dumps(list(values), salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor: str, ordering) -> list:
+    """Decodifica um cursor de `encode_cursor`, conferindo a quantidade de campos de `ordering`."""
+    try:
+        values = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature as e:
+        raise InvalidCursor("Cursor de paginação inválido.") from e
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor("Cursor de paginação inválido.")
+    return values
+
+
+def after_cursor(ordering, values) -> Q:
+    """
+    Condição para as linhas posteriores a `values` na ordenação crescente `ordering`
+    (comparação lexicográfica): (a > x) OU (a = x E b > y) OU ...
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        equal = {ordering[position]: values[position] for position in range(index)}
+        condition |= Q(**equal, **{f"{field}__gt": values[index]})
+    return condition
+
+
+def keyset_page(queryset, ordering, page_size, cursor=None):
+    """
+    Retorna o queryset de uma página (até `page_size + 1` linhas, a linha
+    extra indica que há próxima página), ordenado por `ordering`.
+    """
+    if cursor:
+        queryset = queryset.filter(after_cursor(ordering, decode_cursor(cursor, ordering)))
+    return queryset.order_by(*ordering)[: page_size + 1]
@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.addresses.models import Address
+from apps.customers.models import Customer
+from apps.suppliers.models import Supplier
+from core.enrichment import company_data_applied
+
+from .cache import report_cache
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=Address)
+@receiver(company_data_applied, sender=Customer)
+@receiver(company_data_applied, sender=Supplier)
+def invalidate_report_cache(sender, **kwargs):
+    """
+    Invalida os relatórios em cache quando os dados exibidos mudam, inclusive
+    pelo enriquecimento por CNPJ, que grava com `update()` (`company_data_applied`).
+
+    O cache deste processo é descartado na hora; a geração compartilhada (no
+    banco) é incrementada após o commit, o que também descarta um relatório que
+    outra requisição tenha gerado com os dados anteriores enquanto a transação
+    ainda estava aberta, sem manter a linha da geração bloqueada até o commit.
+    """
+    report_cache.invalidate_local()
+    transaction.on_commit(report_cache.invalidate)
@@ -0,0 +1,81 @@
+// Relatórios em segundo plano: envia o formulário via fetch quando
+// "Gerar em segundo plano" está marcado, acompanha o progresso pelo endpoint
+// de status e exibe o link de download quando o arquivo fica pronto.
+document.addEventListener("DOMContentLoaded", function () {
+  const backgroundCheckbox = document.getElementById("id_run_in_background");
+  const statusPanel = document.getElementById("reportJobStatus");
+  if (!backgroundCheckbox || !statusPanel) {
+    return;
+  }
+
+  const form = backgroundCheckbox.form;
+  const submitButton = document.getElementById("generateReportBtn");
+  const statusLabel = statusPanel.querySelector("[data-job-status]");
+  const rowsLabel = statusPanel.querySelector("[data-job-rows]");
+  const progressBar = statusPanel.querySelector("[data-job-progress]");
+  const errorLabel = statusPanel.querySelector("[data-job-error]");
+  const downloadLink = statusPanel.querySelector("[data-job-download]");
+  const POLL_INTERVAL_MS = 2000;
+
+  function render(job) {
+    statusPanel.classList.remove("d-none");
+    statusLabel.textContent = job.status_display;
+    rowsLabel.textContent =
+      job.total_rows !== null ? `${job.processed_rows} de ${job.total_rows} registros` : "";
+    progressBar.style.width = `${job.progress}%`;
+    progressBar.setAttribute("aria-valuenow", job.progress);
+    progressBar.textContent = `${job.progress}%`;
+
+    const finished = ["done", "failed", "expired"].includes(job.status);
+    progressBar.classList.toggle("progress-bar-animated", !finished);
+    errorLabel.classList.toggle("d-none", !job.error);
+    errorLabel.textContent = job.error || "";
+    downloadLink.classList.toggle("d-none", !job.download_url);
+    if (job.download_url) {
+      downloadLink.href = job.download_url;
+    }
+    return finished;
+  }
+
+  function poll(statusUrl) {
+    fetch(statusUrl, { headers: { Accept: "application/json" } })
+      .then((response) => response.json())
+      .then((job) => {
+        if (render(job)) {
+          submitButton.disabled = false;
+        } else {
+          setTimeout(() => poll(statusUrl), POLL_INTERVAL_MS);
+        }
+      })
+      .catch(() => setTimeout(() => poll(statusUrl), POLL_INTERVAL_MS));
+  }
+
+  form.addEventListener("submit", function (event) {
+    if (!backgroundCheckbox.checked) {
+      return;
+    }
+    event.preventDefault();
+    submitButton.disabled = true;
+
+    fetch(form.action || window.location.href, {
+      method: "POST",
+      body: new FormData(form),
+      headers: { Accept: "application/json" },
+    })
+      .then((response) => {
+        if (response.status !== 202) {
+          // Formulário inválido: envia normalmente para exibir os erros na página
+          submitButton.disabled = false;
+          form.submit();
+          return;
+        }
+        return response.json().then((job) => {
+          render(job);
+          poll(job.status_url);
+        });
+      })
+      .catch(() => {
+        submitButton.disabled = false;
+      });
+  });
+});
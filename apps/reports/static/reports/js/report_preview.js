@@ -0,0 +1,48 @@
+// Pré-visualização do relatório: envia os filtros do formulário para o endpoint
+// de pré-visualização e exibe a primeira página (com o total de registros);
+// "Próxima página" segue o cursor devolvido pelo servidor.
+document.addEventListener("DOMContentLoaded", function () {
+  const previewButton = document.getElementById("previewReportBtn");
+  const panel = document.getElementById("reportPreview");
+  if (!previewButton || !panel) {
+    return;
+  }
+
+  const form = previewButton.form;
+  const content = panel.querySelector("[data-preview-content]");
+
+  function firstPageUrl() {
+    const params = new URLSearchParams(new FormData(form));
+    params.delete("csrfmiddlewaretoken");
+    params.delete("run_in_background");
+    return `${panel.dataset.previewUrl}?${params.toString()}`;
+  }
+
+  function load(url) {
+    previewButton.disabled = true;
+    fetch(url, { headers: { Accept: "text/html" } })
+      .then((response) => response.text())
+      .then((html) => {
+        content.innerHTML = html;
+        panel.classList.remove("d-none");
+      })
+      .catch(() => {
+        content.innerHTML = '<div class="alert alert-danger mb-0">Não foi possível carregar a pré-visualização.</div>';
+        panel.classList.remove("d-none");
+      })
+      .finally(() => {
+        previewButton.disabled = false;
+      });
+  }
+
+  previewButton.addEventListener("click", () => load(firstPageUrl()));
+
+  content.addEventListener("click", function (event) {
+    const next = event.target.closest("[data-preview-next]");
+    if (next) {
+      load(next.dataset.previewNext);
+    } else if (event.target.closest("[data-preview-first]")) {
+      load(firstPageUrl());
+    }
+  });
+});
@@ -0,0 +1,200 @@
+"""
+Geração incremental dos arquivos de relatório.
+
+As funções deste módulo recebem um iterável de linhas intermediárias (dicts com
+chaves técnicas, ver `BaseReportView.prepare_intermediate_row`) e produzem o
+arquivo sem montar o relatório inteiro em memória: o CSV, o JSON e o NDJSON em
+pedaços de bytes, para `StreamingHttpResponse`, e o XLSX em um arquivo
+(temporário) via planilha "write-only" do openpyxl. Assim o consumo de memória não cresce com o número
+de registros.
+
+Os formatos tipados (Parquet e Arrow IPC) recebem blocos de linhas já como
+DataFrames (ver `BaseReportView.iter_typed_frames`) e gravam cada bloco como
+um row group / record batch, com colunas tipadas (inteiros, booleanos, datas).
+"""
+import csv
+import json
+import textwrap
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.serializers.json import DjangoJSONEncoder
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+CSV_BOM = '\ufeff'.encode('utf-8')
+CSV_SEPARATOR = ';'
+CSV_EMPTY_VALUE = '-'
+
+# Tipos de coluna dos formatos tipados (BaseReportView.typed_columns) -> tipos Arrow
+ARROW_TYPES = {
+    'int': pa.int64(),
+    'string': pa.string(),
+    'bool': pa.bool_(),
+    'timestamp': pa.timestamp('us', tz='UTC'),
+}
+
+
+class _LineBuffer:
+    """Pseudo-arquivo que acumula o que o `csv.writer` escreve até ser esvaziado."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, value):
+        self.parts.append(value)
+
+    def drain(self) -> str:
+        content = ''.join(self.parts)
+        self.parts.clear()
+        return content
+
+
+def iter_csv(rows, column_map, batch_size=500):
+    """
+    Gera o CSV do relatório em pedaços de bytes UTF-8.
+
+    O primeiro pedaço traz o BOM (para o Excel reconhecer a codificação) e a
+    linha de cabeçalhos; as colunas seguem a ordem de `column_map` e valores
+    ausentes/`None` viram '-', como na exportação via DataFrame. As linhas são
+    agrupadas de `batch_size` em `batch_size` para reduzir o número de escritas.
+
+    Args:
+        rows: Iterável de dicts com chaves técnicas.
+        column_map: Mapeamento chave técnica -> cabeçalho de exibição.
+        batch_size: Quantidade de linhas por pedaço gerado.
+    """
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer, delimiter=CSV_SEPARATOR, lineterminator='\n')
+    keys = list(column_map)
+
+    writer.writerow(column_map.values())
+    yield CSV_BOM + buffer.drain().encode('utf-8')
+
+    pending = 0
+    for row in rows:
+        writer.writerow([_cell_value(row.get(key)) for key in keys])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.drain().encode('utf-8')
+            pending = 0
+    if pending:
+        yield buffer.drain().encode('utf-8')
+
+
+def iter_json_array(rows, batch_size=500):
+    """
+    Gera um array JSON (UTF-8, indentação de 2 espaços) em pedaços de bytes.
+
+    O resultado é idêntico ao de `json.dumps(list(rows), indent=2)`, mas cada
+    registro é serializado e enviado à medida que é lido, com as mesmas chaves
+    técnicas dos dados intermediários.
+    """
+    pending = []
+    separator = '[\n'
+    for row in rows:
+        record = json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+        pending.append(separator + textwrap.indent(record, '  '))
+        separator = ',\n'
+        if len(pending) >= batch_size:
+            yield ''.join(pending).encode('utf-8')
+            pending.clear()
+    pending.append('[]' if separator == '[\n' else '\n]')
+    yield ''.join(pending).encode('utf-8')
+
+
+def iter_ndjson(rows, batch_size=500):
+    """
+    Gera NDJSON (um objeto JSON por linha, UTF-8) em pedaços de bytes.
+
+    Permite que o consumidor processe os registros linha a linha antes de o
+    servidor terminar a exportação.
+    """
+    pending = []
+    for row in rows:
+        pending.append(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+        if len(pending) >= batch_size:
+            yield ''.join(pending).encode('utf-8')
+            pending.clear()
+    if pending:
+        yield ''.join(pending).encode('utf-8')
+
+
+def _cell_value(value):
+    return CSV_EMPTY_VALUE if value is None else value
+
+
+def write_xlsx(fileobj, rows, column_map, sheet_title, header_lines=()):
+    """
+    Escreve o relatório XLSX em `fileobj` usando uma planilha "write-only".
+
+    Nesse modo o openpyxl não mantém as células em memória: cada linha é
+    serializada ao ser adicionada e o arquivo final é montado em `fileobj`
+    (normalmente um arquivo temporário em disco). A planilha começa com
+    `header_lines` (título, data de geração, filtros aplicados), uma linha em
+    branco e, em seguida, os cabeçalhos em negrito e os dados na ordem de
+    `column_map`; valores ausentes/`None` viram '-'.
+
+    Args:
+        fileobj: Arquivo binário (ou caminho) onde a pasta de trabalho é salva.
+        rows: Iterável de dicts com chaves técnicas.
+        column_map: Mapeamento chave técnica -> cabeçalho de exibição.
+        sheet_title: Nome da aba (o Excel limita a 31 caracteres).
+        header_lines: Linhas de texto escritas antes da tabela; '' gera linha em branco.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_title)
+
+    for line in header_lines:
+        worksheet.append([line] if line else [])
+
+    bold = Font(bold=True)
+    header_cells = []
+    for display_header in column_map.values():
+        cell = WriteOnlyCell(worksheet, value=display_header)
+        cell.font = bold
+        header_cells.append(cell)
+    worksheet.append(header_cells)
+
+    keys = list(column_map)
+    for row in rows:
+        worksheet.append([_cell_value(row.get(key)) for key in keys])
+
+    workbook.save(fileobj)
+
+
+def arrow_schema(column_types):
+    """Monta o schema Arrow a partir de um mapeamento coluna -> tipo (chave de `ARROW_TYPES`)."""
+    return pa.schema([(name, ARROW_TYPES[column_type]) for name, column_type in column_types.items()])
+
+
+def _record_batches(frames, schema):
+    for frame in frames:
+        yield pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False)
+
+
+def write_parquet(fileobj, frames, column_types):
+    """
+    Escreve o relatório em Parquet, um row group por bloco de linhas.
+
+    Args:
+        fileobj: Arquivo binário onde o Parquet é gravado.
+        frames: Iterável de DataFrames com as colunas de `column_types`.
+        column_types: Mapeamento coluna -> tipo (chave de `ARROW_TYPES`), na ordem do arquivo.
+    """
+    schema = arrow_schema(column_types)
+    with pq.ParquetWriter(fileobj, schema, compression='snappy') as writer:
+        for batch in _record_batches(frames, schema):
+            writer.write_batch(batch)
+
+
+def write_arrow(fileobj, frames, column_types):
+    """
+    Escreve o relatório no formato de arquivo Arrow IPC (Feather v2), um record
+    batch por bloco de linhas. Mesmos argumentos de `write_parquet`.
+    """
+    schema = arrow_schema(column_types)
+    with pa.ipc.new_file(fileobj, schema) as writer:
+        for batch in _record_batches(frames, schema):
+            writer.write_batch(batch)
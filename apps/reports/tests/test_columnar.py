@@ -0,0 +1,103 @@
+from io import BytesIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Max
+from django.test import TestCase, override_settings
+from validate_docbr import CPF
+
+from apps.addresses.models import Address
+from apps.customers.models import Customer
+from apps.reports.forms import CustomerReportForm, SupplierReportForm
+from apps.reports.views import CustomerReportView, SupplierReportView
+from apps.suppliers.models import Supplier
+
+ADDRESS_DATA = {"street": "Rua A", "number": "10", "neighborhood": "Centro",
+                "city": "Campinas", "state": "SP", "zip_code": "13010000"}
+
+
+@override_settings(REPORT_STREAM_CHUNK_SIZE=3)
+class ColumnarReportTests(TestCase):
+    """
+    O caminho colunar (`apps.reports.columnar`) deve gerar exatamente os mesmos
+    arquivos que a formatação linha a linha (`prepare_intermediate_row`).
+    """
+
+    def setUp(self):
+        self.cpf = CPF()
+
+    def _create(self, model, type_field):
+        objects = []
+        for index in range(7):
+            obj = model(**{type_field: "IND"}, full_name=f"Registro {index}", tax_id=self.cpf.generate())
+            obj.save(address_data=ADDRESS_DATA if index % 2 == 0 else None)
+            objects.append(obj)
+        # Casos de borda gravados direto no banco (sem passar pela validação/enriquecimento)
+        model.objects.filter(pk=objects[0].pk).update(tax_id="20612379000106", phone="11987654321", notes="Obs")
+        model.objects.filter(pk=objects[1].pk).update(phone="1132165498", preferred_name="", is_active=False)
+        model.objects.filter(pk=objects[2].pk).update(phone="123", tax_id="")
+        Address.objects.filter(object_id=objects[2].pk).update(number=None, complement="Sala 2", zip_code="123")
+        Address.objects.filter(object_id=objects[4].pk).update(street="", zip_code="", city="")
+        return objects
+
+    def _render(self, view, form, output_format, columnar):
+        with self.settings(REPORT_COLUMNAR_ENABLED=columnar):
+            buffer = BytesIO()
+            view.write_report(buffer, form.get_queryset(), form, output_format)
+        return buffer.getvalue()
+
+    def _assert_identical_output(self, view, form_class):
+        form = form_class(data={"output_format": "csv"})
+        self.assertTrue(form.is_valid())
+        queryset = form.get_queryset()
+
+        with self.settings(REPORT_COLUMNAR_ENABLED=False):
+            expected_rows = list(view.iter_intermediate_data(queryset))
+        rows = list(view.iter_intermediate_data(queryset))
+        self.assertEqual(rows, expected_rows)
+        self.assertEqual([[type(value) for value in row.values()] for row in rows],
+                         [[type(value) for value in row.values()] for row in expected_rows])
+
+        for output_format in ("csv", "json", "ndjson"):
+            with self.subTest(output_format=output_format):
+                self.assertEqual(
+                    self._render(view, form, output_format, columnar=True),
+                    self._render(view, form, output_format, columnar=False),
+                )
+
+    def test_customer_report_matches_row_by_row_output(self):
+        self._create(Customer, "customer_type")
+        Customer.objects.filter(full_name="Registro 3").update(is_vip=True, email="a@example.com")
+        self._assert_identical_output(CustomerReportView(), CustomerReportForm)
+
+    def test_supplier_report_matches_row_by_row_output(self):
+        self._create(Supplier, "supplier_type")
+        Supplier.objects.filter(full_name="Registro 3").update(pix_key="chave", bank_agency="0001")
+        self._assert_identical_output(SupplierReportView(), SupplierReportForm)
+
+    def test_owner_with_several_addresses_uses_lowest_pk(self):
+        objects = self._create(Customer, "customer_type")
+        content_type = ContentType.objects.get_for_model(Customer)
+        next_pk = Address.objects.aggregate(last=Max("pk"))["last"] + 1
+        # Endereços extras fora da ordem da chave primária; a ordenação padrão de Address
+        # (UF, cidade, logradouro) escolheria outro endereço nos dois registros
+        Address.objects.bulk_create([
+            Address(pk=next_pk + 10, content_type=content_type, object_id=objects[1].pk,
+                    street="Rua Nova", city="Olinda", state="PE"),
+            Address(pk=next_pk, content_type=content_type, object_id=objects[1].pk,
+                    street="Rua Antiga", city="Recife", state="PE"),
+            Address(pk=next_pk + 5, content_type=content_type, object_id=objects[0].pk,
+                    street="Rua Extra", city="Natal", state="RN"),
+        ])
+
+        self._assert_identical_output(CustomerReportView(), CustomerReportForm)
+        form = CustomerReportForm(data={"output_format": "csv"})
+        self.assertTrue(form.is_valid())
+        rows = {row["id"]: row for row in CustomerReportView().iter_intermediate_data(form.get_queryset())}
+        self.assertEqual(rows[objects[1].pk]["address_street"], "Rua Antiga")
+        self.assertEqual(rows[objects[0].pk]["address_street"], "Rua A")
+        self.assertEqual(Customer.objects.get(pk=objects[0].pk).address.street, "Rua A")
+
+    def test_empty_report(self):
+        form = CustomerReportForm(data={"output_format": "json"})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(list(CustomerReportView().iter_intermediate_data(form.get_queryset())), [])
@@ -0,0 +1,101 @@
+import csv
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.customers.models import Customer
+from apps.reports.streaming import CSV_BOM, iter_csv
+from apps.reports.views import CustomerReportView
+
+# =======================================================================
+#  CPFs Válidos para Teste
+# =======================================================================
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+CPF_VALID_3 = "75723268031"
+# =======================================================================
+
+
+def _read_csv(content: bytes):
+    return list(csv.reader(StringIO(content.decode("utf-8-sig")), delimiter=";"))
+
+
+class IterCsvTests(SimpleTestCase):
+    """Testa a geração incremental do CSV em `apps.reports.streaming`."""
+
+    column_map = {"id": "ID", "name": "Nome", "city": "Cidade"}
+
+    def test_header_follows_column_map_and_starts_with_bom(self):
+        chunks = list(iter_csv([], self.column_map))
+        self.assertEqual(len(chunks), 1)
+        self.assertTrue(chunks[0].startswith(CSV_BOM))
+        self.assertEqual(_read_csv(chunks[0]), [["ID", "Nome", "Cidade"]])
+
+    def test_rows_in_column_order_with_missing_values_as_dash(self):
+        rows = [
+            {"city": "São Paulo", "name": "Ana; Maria", "id": 1},
+            {"id": 2, "name": "Bruno", "city": None},
+        ]
+        content = b"".join(iter_csv(rows, self.column_map))
+        self.assertEqual(content.count(CSV_BOM), 1)
+        self.assertEqual(_read_csv(content)[1:], [
+            ["1", "Ana; Maria", "São Paulo"],
+            ["2", "Bruno", "-"],
+        ])
+
+    def test_rows_are_batched_lazily(self):
+        consumed = []
+
+        def rows():
+            for index in range(5):
+                consumed.append(index)
+                yield {"id": index}
+
+        chunks = iter_csv(rows(), self.column_map, batch_size=2)
+        next(chunks)  # cabeçalho
+        self.assertEqual(consumed, [])
+        self.assertEqual(len(_read_csv(CSV_BOM + next(chunks))), 2)
+        self.assertEqual(consumed, [0, 1])
+        self.assertEqual(len(list(chunks)), 2)
+
+
+@override_settings(REPORT_STREAM_CHUNK_SIZE=2)
+class CustomerReportCsvViewTests(TestCase):
+    """Testa a exportação CSV em streaming do relatório de clientes."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(user)
+        Customer(customer_type="IND", full_name="Carla Souza", tax_id=CPF_VALID_1).save(
+            address_data={"street": "Rua A", "number": "10", "neighborhood": "Centro",
+                          "city": "Campinas", "state": "SP", "zip_code": "13010000"}
+        )
+        Customer(customer_type="IND", full_name="Ana Lima", tax_id=CPF_VALID_2, email="ana@example.com").save()
+        Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_3).save()
+
+    def test_csv_is_streamed_with_all_rows(self):
+        response = self.client.post(reverse("reports:customer_report"), {"output_format": "csv"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.startswith(CSV_BOM))
+
+        rows = _read_csv(content)
+        self.assertEqual(rows[0], list(CustomerReportView().get_column_map().values()))
+        self.assertEqual([row[2] for row in rows[1:]], ["Ana Lima", "Bruno Reis", "Carla Souza"])
+        ana, _, carla = rows[1:]
+        self.assertEqual(ana[6], "ana@example.com")
+        self.assertEqual(ana[-1], "-")
+        self.assertEqual(carla[-2], "SP")
+
+    def test_csv_respects_form_filters(self):
+        response = self.client.post(
+            reverse("reports:customer_report"), {"output_format": "csv", "address_city": "campinas"}
+        )
+        rows = _read_csv(b"".join(response.streaming_content))
+        self.assertEqual([row[2] for row in rows[1:]], ["Carla Souza"])
@@ -0,0 +1,74 @@
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.customers.models import Customer
+from apps.reports.streaming import iter_json_array, iter_ndjson
+
+# =======================================================================
+#  CPFs Válidos para Teste
+# =======================================================================
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+# =======================================================================
+
+
+class JsonStreamingTests(SimpleTestCase):
+    """Testa a serialização incremental de JSON/NDJSON em `apps.reports.streaming`."""
+
+    rows = [{"id": 1, "name": "José", "since": date(2024, 1, 2)}, {"id": 2, "name": None}]
+
+    def test_json_array_matches_indented_dump(self):
+        content = b"".join(iter_json_array(iter(self.rows), batch_size=1)).decode("utf-8")
+        expected = json.dumps(
+            [{"id": 1, "name": "José", "since": "2024-01-02"}, {"id": 2, "name": None}],
+            ensure_ascii=False, indent=2,
+        )
+        self.assertEqual(content, expected)
+
+    def test_empty_json_array(self):
+        self.assertEqual(b"".join(iter_json_array([])), b"[]")
+
+    def test_ndjson_emits_one_record_per_line(self):
+        chunks = list(iter_ndjson(iter(self.rows), batch_size=1))
+        self.assertEqual(len(chunks), 2)
+        lines = b"".join(chunks).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["name"] for line in lines], ["José", None])
+
+    def test_ndjson_empty(self):
+        self.assertEqual(list(iter_ndjson([])), [])
+
+
+@override_settings(REPORT_STREAM_CHUNK_SIZE=1)
+class CustomerReportJsonViewTests(TestCase):
+    """Testa as exportações JSON e NDJSON do relatório de clientes."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(user)
+        Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_1).save()
+        Customer(customer_type="IND", full_name="Ana Lima", tax_id=CPF_VALID_2).save()
+
+    def _post(self, output_format):
+        response = self.client.post(reverse("reports:customer_report"), {"output_format": output_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return response
+
+    def test_json_array_is_streamed_with_technical_keys(self):
+        response = self._post("json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([item["full_name"] for item in data], ["Ana Lima", "Bruno Reis"])
+        self.assertEqual(data[0]["customer_type_display"], "Pessoa Física")
+
+    def test_ndjson_is_streamed_line_by_line(self):
+        response = self._post("ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn(".ndjson", response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["full_name"] for line in lines], ["Ana Lima", "Bruno Reis"])
@@ -0,0 +1,187 @@
+from datetime import datetime
+from io import BytesIO
+from unittest.mock import patch
+
+from openpyxl import load_workbook
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.customers.models import Customer
+from apps.reports.cache import ReportCache, report_cache
+from apps.suppliers.models import Supplier
+from core.enrichment import enqueue_enrichment, run_job
+
+# =======================================================================
+#  CPFs Válidos para Teste
+# =======================================================================
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+# =======================================================================
+
+
+def _content(response) -> bytes:
+    if isinstance(response, StreamingHttpResponse):
+        content = b"".join(response.streaming_content)
+        response.close()
+        return content
+    return response.content
+
+
+class ReportCacheViewTests(TestCase):
+    """Testa o cache dos relatórios gerados pelas views (`apps.reports.cache`)."""
+
+    def setUp(self):
+        report_cache.clear_local()
+        user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(user)
+        self.customer = Customer(customer_type="IND", full_name="Ana Lima", tax_id=CPF_VALID_1, is_vip=True)
+        self.customer.save()
+
+    def _post(self, **data):
+        return self.client.post(reverse("reports:customer_report"), {"output_format": "csv", **data})
+
+    def _report_queries(self, **data):
+        with CaptureQueriesContext(connection) as context:
+            content = _content(self._post(**data))
+        queries = [query["sql"] for query in context.captured_queries if "customers_customer" in query["sql"]]
+        return content, queries
+
+    def test_repeat_request_is_served_without_querying_the_report(self):
+        first, first_queries = self._report_queries(is_vip="True")
+        second, second_queries = self._report_queries(is_vip="True")
+
+        self.assertTrue(first_queries)
+        self.assertEqual(second_queries, [])
+        self.assertEqual(first, second)
+        self.assertEqual(report_cache.stats()["hits"], 1)
+
+    def test_cache_hit_regenerates_filename(self):
+        with patch("apps.reports.views.datetime", wraps=datetime) as clock:
+            clock.now.return_value = datetime(2024, 5, 1, 8, 0, 0)
+            first = self._post(output_format="json")
+            first_content = _content(first)
+            clock.now.return_value = datetime(2024, 5, 2, 9, 30, 0)
+            second = self._post(output_format="json")
+
+        self.assertIsInstance(second, HttpResponse)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+        self.assertIn("20240501_080000", first["Content-Disposition"])
+        self.assertIn("20240502_093000", second["Content-Disposition"])
+        self.assertEqual(second.content, first_content)
+
+    def test_excel_cache_hit_rebuilds_sheet_with_current_generation_date(self):
+        with patch("apps.reports.views.datetime", wraps=datetime) as clock:
+            clock.now.return_value = datetime(2024, 5, 1, 8, 0, 0)
+            _content(self._post(output_format="excel"))
+            clock.now.return_value = datetime(2024, 5, 2, 9, 30, 0)
+            with CaptureQueriesContext(connection) as context:
+                response = self._post(output_format="excel")
+                sheet = load_workbook(BytesIO(_content(response))).active
+
+        self.assertFalse([query for query in context.captured_queries if "customers_customer" in query["sql"]])
+        self.assertEqual(report_cache.stats()["hits"], 1)
+        self.assertIn("20240502_093000", response["Content-Disposition"])
+        values = [row[0] for row in sheet.iter_rows(values_only=True)]
+        self.assertIn("Gerado em: 02/05/2024 09:30:00", values)
+        self.assertIn("Ana Lima", [cell for row in sheet.iter_rows(values_only=True) for cell in row])
+
+    def test_filters_and_format_are_part_of_the_key(self):
+        _content(self._post(is_vip="True"))
+        self.assertTrue(self._report_queries(is_vip="False")[1])
+        self.assertTrue(self._report_queries(is_vip="True", output_format="json")[1])
+        # Campos vazios não mudam a chave
+        self.assertEqual(self._report_queries(is_vip="True", full_name="")[1], [])
+
+    def test_saving_customer_invalidates_cache(self):
+        before, _ = self._report_queries()
+        Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_2).save()
+        after, queries = self._report_queries()
+
+        self.assertTrue(queries)
+        self.assertNotIn(b"Bruno Reis", before)
+        self.assertIn(b"Bruno Reis", after)
+
+    def test_deleting_customer_invalidates_cache(self):
+        _content(self._post())
+        self.customer.delete()
+        self.assertNotIn(b"Ana Lima", self._report_queries()[0])
+
+    def test_cnpj_enrichment_invalidates_cache(self):
+        """O enriquecimento grava com `update()` (sem `post_save`) e ainda assim invalida o cache."""
+        company = Customer(customer_type="CORP", full_name="Empresa Antiga", tax_id="20612379000106")
+        company.save(defer_enrichment=True)
+        before, _ = self._report_queries()
+        job = enqueue_enrichment(company, company.tax_id, update_address=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with patch("core.enrichment.fetch_company_data", return_value={"full_name": "Empresa Nova Ltda"}):
+                self.assertTrue(run_job(job))
+        after, queries = self._report_queries()
+
+        self.assertIn(b"Empresa Antiga", before)
+        self.assertTrue(queries)
+        self.assertIn(b"Empresa Nova Ltda", after)
+
+    def test_supplier_company_data_invalidates_cache(self):
+        supplier = Supplier(supplier_type="CORP", full_name="Fornecedor Antigo", tax_id="20612379000106")
+        supplier.save(defer_enrichment=True)
+        generation = report_cache.generation()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            supplier.apply_company_data({"preferred_name": "Novo"}, update_address=False)
+        self.assertNotEqual(report_cache.generation(), generation)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_generation_is_shared_without_a_shared_django_cache(self):
+        """A geração fica no banco: a invalidação de um processo vale para os outros com qualquer backend de cache."""
+        other_process = ReportCache()
+        generation = other_process.generation()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_2).save()
+
+        self.assertEqual(other_process.generation(), generation + 1)
+
+    @override_settings(REPORT_CACHE_MAX_SIZE=0)
+    def test_cache_can_be_disabled(self):
+        _content(self._post())
+        self.assertTrue(self._report_queries()[1])
+
+
+class ReportCacheEvictionTests(SimpleTestCase):
+    """Testa o limite de tamanho do cache de relatórios."""
+
+    def setUp(self):
+        self.cache = ReportCache()
+
+    @override_settings(REPORT_CACHE_MAX_SIZE=10, REPORT_CACHE_MAX_ENTRY_SIZE=10)
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        self.cache.set("a", b"aaaa", "text/csv")
+        self.cache.set("b", b"bbbb", "text/csv")
+        self.cache.get("a")
+        self.cache.set("c", b"cccc", "text/csv")
+
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a").content, b"aaaa")
+        self.assertEqual(self.cache.get("c").content, b"cccc")
+        self.assertEqual(self.cache.stats()["size"], 8)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    @override_settings(REPORT_CACHE_MAX_ENTRY_SIZE=5)
+    def test_large_streamed_reports_are_not_stored(self):
+        chunks = list(self.cache.capture("big", iter([b"abc", b"def"]), "text/csv"))
+        self.assertEqual(chunks, [b"abc", b"def"])
+        self.assertIsNone(self.cache.get("big"))
+
+        list(self.cache.capture("small", iter([b"ab", b"c"]), "text/csv"))
+        self.assertEqual(self.cache.get("small").content, b"abc")
+
+    @override_settings(REPORT_CACHE_TTL=0)
+    def test_expired_entries_are_ignored(self):
+        self.cache.set("a", b"aaaa", "text/csv")
+        self.assertIsNone(self.cache.get("a"))
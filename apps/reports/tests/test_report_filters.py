@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.addresses.models import Address
+from apps.customers.models import Customer
+from apps.reports.forms import CustomerReportForm, SupplierReportForm
+from apps.suppliers.models import Supplier
+
+# =======================================================================
+#  CPFs Válidos para Teste
+# =======================================================================
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+CPF_VALID_3 = "75723268031"
+# =======================================================================
+
+
+def _add_addresses(obj, *addresses):
+    """Cria endereços direto no banco (sem validação/consulta de CEP)."""
+    content_type = ContentType.objects.get_for_model(obj)
+    Address.objects.bulk_create(
+        Address(content_type=content_type, object_id=obj.pk, street="Rua A", city=city, state=state)
+        for city, state in addresses
+    )
+
+
+def _names(form):
+    return list(form.get_queryset().values_list("full_name", flat=True))
+
+
+class ReportFilterTests(TestCase):
+    """Testa os filtros declarativos dos formulários de relatório (`apps.reports.filters`)."""
+
+    def setUp(self):
+        self.ana = Customer(customer_type="IND", full_name="Ana Lima", tax_id=CPF_VALID_1, phone="11987654321")
+        self.ana.save()
+        self.bruno = Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_2, is_vip=True)
+        self.bruno.save()
+        self.carla = Customer(customer_type="IND", full_name="Carla Souza", tax_id=CPF_VALID_3)
+        self.carla.save()
+        _add_addresses(self.ana, ("Campinas", "SP"), ("Campos do Jordão", "SP"), ("Curitiba", "PR"))
+        _add_addresses(self.bruno, ("Curitiba", "PR"))
+
+    def _form(self, form_class=CustomerReportForm, **data):
+        form = form_class(data={"output_format": "csv", **data})
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_address_filters_use_exists_without_distinct(self):
+        form = self._form(address_city="camp", address_state="SP")
+
+        self.assertEqual(_names(form), ["Ana Lima"])
+        sql = str(form.get_queryset().query).upper()
+        self.assertIn("EXISTS", sql)
+        self.assertNotIn("DISTINCT", sql)
+
+    def test_records_with_several_matching_addresses_appear_once(self):
+        self.assertEqual(_names(self._form(address_state="PR")), ["Ana Lima", "Bruno Reis"])
+        self.assertEqual(_names(self._form(address_city="c")), ["Ana Lima", "Bruno Reis"])
+
+    def test_address_of_other_model_with_same_id_does_not_match(self):
+        supplier = Supplier(supplier_type="IND", full_name="Fornecedor", tax_id=CPF_VALID_1)
+        supplier.save()
+        supplier_type = ContentType.objects.get_for_model(Supplier)
+        Address.objects.bulk_create([
+            Address(content_type=supplier_type, object_id=self.carla.pk, street="Rua B", city="Recife", state="PE"),
+            Address(content_type=supplier_type, object_id=supplier.pk, street="Rua C", city="Recife", state="PE"),
+        ])
+
+        self.assertEqual(_names(self._form(address_state="PE")), [])
+        self.assertEqual(_names(self._form(SupplierReportForm, address_state="PE")), ["Fornecedor"])
+
+    def test_text_choice_and_boolean_filters(self):
+        self.assertEqual(_names(self._form(full_name="REIS")), ["Bruno Reis"])
+        self.assertEqual(_names(self._form(phone="(11) 98765")), ["Ana Lima"])
+        self.assertEqual(_names(self._form(is_vip="False", customer_type="IND")), ["Ana Lima", "Carla Souza"])
+
+    def test_registration_date_range_includes_whole_end_day(self):
+        moment = timezone.make_aware(datetime(2024, 3, 10, 23, 30))
+        Customer.objects.filter(pk=self.ana.pk).update(registration_date=moment)
+        Customer.objects.filter(pk=self.bruno.pk).update(registration_date=timezone.make_aware(datetime(2024, 3, 11)))
+
+        form = self._form(registration_date_start="2024-03-10", registration_date_end="2024-03-10")
+        self.assertEqual(_names(form), ["Ana Lima"])
+        self.assertEqual(_names(self._form(registration_date_start="2024-03-11")), ["Bruno Reis", "Carla Souza"])
+        self.assertIn("Cadastrado até: 10/03/2024", form.get_applied_filters_display())
+
+    def test_inverted_date_range_is_invalid(self):
+        form = CustomerReportForm(data={
+            "output_format": "csv", "registration_date_start": "2024-03-10", "registration_date_end": "2024-03-01",
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn("registration_date_end", form.errors)
+
+    def test_report_page_renders_date_range_fields(self):
+        user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(user)
+        for url_name in ("reports:customer_report", "reports:supplier_report"):
+            response = self.client.get(reverse(url_name), {"registration_date_start": "2024-03-10"})
+            self.assertContains(response, 'name="registration_date_end"')
+            self.assertContains(response, 'value="2024-03-10"')
@@ -0,0 +1,139 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.customers.models import Customer
+from apps.reports.forms import CustomerReportForm
+from apps.reports.jobs import claim_jobs, cleanup_expired_jobs, run_job
+from apps.reports.models import ReportJob
+
+# =======================================================================
+#  CPFs Válidos para Teste
+# =======================================================================
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+CPF_VALID_3 = "75723268031"
+# =======================================================================
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, REPORT_JOB_PROGRESS_EVERY=1)
+class ReportJobTests(TestCase):
+    """Testa os relatórios gerados em segundo plano (`apps.reports.jobs`)."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(self.user)
+        Customer(customer_type="IND", full_name="Ana Lima", tax_id=CPF_VALID_1, is_vip=True).save()
+        Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_2, is_vip=True).save()
+        Customer(customer_type="IND", full_name="Carla Souza", tax_id=CPF_VALID_3).save()
+
+    def _submit(self, **data):
+        payload = {"output_format": "ndjson", "run_in_background": "on", **data}
+        return self.client.post(reverse("reports:customer_report"), payload)
+
+    def test_background_submit_creates_job_without_generating(self):
+        response = self._submit(is_vip="True", full_name="")
+
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        job = ReportJob.objects.get()
+        self.assertEqual(data["id"], str(job.uuid))
+        self.assertEqual(data["status"], "pending")
+        self.assertIsNone(data["download_url"])
+        self.assertEqual((job.report, job.output_format, job.requested_by), ("customers", "ndjson", self.user))
+        self.assertEqual(job.filters, {"is_vip": "True"})
+
+    def test_worker_builds_file_and_status_reports_progress(self):
+        status_url = self._submit(is_vip="True").json()["status_url"]
+
+        out = StringIO()
+        call_command("process_report_jobs", "--once", stdout=out)
+        self.assertIn("1 relatório(s) processado(s), 1 concluído(s)", out.getvalue())
+
+        data = self.client.get(status_url).json()
+        self.assertEqual((data["status"], data["progress"]), ("done", 100))
+        self.assertEqual((data["processed_rows"], data["total_rows"]), (2, 2))
+
+        response = self.client.get(data["download_url"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(".ndjson", response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        response.close()
+        self.assertEqual([json.loads(line)["full_name"] for line in lines], ["Ana Lima", "Bruno Reis"])
+
+        job = ReportJob.objects.get()
+        self.assertIsNotNone(job.expires_at)
+        self.assertTrue(job.file.name.startswith("reports/"))
+
+    def test_excel_job_uses_same_layout_as_direct_download(self):
+        self._submit(output_format="excel")
+        job = claim_jobs()[0]
+        self.assertTrue(run_job(job))
+        job.refresh_from_db()
+        self.assertTrue(job.filename.endswith(".xlsx"))
+        self.assertEqual(job.file.read(2), b"PK")
+        job.file.close()
+
+    def test_other_users_cannot_see_or_download_job(self):
+        data = self._submit().json()
+        other = get_user_model().objects.create_user(username="outro", password="x")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(data["status_url"]).status_code, 404)
+
+    def test_download_unavailable_until_done(self):
+        job = ReportJob.objects.get(uuid=self._submit().json()["id"])
+        response = self.client.get(reverse("reports:job_download", args=[job.uuid]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_stored_filters_fail_job(self):
+        job = ReportJob.objects.create(report="customers", output_format="csv",
+                                       filters={"address_state": "XX"}, requested_by=self.user)
+        self.assertFalse(run_job(claim_jobs()[0]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIn("Filtros inválidos", job.error)
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = ReportJob.objects.create(report="customers", output_format="csv", status="running")
+        self.assertEqual(claim_jobs(), [])
+        ReportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([claimed.pk for claimed in claim_jobs()], [job.pk])
+
+    def test_cleanup_removes_expired_files(self):
+        self._submit(output_format="csv")
+        job = claim_jobs()[0]
+        run_job(job)
+        job.refresh_from_db()
+        storage, name = job.file.storage, job.file.name
+        self.assertTrue(storage.exists(name))
+
+        self.assertEqual(cleanup_expired_jobs(), 0)
+        out = StringIO()
+        ReportJob.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("cleanup_report_jobs", stdout=out)
+
+        self.assertIn("1 relatório(s) expirado(s)", out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "expired")
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(job.file)
+
+    def test_background_option_is_not_listed_as_filter(self):
+        form = CustomerReportForm(data={"output_format": "csv", "run_in_background": "on"})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.get_applied_filters_display(), [])
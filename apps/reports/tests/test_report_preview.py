@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from validate_docbr import CPF
+
+from apps.customers.models import Customer
+from apps.suppliers.models import Supplier
+
+URL = reverse("reports:customer_report_preview")
+
+
+@override_settings(REPORT_PREVIEW_PAGE_SIZE=2)
+class ReportPreviewTests(TestCase):
+    """Testa a pré-visualização paginada dos relatórios (`BaseReportView.get_preview`)."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(user)
+        cpf = CPF()
+        # Nomes repetidos: a paginação por chave desempata pela chave primária
+        for name, is_vip in (("Ana", True), ("Bruno", False), ("Ana", False), ("Carla", True), ("Ana", True)):
+            Customer(customer_type="IND", full_name=name, tax_id=cpf.generate(), is_vip=is_vip).save()
+
+    def _json(self, url=URL, **params):
+        return self.client.get(url, {"format": "json", **params})
+
+    def test_first_page_has_rows_total_and_cursor(self):
+        data = self._json().json()
+
+        self.assertEqual(data["total"], 5)
+        self.assertEqual(data["page_size"], 2)
+        self.assertEqual([row["full_name"] for row in data["rows"]], ["Ana", "Ana"])
+        self.assertEqual(data["rows"][0]["is_vip_display"], "Sim")
+        self.assertEqual(data["columns"][0], {"key": "id", "label": "ID"})
+        self.assertIsNotNone(data["next_cursor"])
+        self.assertIn("cursor=", data["next_url"])
+
+    def test_keyset_pages_cover_all_rows_once(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            data = self._json(**({"cursor": cursor} if cursor else {})).json()
+            seen += [(row["full_name"], row["id"]) for row in data["rows"]]
+            pages += 1
+            if pages > 1:
+                self.assertIsNone(data["total"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        expected = list(Customer.objects.order_by("full_name", "pk").values_list("full_name", "pk"))
+        self.assertEqual(seen, expected)
+
+    def test_next_page_does_not_count_or_offset(self):
+        cursor = self._json().json()["next_cursor"]
+        with CaptureQueriesContext(connection) as context:
+            self._json(cursor=cursor)
+        sql = " ".join(query["sql"].upper() for query in context.captured_queries)
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_filters_apply_to_preview(self):
+        data = self._json(is_vip="True").json()
+        self.assertEqual(data["total"], 3)
+
+    def test_invalid_filters_and_cursor_return_400(self):
+        self.assertEqual(self._json(address_state="XX").status_code, 400)
+        self.assertEqual(self._json(cursor="adulterado").status_code, 400)
+        self.assertEqual(self.client.get(URL, {"cursor": "adulterado"}).status_code, 400)
+
+    def test_html_partial(self):
+        response = self.client.get(URL)
+
+        self.assertTemplateUsed(response, "reports/partials/_preview.html")
+        self.assertContains(response, "5 registros encontrados")
+        self.assertContains(response, "<th scope=\"col\" class=\"text-nowrap\">CPF/CNPJ</th>", html=True)
+        self.assertContains(response, "data-preview-next")
+
+    def test_supplier_preview(self):
+        Supplier(supplier_type="IND", full_name="Fornecedor", tax_id=CPF().generate()).save()
+        data = self._json(url=reverse("reports:supplier_report_preview")).json()
+        self.assertEqual((data["total"], data["rows"][0]["full_name"]), (1, "Fornecedor"))
+
+    def test_preview_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self._json().status_code, 302)
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from validate_docbr import CPF
+
+from apps.customers.models import Customer
+from apps.suppliers.models import Supplier
+
+ADDRESS_DATA = {"street": "Rua A", "number": "10", "neighborhood": "Centro",
+                "city": "Campinas", "state": "SP", "zip_code": "13010000"}
+
+
+class ReportQueryCountTests(TestCase):
+    """Garante que exportar N registros executa um número constante de consultas."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(user)
+        self.cpf = CPF()
+
+    def _create(self, model, type_field, count):
+        for index in range(count):
+            obj = model(**{type_field: "IND"}, full_name=f"Registro {index}", tax_id=self.cpf.generate())
+            obj.save(address_data=ADDRESS_DATA if index % 2 == 0 else None)
+
+    def _export_query_count(self, url_name, output_format):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse(url_name), {"output_format": output_format})
+            b"".join(response.streaming_content)
+            response.close()
+        return len(context.captured_queries)
+
+    def _measure(self, model, type_field, url_name, count):
+        self._create(model, type_field, count)
+        return {
+            output_format: self._export_query_count(url_name, output_format)
+            for output_format in ("csv", "excel", "json", "ndjson", "parquet", "arrow")
+        }
+
+    def test_customer_report_queries_do_not_grow_with_rows(self):
+        few = self._measure(Customer, "customer_type", "reports:customer_report", 2)
+        many = self._measure(Customer, "customer_type", "reports:customer_report", 8)
+        self.assertEqual(few, many)
+
+    def test_supplier_report_queries_do_not_grow_with_rows(self):
+        few = self._measure(Supplier, "supplier_type", "reports:supplier_report", 2)
+        many = self._measure(Supplier, "supplier_type", "reports:supplier_report", 8)
+        self.assertEqual(few, many)
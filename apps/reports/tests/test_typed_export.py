@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.contrib.auth import get_user_model
+from django.http import FileResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.customers.models import Customer
+from apps.reports.jobs import claim_jobs, run_job
+from apps.reports.models import ReportJob
+from apps.suppliers.models import Supplier
+
+# =======================================================================
+#  CPFs Válidos para Teste
+# =======================================================================
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+CPF_VALID_3 = "75723268031"
+# =======================================================================
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def _download(response) -> bytes:
+    content = b"".join(response.streaming_content)
+    response.close()
+    return content
+
+
+@override_settings(REPORT_STREAM_CHUNK_SIZE=2, MEDIA_ROOT=MEDIA_ROOT)
+class TypedReportExportTests(TestCase):
+    """Testa as exportações tipadas (Parquet e Arrow IPC) dos relatórios."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(self.user)
+        Customer(customer_type="IND", full_name="Carla Souza", tax_id=CPF_VALID_1, phone="11987654321").save(
+            address_data={"street": "Rua A", "number": "10", "neighborhood": "Centro",
+                          "city": "Campinas", "state": "SP", "zip_code": "13010000"}
+        )
+        Customer(customer_type="IND", full_name="Ana Lima", tax_id=CPF_VALID_2, is_vip=True).save()
+        Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_3).save()
+
+    def test_parquet_has_typed_columns_and_row_group_per_chunk(self):
+        response = self.client.post(reverse("reports:customer_report"), {"output_format": "parquet"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertIn(".parquet", response["Content-Disposition"])
+        parquet_file = pq.ParquetFile(BytesIO(_download(response)))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+
+        table = parquet_file.read()
+        self.assertEqual(table.schema.field("id").type, pa.int64())
+        self.assertEqual(table.schema.field("is_vip").type, pa.bool_())
+        self.assertEqual(table.schema.field("registration_date").type, pa.timestamp("us", tz="UTC"))
+
+        rows = table.to_pylist()
+        self.assertEqual([row["full_name"] for row in rows], ["Ana Lima", "Bruno Reis", "Carla Souza"])
+        self.assertEqual([row["is_vip"] for row in rows], [True, False, False])
+        carla = rows[2]
+        self.assertEqual((carla["customer_type"], carla["customer_type_display"]), ("IND", "Pessoa Física"))
+        self.assertEqual((carla["tax_id"], carla["phone"]), (CPF_VALID_1, "11987654321"))
+        self.assertEqual((carla["address_zip_code"], carla["address_city"]), ("13010000", "Campinas"))
+        self.assertIsNone(rows[0]["address_city"])
+        self.assertIsNotNone(carla["registration_date"].tzinfo)
+
+    def test_empty_parquet_keeps_schema(self):
+        response = self.client.post(
+            reverse("reports:customer_report"), {"output_format": "parquet", "full_name": "Ninguém"}
+        )
+        table = pq.read_table(BytesIO(_download(response)))
+        self.assertEqual(table.num_rows, 0)
+        self.assertEqual(table.schema.field("is_active").type, pa.bool_())
+
+    def test_supplier_report_as_arrow(self):
+        Supplier(supplier_type="IND", full_name="Fornecedor X", tax_id=CPF_VALID_1, is_active=False).save()
+
+        response = self.client.post(reverse("reports:supplier_report"), {"output_format": "arrow"})
+
+        self.assertIn(".arrow", response["Content-Disposition"])
+        table = pa.ipc.open_file(pa.BufferReader(_download(response))).read_all()
+        self.assertEqual(table.to_pylist()[0]["is_active"], False)
+        self.assertEqual(table.schema.field("id").type, pa.int64())
+
+    @override_settings(REPORT_JOB_PROGRESS_EVERY=1)
+    def test_background_parquet_job_counts_rows(self):
+        ReportJob.objects.create(report="customers", output_format="parquet", requested_by=self.user)
+        job = claim_jobs()[0]
+
+        self.assertTrue(run_job(job))
+        job.refresh_from_db()
+        self.assertEqual((job.processed_rows, job.total_rows), (3, 3))
+        self.assertTrue(job.filename.endswith(".parquet"))
+        with job.file.open("rb") as stored:
+            self.assertEqual(pq.read_table(BytesIO(stored.read())).num_rows, 3)
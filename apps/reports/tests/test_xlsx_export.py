@@ -0,0 +1,74 @@
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.http import FileResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from apps.customers.models import Customer
+from apps.reports.streaming import write_xlsx
+from apps.reports.views import CustomerReportView
+
+# =======================================================================
+#  CPFs Válidos para Teste
+# =======================================================================
+CPF_VALID_1 = "10585278008"
+CPF_VALID_2 = "27875969832"
+# =======================================================================
+
+
+def _sheet_values(content: bytes):
+    workbook = load_workbook(BytesIO(content), read_only=True)
+    worksheet = workbook.worksheets[0]
+    values = [list(row) for row in worksheet.iter_rows(values_only=True)]
+    return worksheet.title, values
+
+
+class WriteXlsxTests(SimpleTestCase):
+    """Testa a escrita da planilha "write-only" em `apps.reports.streaming`."""
+
+    def test_header_block_then_columns_then_rows(self):
+        buffer = BytesIO()
+        rows = iter([{"name": "Ana", "id": 1}, {"id": 2, "name": None}])
+        write_xlsx(buffer, rows, {"id": "ID", "name": "Nome"}, "Aba",
+                   header_lines=["Título", "", "Filtro: X", ""])
+
+        title, values = _sheet_values(buffer.getvalue())
+        self.assertEqual(title, "Aba")
+        non_empty = [[value for value in row if value is not None] for row in values]
+        self.assertEqual(non_empty, [["Título"], [], ["Filtro: X"], [], ["ID", "Nome"], [1, "Ana"], [2, "-"]])
+
+
+@override_settings(REPORT_STREAM_CHUNK_SIZE=1)
+class CustomerReportExcelViewTests(TestCase):
+    """Testa a exportação Excel do relatório de clientes."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="relatorios", password="x")
+        self.client.force_login(user)
+        Customer(customer_type="IND", full_name="Bruno Reis", tax_id=CPF_VALID_1).save()
+        Customer(customer_type="IND", full_name="Ana Lima", tax_id=CPF_VALID_2, is_vip=True).save()
+
+    def test_excel_is_served_from_file_with_header_block(self):
+        response = self.client.post(
+            reverse("reports:customer_report"), {"output_format": "excel", "is_vip": "True"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, FileResponse)
+        self.assertIn(".xlsx", response["Content-Disposition"])
+        title, values = _sheet_values(b"".join(response.streaming_content))
+        response.close()
+
+        self.assertEqual(title, "Relatório de Clientes")
+        first_column = [row[0] if row else None for row in values]
+        self.assertEqual(first_column[0], "Relatório de Clientes")
+        self.assertTrue(first_column[1].startswith("Gerado em: "))
+        self.assertEqual(first_column[3], "Filtros Aplicados:")
+        self.assertEqual(first_column[4], "Cliente VIP?: Sim")
+
+        header_index = first_column.index("ID")
+        self.assertEqual(values[header_index], list(CustomerReportView().get_column_map().values()))
+        data_rows = values[header_index + 1:]
+        self.assertEqual([row[2] for row in data_rows], ["Ana Lima"])
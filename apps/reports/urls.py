@@ -1,11 +1,15 @@
 # reports/urls.py
 from django.urls import path
-from .views import CustomerReportView, SupplierReportView
+from .views import CustomerReportView, ReportJobDownloadView, ReportJobStatusView, SupplierReportView
 
 app_name = 'reports'
 
 urlpatterns = [
     path('customers/', CustomerReportView.as_view(), name='customer_report'),
     path('suppliers/', SupplierReportView.as_view(), name='supplier_report'),
+    path('customers/preview/', CustomerReportView.as_view(preview=True), name='customer_report_preview'),
+    path('suppliers/preview/', SupplierReportView.as_view(preview=True), name='supplier_report_preview'),
+    path('jobs/<uuid:job_id>/', ReportJobStatusView.as_view(), name='job_status'),
+    path('jobs/<uuid:job_id>/download/', ReportJobDownloadView.as_view(), name='job_download'),
 
 ]
\ No newline at end of file
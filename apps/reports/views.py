@@ -1,12 +1,23 @@
-import pandas as pd
-from io import BytesIO, StringIO
+import tempfile
 from datetime import datetime 
+import pandas as pd
+from django.conf import settings
 from django.views import View
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+
+from apps.customers.models import Customer
+from apps.suppliers.models import Supplier
 
+from . import columnar
+from .cache import report_cache
 from .forms import BaseReportForm, CustomerReportForm, SupplierReportForm
+from .jobs import enqueue_report_job
+from .models import ReportJob
+from .pagination import InvalidCursor, encode_cursor, keyset_page
+from .streaming import iter_csv, iter_json_array, iter_ndjson, write_arrow, write_parquet, write_xlsx
 
 class BaseReportView(LoginRequiredMixin, View):
     # Template pode ser genérico ou cada view define o seu.
@@ -16,6 +27,23 @@ class BaseReportView(LoginRequiredMixin, View):
     form_class = None     # Deve ser definido pela subclasse
     report_title_default = "Relatório" # Título padrão
     filename_base_default = "relatorio" # Base do nome do arquivo padrão
+    report_key = None     # Identifica o relatório em REPORT_VIEWS (relatórios em segundo plano)
+    columnar_fields = None  # Campos lidos com values_list pelo caminho colunar (ver format_columnar_chunk)
+    typed_columns = None    # Colunas dos formatos tipados (Parquet/Arrow) -> tipo (ver streaming.ARROW_TYPES)
+    preview = False         # as_view(preview=True): pré-visualização paginada em vez do formulário
+    preview_template_name = 'reports/partials/_preview.html'
+
+    # Formato de saída -> (extensão do arquivo, content type)
+    OUTPUT_FORMATS = {
+        'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+        'csv': ('csv', 'text/csv; charset=utf-8-sig'),
+        'json': ('json', 'application/json'),
+        'ndjson': ('ndjson', 'application/x-ndjson'),
+        'parquet': ('parquet', 'application/vnd.apache.parquet'),
+        'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    }
+    # Formatos gerados a partir dos blocos tipados (iter_typed_frames), e não das linhas formatadas
+    TYPED_OUTPUT_FORMATS = ('parquet', 'arrow')
 
     def get_report_title(self):
         """Retorna o título do relatório. Pode ser sobrescrito ou usar atributo de classe."""
@@ -25,6 +53,11 @@ class BaseReportView(LoginRequiredMixin, View):
         """Retorna a base do nome do arquivo. Pode ser sobrescrito ou usar atributo de classe."""
         return getattr(self, 'filename_base', self.filename_base_default)
 
+    def get_output_filename(self, output_format):
+        """Retorna o nome do arquivo para download, com data/hora e a extensão do formato."""
+        extension = self.OUTPUT_FORMATS[output_format][0]
+        return f'{self.get_filename_base()}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+
     def get_template_names(self):
         if self.template_name is None:
             raise NotImplementedError("Subclasses de BaseReportView devem definir 'template_name'.")
@@ -36,6 +69,8 @@ class BaseReportView(LoginRequiredMixin, View):
         return self.form_class
 
     def get(self, request, *args, **kwargs):
+        if self.preview:
+            return self.get_preview(request)
         FormClass = self.get_form_class()
         # Preenche o formulário com dados GET se houver, para manter os filtros ao recarregar a página
         form = FormClass(request.GET or None)
@@ -46,32 +81,243 @@ class BaseReportView(LoginRequiredMixin, View):
         form = FormClass(request.POST)
 
         if form.is_valid():
+            if form.cleaned_data.get('run_in_background'):
+                return self.start_background_job(request, form)
+
+            # O mesmo relatório (filtros + formato) já gerado é servido do cache, sem consultar o banco
+            cache_key = report_cache.make_key(self.report_key, form) if self.report_key and report_cache.enabled else None
+            cached = report_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                return self.get_cached_response(cached, form)
+
             queryset = form.get_queryset() # Agora é responsabilidade do Form
             output_format = form.cleaned_data['output_format']
-            
-            # Prepara os dados brutos (ainda como objetos do modelo ou dicts brutos)
-            # A conversão para o formato intermediário de exibição acontece depois
-            intermediate_data = self.prepare_intermediate_data_from_queryset(queryset)
 
+            # Todos os formatos são gerados em streaming direto do queryset, sem materializar a lista de linhas
             if output_format == 'excel':
-                return self.generate_excel(intermediate_data, form)
+                rows = self.iter_intermediate_data(queryset)
+                if cache_key:
+                    # A planilha traz a data de geração: guarda as linhas, e não o arquivo
+                    rows = report_cache.capture_rows(cache_key, rows, self.OUTPUT_FORMATS['excel'][1])
+                response = self.generate_excel(queryset, form, rows=rows)
             elif output_format == 'csv':
-                return self.generate_csv(intermediate_data, form)
+                response = self.generate_csv(queryset, form)
             elif output_format == 'json':
-                return self.generate_json(intermediate_data) # JSON usa intermediate_data diretamente
+                response = self.generate_json(queryset) # JSON usa os dados intermediários (chaves técnicas) diretamente
+            elif output_format == 'ndjson':
+                response = self.generate_ndjson(queryset)
+            elif output_format in self.TYPED_OUTPUT_FORMATS:
+                response = self.generate_typed_file(queryset, output_format)
             else:
                 # Esta validação também pode estar no form.cleaned_data['output_format']
                 return HttpResponse("Formato de relatório inválido.", status=400)
+
+            if cache_key and output_format != 'excel':
+                # O arquivo é guardado no cache à medida que é enviado
+                response.streaming_content = report_cache.capture(
+                    cache_key, response.streaming_content, response['Content-Type']
+                )
+            return response
         else:
             return render(request, self.get_template_names(), {'form': form, 'title': self.get_report_title()})
 
-    def prepare_intermediate_data_from_queryset(self, queryset):
+    def get_cached_response(self, cached, form):
+        """
+        Resposta de um relatório em cache, com nome do arquivo atual e, no Excel,
+        a planilha montada de novo (com a data de geração atual) a partir das linhas guardadas.
+        """
+        output_format = form.cleaned_data['output_format']
+        if output_format == 'excel':
+            return self.generate_excel(None, form, rows=cached.iter_rows())
+        response = HttpResponse(cached.content, content_type=cached.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.get_output_filename(output_format)}"'
+        return response
+
+    def get_preview(self, request):
+        """
+        Pré-visualização do relatório com os filtros da query string: uma página
+        de `REPORT_PREVIEW_PAGE_SIZE` linhas (já formatadas como no arquivo) e o
+        total de registros, para conferir os filtros antes da exportação completa.
+
+        As páginas seguintes usam paginação por chave (`cursor`, ver
+        `apps.reports.pagination`); o total (`count()`) só é calculado na primeira.
+        Responde com um trecho de HTML (tabela) ou, com `format=json`, em JSON.
+        """
+        FormClass = self.get_form_class()
+        data = request.GET.copy()
+        data.setdefault('output_format', FormClass.base_fields['output_format'].initial)
+        form = FormClass(data)
+        as_json = request.GET.get('format') == 'json'
+
+        if not form.is_valid():
+            if as_json:
+                return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+            return render(request, self.preview_template_name, {'errors': form.errors}, status=400)
+
+        queryset = form.get_queryset()
+        page_size = settings.REPORT_PREVIEW_PAGE_SIZE
+        cursor = request.GET.get('cursor')
+        try:
+            page_queryset = keyset_page(queryset, form.ordering, page_size, cursor)
+        except InvalidCursor as e:
+            if as_json:
+                return JsonResponse({'errors': {'cursor': [{'message': str(e)}]}}, status=400)
+            return render(request, self.preview_template_name, {'errors': {'cursor': [str(e)]}}, status=400)
+
+        rows = list(self.iter_intermediate_data(page_queryset))
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(self._preview_cursor_values(rows[-1], form.ordering))
+        next_url = None
+        if next_cursor:
+            params = request.GET.copy()
+            params['cursor'] = next_cursor
+            next_url = f'{request.path}?{params.urlencode()}'
+
+        column_map = self.get_column_map()
+        preview = {
+            'columns': [{'key': key, 'label': label} for key, label in column_map.items()],
+            'rows': rows,
+            'total': None if cursor else queryset.count(),
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'next_url': next_url,
+        }
+        if as_json:
+            return JsonResponse(preview)
+        table_rows = [[row.get(key) for key in column_map] for row in rows]
+        return render(request, self.preview_template_name, {**preview, 'table_rows': table_rows, 'is_first_page': not cursor})
+
+    def _preview_cursor_values(self, row, ordering):
+        """Valores de ordenação de uma linha intermediária ('pk' corresponde à chave 'id')."""
+        return [row['id' if field == 'pk' else field] for field in ordering]
+
+    def start_background_job(self, request, form):
+        """
+        Enfileira o relatório para geração em segundo plano (`process_report_jobs`) e
+        responde 202 com as URLs de acompanhamento e download, consultadas pela tela.
         """
-        Converte cada item do queryset para um dicionário de dados intermediários.
+        if self.report_key is None:
+            raise NotImplementedError("Subclasses de BaseReportView devem definir 'report_key' para gerar em segundo plano.")
+        job = enqueue_report_job(self.report_key, form, request.user)
+        return JsonResponse(_job_status_data(job), status=202)
+
+    def write_report(self, fileobj, queryset, form, output_format, rows=None):
+        """
+        Grava o relatório completo em `fileobj` (arquivo binário), no formato pedido.
+        Usado pelos relatórios em segundo plano; `rows` permite passar os dados
+        intermediários (ou, nos formatos tipados, os blocos de `iter_typed_frames`)
+        já envolvidos por um contador de progresso.
+        """
+        if output_format in self.TYPED_OUTPUT_FORMATS:
+            frames = self.iter_typed_frames(queryset) if rows is None else rows
+            writer = write_parquet if output_format == 'parquet' else write_arrow
+            writer(fileobj, frames, self.typed_columns)
+            return
+
+        if rows is None:
+            rows = self.iter_intermediate_data(queryset)
+
+        if output_format == 'excel':
+            write_xlsx(
+                fileobj,
+                rows,
+                self.get_column_map(),
+                self.get_report_title()[:30],
+                header_lines=self._generate_excel_header_content(form),
+            )
+            return
+
+        if output_format == 'csv':
+            chunks = iter_csv(rows, self.get_column_map())
+        elif output_format == 'json':
+            chunks = iter_json_array(rows)
+        elif output_format == 'ndjson':
+            chunks = iter_ndjson(rows)
+        else:
+            raise ValueError(f"Formato de relatório inválido: {output_format}")
+        for chunk in chunks:
+            fileobj.write(chunk)
+
+    def prepare_intermediate_row(self, obj):
+        """
+        Converte um item do queryset para um dicionário de dados intermediários.
         As chaves devem ser técnicas (inglês/snake_case).
         DEVE ser implementado pela subclasse.
         """
-        raise NotImplementedError("Subclasses devem implementar prepare_intermediate_data_from_queryset()")
+        raise NotImplementedError("Subclasses devem implementar prepare_intermediate_row()")
+
+    def prepare_intermediate_data_from_queryset(self, queryset):
+        """Converte todo o queryset para uma lista de dicionários de dados intermediários."""
+        return [self.prepare_intermediate_row(obj) for obj in queryset]
+
+    def iter_intermediate_data(self, queryset):
+        """
+        Gera os dados intermediários item a item, lendo o queryset em blocos de
+        `REPORT_STREAM_CHUNK_SIZE` registros (`queryset.iterator`), sem carregar
+        todo o resultado em memória. Os `prefetch_related` do queryset são
+        aplicados a cada bloco.
+        """
+        if self.columnar_fields and getattr(settings, 'REPORT_COLUMNAR_ENABLED', True):
+            yield from self.iter_columnar_data(queryset)
+            return
+        for obj in queryset.iterator(chunk_size=settings.REPORT_STREAM_CHUNK_SIZE):
+            yield self.prepare_intermediate_row(obj)
+
+    def iter_columnar_data(self, queryset):
+        """
+        Caminho colunar de `iter_intermediate_data`: lê apenas `columnar_fields`
+        com `values_list`, em blocos de `REPORT_STREAM_CHUNK_SIZE` registros, e
+        formata cada bloco de uma vez (`format_columnar_chunk`). Gera os mesmos
+        dicionários que `prepare_intermediate_row`.
+        """
+        chunk_size = settings.REPORT_STREAM_CHUNK_SIZE
+        for frame in columnar.iter_frames(queryset, self.columnar_fields, chunk_size):
+            frame = columnar.attach_primary_address(frame, queryset.model)
+            yield from columnar.to_records(self.format_columnar_chunk(frame))
+
+    def format_columnar_chunk(self, frame):
+        """
+        Formata um bloco (DataFrame com `columnar_fields` e as colunas de endereço)
+        e retorna um DataFrame com as mesmas colunas, na mesma ordem, do dicionário
+        de `prepare_intermediate_row`.
+        DEVE ser implementado pela subclasse que define `columnar_fields`.
+        """
+        raise NotImplementedError("Subclasses com 'columnar_fields' devem implementar format_columnar_chunk()")
+
+    def iter_typed_frames(self, queryset):
+        """
+        Gera os dados dos formatos tipados (Parquet/Arrow): um DataFrame por bloco
+        de `REPORT_STREAM_CHUNK_SIZE` registros, com as colunas de `typed_columns`
+        (valores brutos, sem máscaras nem '-'; ausentes ficam nulos).
+        """
+        if not self.typed_columns:
+            raise NotImplementedError("Subclasses de BaseReportView devem definir 'typed_columns' para Parquet/Arrow.")
+        chunk_size = settings.REPORT_STREAM_CHUNK_SIZE
+        for frame in columnar.iter_frames(queryset, self.columnar_fields, chunk_size):
+            frame = columnar.attach_primary_address(frame, queryset.model)
+            yield self.format_typed_chunk(frame, queryset.model)
+
+    def format_typed_chunk(self, frame, model):
+        """
+        Seleciona as colunas de `typed_columns` em um bloco do caminho colunar:
+        'id' vem da chave primária, '<campo>_display' é o rótulo da escolha de
+        `<campo>` e colunas 'timestamp' são convertidas para datas em UTC.
+        """
+        columns = {}
+        for key, column_type in self.typed_columns.items():
+            if key == 'id':
+                columns[key] = frame['pk']
+            elif key.endswith('_display'):
+                field_name = key.removesuffix('_display')
+                choices = model._meta.get_field(field_name).flatchoices
+                columns[key] = columnar.choice_display(frame[field_name], choices)
+            elif column_type == 'timestamp':
+                columns[key] = pd.to_datetime(frame[key], utc=True)
+            else:
+                columns[key] = frame[key]
+        return pd.DataFrame(columns)
 
     def get_column_map(self):
         """
@@ -82,111 +328,113 @@ class BaseReportView(LoginRequiredMixin, View):
         """
         raise NotImplementedError("Subclasses devem implementar get_column_map()")
 
-    def _prepare_dataframe_for_output(self, intermediate_data, column_map):
+    def generate_json(self, queryset):
         """
-        Helper para transformar dados intermediários (lista de dicts) em um DataFrame pandas
-        com as colunas e cabeçalhos corretos para Excel/CSV.
+        Gera o relatório em formato JSON (array) usando dados intermediários (chaves técnicas).
+        Os registros são serializados e enviados em streaming à medida que são lidos do queryset.
         """
-        output_data_list = []
-        # Garante a ordem das colunas de acordo com o column_map
-        ordered_headers = list(column_map.values()) 
-        
-        for item_dict in intermediate_data:
-            output_row = {}
-            for tech_key, display_header in column_map.items():
-                value = item_dict.get(tech_key)
-                # O valor já deve estar formatado como string no intermediate_data se necessário (Sim/Não, datas, etc.)
-                output_row[display_header] = value if value is not None else '-'
-            output_data_list.append(output_row)
-        
-        # Cria o DataFrame especificando as colunas para manter a ordem
-        df = pd.DataFrame(output_data_list)
-        if not df.empty and ordered_headers:
-             # Reordena colunas e lida com colunas faltantes no DataFrame (preenche com '-')
-            df = df.reindex(columns=ordered_headers, fill_value='-')
-        elif df.empty and ordered_headers: # DataFrame vazio, mas temos cabeçalhos
-            df = pd.DataFrame(columns=ordered_headers)
-
-        return df
-
-    def generate_json(self, intermediate_data):
-        """Gera o relatório em formato JSON usando dados intermediários (chaves técnicas)."""
-        filename = f'{self.get_filename_base()}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-        # O intermediate_data já é uma lista de dicionários com chaves técnicas
-        response = JsonResponse(intermediate_data, safe=False, json_dumps_params={'ensure_ascii': False, 'indent': 2})
+        filename = self.get_output_filename('json')
+        rows = self.iter_intermediate_data(queryset)
+        response = StreamingHttpResponse(iter_json_array(rows), content_type=self.OUTPUT_FORMATS['json'][1])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def generate_ndjson(self, queryset):
+        """
+        Gera o relatório em formato NDJSON (um objeto JSON por linha, chaves técnicas) em streaming,
+        para consumidores que processam a exportação linha a linha.
+        """
+        filename = self.get_output_filename('ndjson')
+        rows = self.iter_intermediate_data(queryset)
+        response = StreamingHttpResponse(iter_ndjson(rows), content_type=self.OUTPUT_FORMATS['ndjson'][1])
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
     def _generate_excel_header_content(self, form):
-        """ Gera o conteúdo do cabeçalho para o arquivo Excel. """
+        """ Gera as linhas do cabeçalho do arquivo Excel ('' = linha em branco). """
         excel_content = []
-        excel_content.append([self.get_report_title()])
-        excel_content.append([f'Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}'])
-        excel_content.append([]) # Linha em branco
+        excel_content.append(self.get_report_title())
+        excel_content.append(f'Gerado em: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+        excel_content.append('') # Linha em branco
 
         applied_filters_info = form.get_applied_filters_display() # Usa o método do form
 
         if applied_filters_info:
-            excel_content.append(['Filtros Aplicados:'])
-            for filter_info in applied_filters_info:
-                excel_content.append([filter_info])
+            excel_content.append('Filtros Aplicados:')
+            excel_content.extend(applied_filters_info)
         else:
-            excel_content.append(['Nenhum filtro aplicado.'])
-        excel_content.append([]) # Linha em branco
+            excel_content.append('Nenhum filtro aplicado.')
+        excel_content.append('') # Linha em branco
         return excel_content
 
-    def generate_excel(self, intermediate_data, form):
-        """Gera o relatório em formato Excel (xlsx)."""
-        column_map = self.get_column_map()
-        df_data = self._prepare_dataframe_for_output(intermediate_data, column_map)
-
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            sheet_name = self.get_report_title()[:30] # Limite do Excel para nome de aba
+    def generate_excel(self, queryset, form, rows=None):
+        """
+        Gera o relatório em formato Excel (xlsx) com a planilha "write-only" do openpyxl.
 
-            header_content = self._generate_excel_header_content(form)
-            
-            current_row = 0
-            if header_content:
-                df_header = pd.DataFrame(header_content)
-                df_header.to_excel(writer, sheet_name=sheet_name, index=False, header=False, startrow=current_row)
-                current_row += len(df_header) # Atualiza a linha inicial para os dados
-
-            # Escreve os dados principais (com cabeçalhos das colunas)
-            df_data.to_excel(writer, sheet_name=sheet_name, index=False, header=True, startrow=current_row)
-
-            # Opcional: Auto-ajuste da largura das colunas (pode ser lento para muitos dados)
-            # worksheet = writer.sheets[sheet_name]
-            # for idx, col in enumerate(df_data.columns):  # df_data já tem os cabeçalhos corretos
-            #     series = df_data[col]
-            #     max_len = max((
-            #         series.astype(str).map(len).max(),  # Máximo tamanho do dado
-            #         len(str(series.name))  # Tamanho do cabeçalho
-            #     )) + 2  # Adiciona um pouco de padding
-            #     worksheet.column_dimensions[chr(65+idx)].width = max_len
-
-        excel_value = buffer.getvalue()
-        buffer.close()
-
-        filename = f'{self.get_filename_base()}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
-        response = HttpResponse(excel_value, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+        As linhas são lidas do queryset em blocos e gravadas em um arquivo temporário
+        em disco, que é enviado com `FileResponse` e removido ao fechar a resposta;
+        o consumo de memória não depende do número de registros. `rows` permite
+        passar os dados intermediários já lidos (ex: do cache de relatórios).
+        """
+        column_map = self.get_column_map()
+        sheet_name = self.get_report_title()[:30] # Limite do Excel para nome de aba
+
+        spool = tempfile.TemporaryFile(suffix='.xlsx')
+        try:
+            write_xlsx(
+                spool,
+                self.iter_intermediate_data(queryset) if rows is None else rows,
+                column_map,
+                sheet_name,
+                header_lines=self._generate_excel_header_content(form),
+            )
+            spool.seek(0)
+        except Exception:
+            spool.close()
+            raise
+
+        return FileResponse(
+            spool,
+            as_attachment=True,
+            filename=self.get_output_filename('excel'),
+            content_type=self.OUTPUT_FORMATS['excel'][1],
+        )
+
+    def generate_typed_file(self, queryset, output_format):
+        """
+        Gera o relatório em um formato tipado (Parquet ou Arrow IPC), para cargas
+        de dados: os blocos lidos do queryset são gravados em um arquivo temporário
+        (um row group por bloco) e enviados com `FileResponse`.
+        """
+        spool = tempfile.TemporaryFile(suffix=f'.{self.OUTPUT_FORMATS[output_format][0]}')
+        try:
+            self.write_report(spool, queryset, None, output_format)
+            spool.seek(0)
+        except Exception:
+            spool.close()
+            raise
+
+        return FileResponse(
+            spool,
+            as_attachment=True,
+            filename=self.get_output_filename(output_format),
+            content_type=self.OUTPUT_FORMATS[output_format][1],
+        )
+
+    def generate_csv(self, queryset, form): # Adicionado form para consistência, embora não usado aqui
+        """
+        Gera o relatório em formato CSV (separador ';', UTF-8 com BOM) em streaming.
 
-    def generate_csv(self, intermediate_data, form): # Adicionado form para consistência, embora não usado aqui
-        """Gera o relatório em formato CSV."""
+        As linhas são lidas do queryset em blocos e escritas à medida que a resposta
+        é enviada, então o consumo de memória não depende do tamanho do relatório.
+        """
         column_map = self.get_column_map() # CSV usará o mesmo mapeamento de colunas que o Excel por padrão
-        df_data = self._prepare_dataframe_for_output(intermediate_data, column_map)
-
-        buffer = StringIO()
         # Para CSV, geralmente não se coloca o cabeçalho de filtros, apenas os dados.
-        # Se quiser, pode adaptar _generate_excel_header_content para gerar strings e prefixá-las com '#'
-        df_data.to_csv(buffer, index=False, encoding='utf-8-sig', sep=';', decimal='.')
-        csv_value = buffer.getvalue()
-        buffer.close()
+        rows = self.iter_intermediate_data(queryset)
 
-        filename = f'{self.get_filename_base()}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-        response = HttpResponse(csv_value, content_type='text/csv; charset=utf-8-sig') # Adicionado charset
+        filename = self.get_output_filename('csv')
+        # O conteúdo já é gerado em bytes UTF-8 (com BOM): o charset do cabeçalho não recodifica os pedaços
+        response = StreamingHttpResponse(iter_csv(rows, column_map), content_type=self.OUTPUT_FORMATS['csv'][1])
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
     
@@ -196,56 +444,95 @@ class CustomerReportView(BaseReportView):
     form_class = CustomerReportForm
     report_title = 'Relatório de Clientes'
     filename_base = 'relatorio_clientes'
-
-    def prepare_intermediate_data_from_queryset(self, queryset):
+    report_key = 'customers'
+    columnar_fields = (
+        'pk', 'customer_type', 'full_name', 'preferred_name', 'tax_id', 'phone', 'email',
+        'is_active', 'is_vip', 'profession', 'interests', 'notes', 'registration_date',
+    )
+    typed_columns = {
+        'id': 'int',
+        'customer_type': 'string',
+        'customer_type_display': 'string',
+        'full_name': 'string',
+        'preferred_name': 'string',
+        'tax_id': 'string',
+        'phone': 'string',
+        'email': 'string',
+        'is_active': 'bool',
+        'is_vip': 'bool',
+        'profession': 'string',
+        'interests': 'string',
+        'notes': 'string',
+        'registration_date': 'timestamp',
+        **columnar.TYPED_ADDRESS_COLUMNS,
+    }
+
+    def prepare_intermediate_row(self, customer):
         """
-        Prepara os dados do QuerySet de Customer em um formato intermediário (lista de dicionários)
+        Prepara um Customer em um formato intermediário (dicionário)
         com chaves técnicas (inglês/snake_case) e valores JÁ FORMATADOS para exibição.
         """
-        data = []
-        for customer in queryset: # queryset já vem filtrado do form
-            address_info = customer.address # Assumindo que o form fez select_related('address')
-            address_full_formatted = "-"
-            if address_info:
-                address_full_formatted = f"{address_info.street or ''}, {address_info.number or 'S/N'}"
-                if address_info.complement:
-                    address_full_formatted += f" - {address_info.complement}"
-                address_full_formatted += f", {address_info.neighborhood or '-'}, {address_info.city or '-'} - {address_info.state or '-'} / CEP: {address_info.formatted_zip_code or '-'}"
+        address_info = customer.address # Pré-carregado pelo form com prefetch_primary_address()
+        address_full_formatted = "-"
+        if address_info:
+            address_full_formatted = f"{address_info.street or ''}, {address_info.number or 'S/N'}"
+            if address_info.complement:
+                address_full_formatted += f" - {address_info.complement}"
+            address_full_formatted += f", {address_info.neighborhood or '-'}, {address_info.city or '-'} - {address_info.state or '-'} / CEP: {address_info.formatted_zip_code or '-'}"
+        
+        # Os valores aqui devem ser strings formatadas para exibição ou None/Booleanos se o JSON precisar deles assim.
+        # Para Excel/CSV, strings são melhores.
+        return {
+            'id': customer.pk,
+            'customer_type_display': customer.get_customer_type_display(), # Já é string
+            'full_name': customer.full_name,
+            'preferred_name': customer.preferred_name or '-', # Garante string
+            'tax_id_formatted': customer.formatted_tax_id or '-',     # Já é string
+            'phone_formatted': customer.formatted_phone or '-',    # Já é string
+            'email': customer.email or '-',
+            'is_active_display': 'Sim' if customer.is_active else 'Não',
+            'is_vip_display': 'Sim' if customer.is_vip else 'Não',
+            'profession': customer.profession or '-',
+            'interests': customer.interests or '-',
+            'notes': customer.notes or '-',
+            'registration_date_formatted': customer.registration_date.strftime('%d/%m/%Y %H:%M') if customer.registration_date else '-',
             
-            # Os valores aqui devem ser strings formatadas para exibição ou None/Booleanos se o JSON precisar deles assim.
-            # Para Excel/CSV, strings são melhores.
-            data.append({
-                'id': customer.pk,
-                'customer_type_display': customer.get_customer_type_display(), # Já é string
-                'full_name': customer.full_name,
-                'preferred_name': customer.preferred_name or '-', # Garante string
-                'tax_id_formatted': customer.formatted_tax_id or '-',     # Já é string
-                'phone_formatted': customer.formatted_phone or '-',    # Já é string
-                'email': customer.email or '-',
-                'is_active_display': 'Sim' if customer.is_active else 'Não',
-                'is_vip_display': 'Sim' if customer.is_vip else 'Não',
-                'profession': customer.profession or '-',
-                'interests': customer.interests or '-',
-                'notes': customer.notes or '-',
-                'registration_date_formatted': customer.registration_date.strftime('%d/%m/%Y %H:%M') if customer.registration_date else '-',
-                
-                # Campos de endereço (se quiser eles separados também no JSON)
-                'address_zip_code_formatted': address_info.formatted_zip_code if address_info else '-',
-                'address_street': address_info.street if address_info else '-',
-                'address_number': address_info.number if address_info else '-',
-                'address_complement': address_info.complement if address_info else '-',
-                'address_neighborhood': address_info.neighborhood if address_info else '-',
-                'address_city': address_info.city if address_info else '-',
-                'address_state': address_info.state if address_info else '-',
-                'address_full_formatted': address_full_formatted, # Já formatado acima
-
-                # Se precisar dos valores RAW para o JSON, pode adicioná-los também:
-                # 'customer_type_raw': customer.customer_type,
-                # 'tax_id_raw': customer.tax_id,
-                # 'is_active_raw': customer.is_active,
-                # etc.
-            })
-        return data
+            # Campos de endereço (se quiser eles separados também no JSON)
+            'address_zip_code_formatted': address_info.formatted_zip_code if address_info else '-',
+            'address_street': address_info.street if address_info else '-',
+            'address_number': address_info.number if address_info else '-',
+            'address_complement': address_info.complement if address_info else '-',
+            'address_neighborhood': address_info.neighborhood if address_info else '-',
+            'address_city': address_info.city if address_info else '-',
+            'address_state': address_info.state if address_info else '-',
+            'address_full_formatted': address_full_formatted, # Já formatado acima
+
+            # Se precisar dos valores RAW para o JSON, pode adicioná-los também:
+            # 'customer_type_raw': customer.customer_type,
+            # 'tax_id_raw': customer.tax_id,
+            # 'is_active_raw': customer.is_active,
+            # etc.
+        }
+
+    def format_columnar_chunk(self, frame):
+        """Versão vetorizada de `prepare_intermediate_row` para um bloco de clientes."""
+        customer_type_choices = Customer._meta.get_field('customer_type').flatchoices
+        return pd.DataFrame({
+            'id': frame['pk'],
+            'customer_type_display': columnar.choice_display(frame['customer_type'], customer_type_choices),
+            'full_name': frame['full_name'],
+            'preferred_name': columnar.or_dash(frame['preferred_name']),
+            'tax_id_formatted': columnar.or_dash(columnar.apply_masks(frame['tax_id'], columnar.TAX_ID_MASKS)),
+            'phone_formatted': columnar.or_dash(columnar.apply_masks(frame['phone'], columnar.PHONE_MASKS)),
+            'email': columnar.or_dash(frame['email']),
+            'is_active_display': columnar.yes_no(frame['is_active']),
+            'is_vip_display': columnar.yes_no(frame['is_vip']),
+            'profession': columnar.or_dash(frame['profession']),
+            'interests': columnar.or_dash(frame['interests']),
+            'notes': columnar.or_dash(frame['notes']),
+            'registration_date_formatted': columnar.format_datetime(frame['registration_date'], '%d/%m/%Y %H:%M'),
+            **columnar.address_columns(frame),
+        })
 
     def get_column_map(self):
         """Mapeamento de chaves técnicas para cabeçalhos em Português para Excel/CSV."""
@@ -280,51 +567,99 @@ class SupplierReportView(BaseReportView):
     form_class = SupplierReportForm
     report_title = 'Relatório de Fornecedores'
     filename_base = 'relatorio_fornecedores'
-
-    def prepare_intermediate_data_from_queryset(self, queryset):
+    report_key = 'suppliers'
+    columnar_fields = (
+        'pk', 'supplier_type', 'full_name', 'preferred_name', 'tax_id', 'state_registration',
+        'municipal_registration', 'phone', 'email', 'contact_person', 'is_active', 'registration_date',
+        'bank_name', 'bank_agency', 'bank_account', 'pix_key', 'notes',
+    )
+    typed_columns = {
+        'id': 'int',
+        'supplier_type': 'string',
+        'supplier_type_display': 'string',
+        'full_name': 'string',
+        'preferred_name': 'string',
+        'tax_id': 'string',
+        'state_registration': 'string',
+        'municipal_registration': 'string',
+        'phone': 'string',
+        'email': 'string',
+        'contact_person': 'string',
+        'is_active': 'bool',
+        'registration_date': 'timestamp',
+        'bank_name': 'string',
+        'bank_agency': 'string',
+        'bank_account': 'string',
+        'pix_key': 'string',
+        'notes': 'string',
+        **columnar.TYPED_ADDRESS_COLUMNS,
+    }
+
+    def prepare_intermediate_row(self, supplier):
         """
-        Prepara os dados do QuerySet de Supplier em um formato intermediário.
-        """
-        data = []
-        for supplier in queryset: # queryset já vem filtrado do form
-            address_info = supplier.address
-            address_full_formatted = "-"
-            if address_info:
-                address_full_formatted = f"{address_info.street or ''}, {address_info.number or 'S/N'}"
-                if address_info.complement:
-                    address_full_formatted += f" - {address_info.complement}"
-                address_full_formatted += f", {address_info.neighborhood or '-'}, {address_info.city or '-'} - {address_info.state or '-'} / CEP: {address_info.formatted_zip_code or '-'}"
-
-            data.append({
-                'id': supplier.pk,
-                'supplier_type_display': supplier.get_supplier_type_display(),
-                'full_name': supplier.full_name,
-                'preferred_name': supplier.preferred_name or '-',
-                'tax_id_formatted': supplier.formatted_tax_id or '-',
-                'state_registration': supplier.state_registration or '-',
-                'municipal_registration': supplier.municipal_registration or '-',
-                'phone_formatted': supplier.formatted_phone or '-',
-                'email': supplier.email or '-',
-                'contact_person': supplier.contact_person or '-',
-                'is_active_display': 'Sim' if supplier.is_active else 'Não',
-                'registration_date_formatted': supplier.registration_date.strftime('%d/%m/%Y %H:%M') if supplier.registration_date else '-',
-                'bank_name': supplier.bank_name or '-',
-                'bank_agency': supplier.bank_agency or '-',
-                'bank_account': supplier.bank_account or '-',
-                'pix_key': supplier.pix_key or '-',
-                'notes': supplier.notes or '-',
-
-                # Campos de endereço
-                'address_zip_code_formatted': address_info.formatted_zip_code if address_info else '-',
-                'address_street': address_info.street if address_info else '-',
-                'address_number': address_info.number if address_info else '-',
-                'address_complement': address_info.complement if address_info else '-',
-                'address_neighborhood': address_info.neighborhood if address_info else '-',
-                'address_city': address_info.city if address_info else '-',
-                'address_state': address_info.state if address_info else '-',
-                'address_full_formatted': address_full_formatted,
-            })
-        return data
+        Prepara um Supplier em um formato intermediário (dicionário).
+        """
+        address_info = supplier.address # Pré-carregado pelo form com prefetch_primary_address()
+        address_full_formatted = "-"
+        if address_info:
+            address_full_formatted = f"{address_info.street or ''}, {address_info.number or 'S/N'}"
+            if address_info.complement:
+                address_full_formatted += f" - {address_info.complement}"
+            address_full_formatted += f", {address_info.neighborhood or '-'}, {address_info.city or '-'} - {address_info.state or '-'} / CEP: {address_info.formatted_zip_code or '-'}"
+
+        return {
+            'id': supplier.pk,
+            'supplier_type_display': supplier.get_supplier_type_display(),
+            'full_name': supplier.full_name,
+            'preferred_name': supplier.preferred_name or '-',
+            'tax_id_formatted': supplier.formatted_tax_id or '-',
+            'state_registration': supplier.state_registration or '-',
+            'municipal_registration': supplier.municipal_registration or '-',
+            'phone_formatted': supplier.formatted_phone or '-',
+            'email': supplier.email or '-',
+            'contact_person': supplier.contact_person or '-',
+            'is_active_display': 'Sim' if supplier.is_active else 'Não',
+            'registration_date_formatted': supplier.registration_date.strftime('%d/%m/%Y %H:%M') if supplier.registration_date else '-',
+            'bank_name': supplier.bank_name or '-',
+            'bank_agency': supplier.bank_agency or '-',
+            'bank_account': supplier.bank_account or '-',
+            'pix_key': supplier.pix_key or '-',
+            'notes': supplier.notes or '-',
+
+            # Campos de endereço
+            'address_zip_code_formatted': address_info.formatted_zip_code if address_info else '-',
+            'address_street': address_info.street if address_info else '-',
+            'address_number': address_info.number if address_info else '-',
+            'address_complement': address_info.complement if address_info else '-',
+            'address_neighborhood': address_info.neighborhood if address_info else '-',
+            'address_city': address_info.city if address_info else '-',
+            'address_state': address_info.state if address_info else '-',
+            'address_full_formatted': address_full_formatted,
+        }
+
+    def format_columnar_chunk(self, frame):
+        """Versão vetorizada de `prepare_intermediate_row` para um bloco de fornecedores."""
+        supplier_type_choices = Supplier._meta.get_field('supplier_type').flatchoices
+        return pd.DataFrame({
+            'id': frame['pk'],
+            'supplier_type_display': columnar.choice_display(frame['supplier_type'], supplier_type_choices),
+            'full_name': frame['full_name'],
+            'preferred_name': columnar.or_dash(frame['preferred_name']),
+            'tax_id_formatted': columnar.or_dash(columnar.apply_masks(frame['tax_id'], columnar.TAX_ID_MASKS)),
+            'state_registration': columnar.or_dash(frame['state_registration']),
+            'municipal_registration': columnar.or_dash(frame['municipal_registration']),
+            'phone_formatted': columnar.or_dash(columnar.apply_masks(frame['phone'], columnar.PHONE_MASKS)),
+            'email': columnar.or_dash(frame['email']),
+            'contact_person': columnar.or_dash(frame['contact_person']),
+            'is_active_display': columnar.yes_no(frame['is_active']),
+            'registration_date_formatted': columnar.format_datetime(frame['registration_date'], '%d/%m/%Y %H:%M'),
+            'bank_name': columnar.or_dash(frame['bank_name']),
+            'bank_agency': columnar.or_dash(frame['bank_agency']),
+            'bank_account': columnar.or_dash(frame['bank_account']),
+            'pix_key': columnar.or_dash(frame['pix_key']),
+            'notes': columnar.or_dash(frame['notes']),
+            **columnar.address_columns(frame),
+        })
 
     def get_column_map(self):
         """Mapeamento de chaves técnicas para cabeçalhos em Português para Excel/CSV."""
@@ -356,3 +691,52 @@ class SupplierReportView(BaseReportView):
             'address_state': 'UF',
             'address_full_formatted': 'Endereço Completo',
         }
+
+
+# Relatórios disponíveis para geração em segundo plano (ReportJob.report -> view)
+REPORT_VIEWS = {
+    view_class.report_key: view_class for view_class in (CustomerReportView, SupplierReportView)
+}
+
+
+def _job_status_data(job):
+    """Dados de acompanhamento de um ReportJob, retornados em JSON para a tela."""
+    return {
+        'id': str(job.uuid),
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'processed_rows': job.processed_rows,
+        'total_rows': job.total_rows,
+        'error': job.error,
+        'status_url': reverse('reports:job_status', args=[job.uuid]),
+        'download_url': reverse('reports:job_download', args=[job.uuid]) if job.status == 'done' else None,
+    }
+
+
+class ReportJobMixin(LoginRequiredMixin):
+    """Busca o ReportJob da URL; somente quem o solicitou (ou a equipe) tem acesso."""
+
+    def get_job(self):
+        job = get_object_or_404(ReportJob, uuid=self.kwargs['job_id'])
+        if job.requested_by_id != self.request.user.pk and not self.request.user.is_staff:
+            raise Http404("Relatório não encontrado.")
+        return job
+
+
+class ReportJobStatusView(ReportJobMixin, View):
+    """Endpoint leve consultado periodicamente pela tela enquanto o relatório é gerado."""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(_job_status_data(self.get_job()))
+
+
+class ReportJobDownloadView(ReportJobMixin, View):
+    """Entrega o arquivo de um relatório em segundo plano já concluído."""
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_job()
+        if job.status != 'done' or not job.file:
+            raise Http404("Arquivo do relatório indisponível.")
+        content_type = BaseReportView.OUTPUT_FORMATS[job.output_format][1]
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename, content_type=content_type)
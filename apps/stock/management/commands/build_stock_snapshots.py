@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.models import StockSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as fotografias de saldo do estoque por produto para os períodos encerrados "
+        "desde a última execução, somando as movimentações por período no banco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--period",
+            choices=[value for value, _ in StockSnapshot.PERIOD_CHOICES],
+            default="day",
+            help="Periodicidade das fotografias (padrão: day).",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Apaga as fotografias existentes e gera desde a primeira movimentação "
+                 "(necessário após cancelar em massa, via QuerySet.update(), movimentações "
+                 "de períodos já fotografados).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Quantidade de produtos gravados por lote (padrão: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        created = StockSnapshot.build(
+            period=options["period"],
+            rebuild=options["rebuild"],
+            batch_size=max(options["batch_size"], 1),
+            progress=lambda total: self.stdout.write(f"{total} fotografia(s) gravada(s)..."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Concluído: {created} fotografia(s) de estoque criada(s)."))
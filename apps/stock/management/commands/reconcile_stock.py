@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.models import Stock
+from apps.stock.reconciliation import fix_drift, iter_drift
+
+
+class Command(BaseCommand):
+    help = (
+        "Confere o estoque de cada produto com o saldo das movimentações não canceladas "
+        "(entradas, devoluções e cancelamentos menos saídas e ajustes) e, opcionalmente, "
+        "corrige as diferenças em lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Iguala o estoque ao saldo das movimentações nos produtos com diferença.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Com --fix, calcula e exibe as correções sem gravá-las.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Linhas lidas por vez e produtos corrigidos por transação (padrão: 2000).",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = max(options["batch_size"], 1)
+        self.fix = options["fix"]
+        self.dry_run = options["dry_run"]
+        self.fixed = self.skipped = 0
+
+        total = Stock.objects.count()
+        found = missing = 0
+        pending = []
+        for drift in iter_drift(self.batch_size, progress=lambda checked: self._progress(checked, total)):
+            found += 1
+            if drift.quantity is None:
+                missing += 1
+                self.stdout.write(
+                    f"Produto #{drift.product_id}: sem registro de estoque, saldo das movimentações {drift.ledger}"
+                )
+                continue
+            self.stdout.write(
+                f"Produto #{drift.product_id}: estoque {drift.quantity}, saldo das movimentações "
+                f"{drift.ledger} (diferença {drift.difference:+d})"
+            )
+            if self.fix:
+                pending.append(drift.product_id)
+                if len(pending) >= self.batch_size:
+                    self._fix(pending)
+                    pending = []
+        if pending:
+            self._fix(pending)
+
+        summary = f"{total} estoque(s) conferido(s), {found} diferença(s) encontrada(s)"
+        if missing:
+            summary += f", {missing} produto(s) com movimentações sem registro de estoque"
+        if self.fix:
+            action = "seriam corrigido(s)" if self.dry_run else "corrigido(s)"
+            summary += f"; {self.fixed} estoque(s) {action}, {self.skipped} ignorado(s) (saldo menor que o reservado)"
+        self.stdout.write(self.style.SUCCESS(summary + "."))
+
+    def _progress(self, checked, total):
+        self.stdout.write(f"{checked}/{total} estoque(s) conferido(s)...")
+
+    def _fix(self, product_ids):
+        fixed, skipped = fix_drift(product_ids, dry_run=self.dry_run)
+        self.fixed += len(fixed)
+        self.skipped += len(skipped)
+        for drift in skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Produto #{drift.product_id}: saldo {drift.ledger} menor que o reservado; estoque mantido em {drift.quantity}"
+            ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.stock.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Libera, em lotes, as reservas de estoque vencidas, devolvendo as quantidades "
+        "ao estoque livre dos produtos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Quantidade de reservas liberadas por transação (padrão: 500).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        released = 0
+        while True:
+            count = StockReservation.release_expired(batch_size)
+            if not count:
+                break
+            released += count
+            self.stdout.write(f"{released} reserva(s) liberada(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído: {released} reserva(s) vencida(s) liberada(s)."))
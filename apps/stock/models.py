@@ -1,5 +1,9 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models, transaction
-from django.db.models import F
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Greatest, TruncDay, TruncMonth, TruncWeek
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -46,12 +50,31 @@ class Stock(models.Model):
         auto_now=True,
         help_text="Data e hora da última atualização do estoque"
     )
+    reserved = models.PositiveIntegerField(
+        verbose_name='Quantidade Reservada',
+        default=0,
+        help_text="Parte da quantidade em estoque reservada para pedidos (ver StockReservation)"
+    )
+    available = models.GeneratedField(
+        expression=F('quantity') - F('reserved'),
+        output_field=models.IntegerField(),
+        db_persist=True,
+        verbose_name='Quantidade Livre',
+        help_text="Quantidade em estoque não reservada (calculada pelo banco)"
+    )
 
     class Meta:
         verbose_name = 'Estoque'
         verbose_name_plural = 'Estoques'
         indexes = [
             models.Index(fields=['product'], name='stock_product_idx'),
+            models.Index(fields=['available'], name='stock_available_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(reserved__lte=F('quantity')),
+                name='stock_reserved_lte_quantity'
+            )
         ]
         ordering = ['-last_updated']
 
@@ -59,6 +82,213 @@ class Stock(models.Model):
         """Representação string do objeto."""
         return f"{self.product.name} | {self.quantity} unidades"
 
+    @staticmethod
+    def _per_product(quantities):
+        """
+        Expressão `CASE product_id WHEN ... THEN n END` com a quantidade de cada
+        produto, para alterar vários estoques em um único `UPDATE`.
+        """
+        if any(qty < 0 for qty in quantities.values()):
+            raise ValueError("As quantidades devem ser positivas.")
+        return Case(
+            *[When(product_id=product_id, then=Value(qty)) for product_id, qty in quantities.items()],
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+
+    @classmethod
+    def _update_all(cls, product_ids, condition, changes):
+        """
+        Altera o estoque dos produtos com um único `UPDATE ... WHERE product_id IN (...) AND condição`.
+
+        A contagem de linhas afetadas indica se a condição foi atendida para todos.
+        É tudo ou nada: se faltar algum, a alteração é desfeita e só então os produtos
+        que falharam são identificados (consulta extra apenas no caminho de erro).
+        Baixas concorrentes usam o mesmo plano e percorrem (e bloqueiam) as linhas
+        na mesma ordem.
+
+        Args:
+            product_ids (list): Produtos alterados.
+            condition (Q): Condição de cada linha (ex: estoque livre suficiente).
+            changes (dict): Alterações do `UPDATE` (expressões de `_per_product`).
+
+        Returns:
+            list: Ids dos produtos em que a condição não foi atendida (ou sem estoque registrado).
+        """
+        product_ids = sorted(product_ids)
+        if not product_ids:
+            return []
+        changes = {**changes, 'last_updated': timezone.now()}  # update() não aplica o auto_now de last_updated
+        while True:
+            with transaction.atomic():
+                updated = cls.objects.filter(condition, product_id__in=product_ids).update(**changes)
+                if updated == len(product_ids):
+                    return []
+                transaction.set_rollback(True)
+
+            passing = set(
+                cls.objects.filter(condition, product_id__in=product_ids).values_list('product_id', flat=True)
+            )
+            failed = [product_id for product_id in product_ids if product_id not in passing]
+            if failed:
+                return failed
+            # O estoque mudou entre o UPDATE e a consulta (ex: uma reposição): tenta de novo
+
+    @classmethod
+    def try_decrement(cls, quantities):
+        """
+        Tenta dar baixa de várias quantidades sem bloquear os estoques antes (otimista).
+
+        As baixas são um único `UPDATE ... SET quantity = quantity - CASE ... END
+        WHERE quantity - reserved >= CASE ... END`: o próprio banco garante que o
+        estoque não fica negativo nem invade as reservas, mesmo com baixas
+        concorrentes, e a contagem de linhas afetadas indica se havia estoque.
+        As linhas ficam bloqueadas só a partir da própria baixa.
+
+        É tudo ou nada: se algum produto não tiver estoque suficiente (ou registro
+        de estoque), nenhuma baixa é mantida.
+
+        Args:
+            quantities (dict): Quantidade a baixar por id de produto.
+
+        Returns:
+            list: Ids dos produtos sem estoque suficiente (vazia se as baixas foram aplicadas).
+        """
+        quantities = {product_id: qty for product_id, qty in quantities.items() if qty}
+        qty = cls._per_product(quantities)
+        return cls._update_all(quantities, models.Q(available__gte=qty), {'quantity': F('quantity') - qty})
+
+    @classmethod
+    def try_reserve(cls, quantities):
+        """Reserva as quantidades se houver estoque livre para todas (como `try_decrement`, sem baixar o estoque)."""
+        quantities = {product_id: qty for product_id, qty in quantities.items() if qty}
+        qty = cls._per_product(quantities)
+        return cls._update_all(quantities, models.Q(available__gte=qty), {'reserved': F('reserved') + qty})
+
+    @classmethod
+    def unreserve(cls, quantities):
+        """Devolve quantidades reservadas ao estoque livre (nunca deixa `reserved` negativo)."""
+        quantities = {product_id: qty for product_id, qty in quantities.items() if qty}
+        qty = cls._per_product(quantities)
+        return cls._update_all(quantities, models.Q(), {'reserved': Greatest(F('reserved') - qty, 0)})
+
+    @classmethod
+    def decrement_many(cls, quantities, user, reference_id='', notes='', movement_type='OUT', reserved=None):
+        """
+        Dá baixa de várias quantidades de uma vez, com um único `UPDATE` nos
+        estoques e uma movimentação por produto em um único `bulk_create`.
+
+        As quantidades cobertas por `reserved` saem da reserva (quantidade e
+        reserva diminuem juntas, sem concorrer pelo estoque livre); o restante
+        precisa de estoque livre, como em `try_decrement`. Reservas maiores que
+        a quantidade baixada têm a sobra devolvida ao estoque livre.
+
+        Args:
+            quantities (dict): Quantidade a baixar por id de produto.
+            user: Usuário responsável pelas movimentações.
+            reference_id (str): Referência gravada em cada movimentação.
+            notes (str): Observações gravadas em cada movimentação.
+            movement_type (str): Tipo das movimentações (uma saída, ver `StockMovement.OUTBOUND_TYPES`).
+            reserved (dict): Quantidade já reservada para esta baixa, por id de produto.
+
+        Returns:
+            list[StockMovement]: Movimentações criadas, na ordem do id do produto.
+
+        Raises:
+            ValidationError: Se algum produto não tiver estoque registrado ou
+                disponível suficiente (nada é alterado nesse caso).
+        """
+        quantities = {product_id: qty for product_id, qty in quantities.items() if qty}
+        reserved = {product_id: qty for product_id, qty in (reserved or {}).items() if qty}
+        from_reserve = {pid: min(qty, reserved.get(pid, 0)) for pid, qty in quantities.items()}
+        from_available = {pid: qty - from_reserve[pid] for pid, qty in quantities.items()}
+
+        with transaction.atomic():
+            # A reserva perde tudo o que foi reservado: a parte baixada junto com a quantidade
+            # (exigida pela condição) e a sobra, que nunca leva `reserved` abaixo de zero
+            failed = cls._update_all(
+                set(quantities) | set(reserved),
+                models.Q(
+                    reserved__gte=cls._per_product(from_reserve),
+                    available__gte=cls._per_product(from_available),
+                ),
+                {
+                    'quantity': F('quantity') - cls._per_product(quantities),
+                    'reserved': Greatest(F('reserved') - cls._per_product(reserved), 0),
+                },
+            )
+            if failed:
+                raise ValidationError(cls._insufficient_stock_errors({**reserved, **quantities}, failed))
+
+            return StockMovement.objects.bulk_create([
+                StockMovement(
+                    product_id=product_id,
+                    movement_type=movement_type,
+                    quantity=quantities[product_id],
+                    reference_id=reference_id,
+                    user=user,
+                    notes=notes,
+                )
+                for product_id in sorted(quantities)
+            ])
+
+    @classmethod
+    def adjust(cls, product_id, delta, user, notes=''):
+        """
+        Ajuste manual do estoque de um produto.
+
+        Reduções (`delta` negativo) usam `try_decrement` e são registradas como
+        ajuste (ADJUSTMENT); acréscimos são registrados como entrada (IN).
+
+        Returns:
+            StockMovement: Movimentação registrada.
+
+        Raises:
+            ValidationError: Se a redução deixaria o estoque negativo ou o produto não tiver estoque.
+        """
+        if not delta:
+            raise ValidationError("A quantidade do ajuste deve ser diferente de zero.")
+
+        with transaction.atomic():
+            if delta < 0:
+                movement_type = 'ADJUSTMENT'
+                if cls.try_decrement({product_id: -delta}):
+                    raise ValidationError(cls._insufficient_stock_errors({product_id: -delta}, [product_id]))
+            else:
+                movement_type = 'IN'
+                updated = cls.objects.filter(product_id=product_id).update(
+                    quantity=F('quantity') + delta,
+                    last_updated=timezone.now(),
+                )
+                if not updated:
+                    raise ValidationError(cls._insufficient_stock_errors({product_id: delta}, [product_id]))
+
+            return StockMovement.objects.create(
+                product_id=product_id,
+                movement_type=movement_type,
+                quantity=abs(delta),
+                user=user,
+                notes=notes,
+            )
+
+    @classmethod
+    def _insufficient_stock_errors(cls, quantities, product_ids):
+        """Mensagens de erro para os produtos sem estoque registrado ou livre suficiente."""
+        available = dict(cls.objects.filter(product_id__in=product_ids).values_list('product_id', 'available'))
+        # Nomes dos produtos apenas para a mensagem de erro
+        names = {product.pk: str(product) for product in Product.objects.filter(pk__in=product_ids)}
+        errors = []
+        for product_id in product_ids:
+            name = names.get(product_id, product_id)
+            if product_id not in available:
+                errors.append(f"Produto {name} não encontrado no estoque")
+            else:
+                errors.append(
+                    f"Estoque insuficiente: {name}. "
+                    f"Disponível: {available[product_id]}, Necessário: {quantities[product_id]}"
+                )
+        return errors
+
 
 
 class StockMovement(models.Model):
@@ -86,6 +316,9 @@ class StockMovement(models.Model):
         ('ADJUSTMENT', 'Ajuste'),
         ('CANCELLATION', 'Cancelamento')
     ]
+    # Sentido de cada tipo no saldo do estoque
+    INBOUND_TYPES = ('IN', 'RETURN', 'CANCELLATION')
+    OUTBOUND_TYPES = ('OUT', 'ADJUSTMENT')
 
     product = models.ForeignKey(
         Product,
@@ -163,7 +396,8 @@ class StockMovement(models.Model):
         app_label = 'stock'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['product'], name='movement_product_idx'),
+            # Movimentações de um produto em um intervalo (saldo em uma data, fotografias do estoque)
+            models.Index(fields=['product', 'created_at'], name='movement_product_created_idx'),
             models.Index(fields=['movement_type'], name='movement_type_idx'),
             models.Index(fields=['is_cancelled'], name='movement_cancelled_idx'),
         ]
@@ -172,3 +406,456 @@ class StockMovement(models.Model):
         """Representação string do objeto."""
         status = "(CANCELADO)" if self.is_cancelled else ""
         return f"{self.get_movement_type_display()} {status} | {self.product.name} | {self.quantity} unidades"
+
+    def save(self, *args, **kwargs):
+        """
+        Salva a movimentação e mantém as fotografias de saldo coerentes.
+
+        Ao cancelar (ou reativar) uma movimentação, as fotografias do produto
+        cujo período a inclui (fim posterior à sua criação) são corrigidas pela
+        quantidade da movimentação, na mesma transação. Cancelamentos feitos via
+        `QuerySet.update()` não passam por aqui e exigem `build_stock_snapshots --rebuild`.
+        """
+        update_fields = kwargs.get('update_fields')
+        tracked = not self._state.adding and (update_fields is None or 'is_cancelled' in update_fields)
+
+        with transaction.atomic():
+            # A troca é reivindicada por um UPDATE condicional: entre dois cancelamentos
+            # simultâneos da mesma movimentação, apenas um altera a linha e corrige as fotografias.
+            flipped = tracked and StockMovement.objects.filter(
+                pk=self.pk, is_cancelled=not self.is_cancelled
+            ).update(is_cancelled=self.is_cancelled)
+            super().save(*args, **kwargs)
+            if flipped:
+                created_at = StockMovement.objects.filter(pk=self.pk).values_list('created_at', flat=True).get()
+                change = -self.signed_amount if self.is_cancelled else self.signed_amount
+                StockSnapshot.shift(self.product_id, created_at, change)
+
+    @property
+    def signed_amount(self):
+        """Quantidade com o sinal do tipo da movimentação (ver `signed_quantity`)."""
+        if self.movement_type in self.INBOUND_TYPES:
+            return self.quantity
+        if self.movement_type in self.OUTBOUND_TYPES:
+            return -self.quantity
+        return 0
+
+    @classmethod
+    def signed_quantity(cls):
+        """
+        Expressão da quantidade com o sinal do tipo da movimentação: positiva para
+        entradas (`INBOUND_TYPES`) e negativa para saídas (`OUTBOUND_TYPES`).
+        Somada sobre as movimentações não canceladas, dá o saldo do estoque.
+        """
+        return Case(
+            When(movement_type__in=cls.INBOUND_TYPES, then=F('quantity')),
+            When(movement_type__in=cls.OUTBOUND_TYPES, then=Value(0) - F('quantity')),
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+
+
+class StockReservation(models.Model):
+    """
+    Reserva de estoque de um item de pedido, com validade.
+
+    Enquanto ativa, a quantidade reservada conta em `Stock.reserved` e deixa de
+    estar livre (`Stock.available`) para outros pedidos, sem baixar o estoque
+    físico. Na confirmação do pedido a reserva é baixada; reservas vencidas são
+    liberadas pelo comando `release_expired_reservations`.
+
+    Atributos:
+        order (ForeignKey): Pedido da reserva
+        order_item (ForeignKey): Item do pedido reservado
+        product (ForeignKey): Produto reservado
+        quantity (PositiveIntegerField): Quantidade reservada
+        status (CharField): Situação da reserva (ativa, baixada, liberada ou expirada)
+        expires_at (DateTimeField): Validade da reserva
+        released_at (DateTimeField): Data/hora em que a reserva deixou de estar ativa
+        created_at (DateTimeField): Data/hora de criação do registro
+    """
+    STATUS_CHOICES = [
+        ('active', 'Ativa'),
+        ('consumed', 'Baixada'),
+        ('released', 'Liberada'),
+        ('expired', 'Expirada'),
+    ]
+
+    order = models.ForeignKey(
+        'orders.Order',
+        verbose_name='Pedido',
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        help_text="Pedido para o qual o estoque está reservado"
+    )
+    order_item = models.ForeignKey(
+        'orders.OrderItem',
+        verbose_name='Item do Pedido',
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        help_text="Item do pedido reservado"
+    )
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.PROTECT,
+        related_name='reservations',
+        help_text="Produto reservado"
+    )
+    quantity = models.PositiveIntegerField(
+        verbose_name='Quantidade',
+        help_text="Quantidade reservada"
+    )
+    status = models.CharField(
+        verbose_name='Situação',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='active',
+        help_text="Apenas reservas ativas contam em Stock.reserved"
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Validade',
+        help_text="Após esta data/hora a reserva é liberada"
+    )
+    released_at = models.DateTimeField(
+        verbose_name='Encerrada em',
+        null=True,
+        blank=True,
+        help_text="Data e hora em que a reserva foi baixada, liberada ou expirou"
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Data de Criação',
+        auto_now_add=True,
+        help_text="Data e hora de criação do registro"
+    )
+
+    class Meta:
+        verbose_name = 'Reserva de Estoque'
+        verbose_name_plural = 'Reservas de Estoque'
+        app_label = 'stock'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='reservation_status_exp_idx'),
+            models.Index(fields=['order', 'status'], name='reservation_order_idx'),
+        ]
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"{self.get_status_display()} | Pedido #{self.order_id} | {self.quantity} unidades"
+
+    @classmethod
+    def reserve_order(cls, order, ttl=None):
+        """
+        Reserva o estoque dos itens do pedido, substituindo as reservas ativas dele.
+
+        Args:
+            order: Pedido (`apps.orders.models.Order`).
+            ttl (int): Validade em segundos (padrão: settings.STOCK_RESERVATION_TTL).
+
+        Returns:
+            list[StockReservation]: Reservas criadas, uma por item.
+
+        Raises:
+            ValidationError: Se não houver estoque livre para algum produto (nada é reservado).
+        """
+        ttl = settings.STOCK_RESERVATION_TTL if ttl is None else ttl
+        with transaction.atomic():
+            cls.release(cls.objects.filter(order=order))
+
+            items = list(order.items.values_list('pk', 'product_id', 'quantity'))
+            totals = _totals_by_product(items)
+            failed = Stock.try_reserve(totals)
+            if failed:
+                raise ValidationError(Stock._insufficient_stock_errors(totals, failed))
+
+            expires_at = timezone.now() + timedelta(seconds=ttl)
+            return cls.objects.bulk_create([
+                cls(order=order, order_item_id=item_id, product_id=product_id, quantity=quantity, expires_at=expires_at)
+                for item_id, product_id, quantity in items
+            ])
+
+    @classmethod
+    def consume_order(cls, order):
+        """
+        Marca como baixadas as reservas ativas e válidas do pedido (as vencidas são
+        liberadas). Não altera `Stock.quantity`: a baixa é feita por
+        `Stock.decrement_many(..., reserved=...)` na mesma transação.
+
+        Returns:
+            dict: Quantidade reservada por id de produto.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                cls.objects.filter(order=order, status='active')
+                .select_for_update()
+                .order_by('pk')
+                .values_list('pk', 'product_id', 'quantity', 'expires_at')
+            )
+            expired = [row[:3] for row in rows if row[3] <= now]
+            valid = [row[:3] for row in rows if row[3] > now]
+            cls._close(expired, 'expired', now)
+            cls.objects.filter(pk__in=[pk for pk, _, _ in valid]).update(status='consumed', released_at=now)
+        return _totals_by_product(valid)
+
+    @classmethod
+    def release(cls, reservations):
+        """
+        Libera as reservas ativas de `reservations` (queryset), devolvendo as
+        quantidades ao estoque livre.
+
+        Returns:
+            int: Quantidade de reservas liberadas.
+        """
+        with transaction.atomic():
+            rows = list(
+                reservations.filter(status='active')
+                .select_for_update()
+                .order_by('pk')
+                .values_list('pk', 'product_id', 'quantity')
+            )
+            cls._close(rows, 'released', timezone.now())
+        return len(rows)
+
+    @classmethod
+    def release_expired(cls, batch_size=500):
+        """
+        Libera um lote de reservas vencidas. Reservas bloqueadas por outra
+        transação (ex: um pedido sendo confirmado) ficam para o próximo lote.
+
+        Returns:
+            int: Quantidade de reservas liberadas (0 quando não há mais vencidas).
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                cls.objects.filter(status='active', expires_at__lte=now)
+                .select_for_update(skip_locked=True)
+                .order_by('pk')
+                .values_list('pk', 'product_id', 'quantity')[:batch_size]
+            )
+            cls._close(rows, 'expired', now)
+        return len(rows)
+
+    @classmethod
+    def _close(cls, rows, status, now):
+        """Encerra as reservas `rows` (pk, produto, quantidade) e devolve as quantidades ao estoque livre."""
+        if not rows:
+            return
+        cls.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(status=status, released_at=now)
+        Stock.unreserve(_totals_by_product(rows))
+
+
+def _totals_by_product(rows):
+    """Soma as quantidades de linhas (…, produto, quantidade) por id de produto."""
+    totals = {}
+    for _, product_id, quantity in rows:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+    return totals
+
+
+class StockSnapshot(models.Model):
+    """
+    Fotografia do saldo de um produto no fechamento de um período.
+
+    O saldo em uma data é a fotografia mais recente até ela somada às
+    movimentações posteriores (`quantity_at`), sem percorrer todo o histórico
+    de `StockMovement`. As fotografias são geradas por `manage.py build_stock_snapshots`,
+    apenas para produtos com movimentação no período e para períodos já encerrados.
+    Cancelar uma movimentação já fotografada corrige as fotografias seguintes
+    (`StockMovement.save`); cancelamentos em massa exigem `--rebuild`.
+
+    Atributos:
+        product (ForeignKey): Produto fotografado
+        period (CharField): Periodicidade da fotografia (diária, semanal ou mensal)
+        period_end (DateTimeField): Fim do período (exclusivo): o saldo considera as
+            movimentações criadas antes deste instante
+        quantity (IntegerField): Saldo do produto no fim do período
+        created_at (DateTimeField): Data/hora de criação do registro
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Diário'),
+        ('week', 'Semanal'),
+        ('month', 'Mensal'),
+    ]
+
+    product = models.ForeignKey(
+        Product,
+        verbose_name='Produto',
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        help_text="Produto fotografado"
+    )
+    period = models.CharField(
+        verbose_name='Periodicidade',
+        max_length=5,
+        choices=PERIOD_CHOICES,
+        help_text="Periodicidade usada ao gerar a fotografia"
+    )
+    period_end = models.DateTimeField(
+        verbose_name='Fim do Período',
+        help_text="O saldo considera as movimentações criadas antes deste instante"
+    )
+    quantity = models.IntegerField(
+        verbose_name='Saldo',
+        help_text="Saldo do produto no fim do período, segundo as movimentações"
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Data de Criação',
+        auto_now_add=True,
+        help_text="Data e hora de criação do registro"
+    )
+
+    class Meta:
+        verbose_name = 'Fotografia de Estoque'
+        verbose_name_plural = 'Fotografias de Estoque'
+        app_label = 'stock'
+        ordering = ['product', '-period_end']
+        constraints = [
+            # Também serve à busca da fotografia mais recente de um produto até uma data
+            models.UniqueConstraint(fields=['product', 'period_end'], name='unique_snapshot_product_period_end'),
+        ]
+
+    def __str__(self):
+        """Representação string do objeto."""
+        return f"Produto #{self.product_id} | {self.period_end:%d/%m/%Y %H:%M} | {self.quantity} unidades"
+
+    @classmethod
+    def quantity_at(cls, product, moment):
+        """
+        Saldo do produto em `moment`: a fotografia mais recente até esse instante
+        mais as movimentações não canceladas criadas entre ela e `moment`.
+        """
+        snapshot = (
+            cls.objects.filter(product=product, period_end__lte=moment)
+            .order_by('-period_end')
+            .values_list('period_end', 'quantity')
+            .first()
+        )
+        movements = StockMovement.objects.filter(product=product, is_cancelled=False, created_at__lt=moment)
+        base = 0
+        if snapshot:
+            movements = movements.filter(created_at__gte=snapshot[0])
+            base = snapshot[1]
+        delta = movements.aggregate(total=Sum(StockMovement.signed_quantity()))['total'] or 0
+        return base + delta
+
+    @classmethod
+    def shift(cls, product, since, change):
+        """
+        Soma `change` às fotografias do produto que incluem uma movimentação
+        criada em `since` (fim do período posterior a esse instante).
+
+        Returns:
+            int: Quantidade de fotografias corrigidas.
+        """
+        if not change:
+            return 0
+        return cls.objects.filter(product=product, period_end__gt=since).update(quantity=F('quantity') + change)
+
+    @classmethod
+    def build(cls, period='day', until=None, rebuild=False, batch_size=1000, progress=None):
+        """
+        Gera as fotografias dos períodos encerrados desde a última geração.
+
+        As movimentações são somadas por produto e período no banco (uma consulta
+        agregada, lida em streaming); o saldo de cada período é o saldo anterior
+        (última fotografia do produto) mais o líquido do período.
+
+        Args:
+            period (str): Periodicidade ('day', 'week' ou 'month').
+            until (datetime): Limite das fotografias, arredondado para o início do seu período;
+                padrão: agora (até o início do período atual).
+            rebuild (bool): Apaga as fotografias existentes e gera desde a primeira movimentação
+                (necessário após cancelar movimentações via `QuerySet.update()`).
+            batch_size (int): Produtos por lote gravado.
+            progress (callable): Chamado com o total de fotografias gravadas após cada lote.
+
+        Returns:
+            int: Quantidade de fotografias criadas.
+        """
+        if period not in dict(cls.PERIOD_CHOICES):
+            raise ValueError(f"Periodicidade inválida: {period}")
+        # Apenas períodos inteiros: um período em andamento ainda pode receber movimentações
+        until = _period_start(timezone.localtime(until), period)
+
+        if rebuild:
+            cls.objects.all().delete()
+        since = cls.objects.aggregate(last=models.Max('period_end'))['last']
+        if since and since >= until:
+            return 0
+
+        movements = StockMovement.objects.filter(is_cancelled=False, created_at__lt=until)
+        if since:
+            movements = movements.filter(created_at__gte=since)
+        rows = (
+            movements.annotate(period_start=PERIOD_TRUNCS[period]('created_at'))
+            .values('product_id', 'period_start')
+            .annotate(net=Sum(StockMovement.signed_quantity()))
+            .order_by('product_id', 'period_start')
+            .values_list('product_id', 'period_start', 'net')
+            .iterator(chunk_size=batch_size)
+        )
+
+        created = products = 0
+        batch = []
+        for row in rows:
+            if not batch or batch[-1][0] != row[0]:  # Novo produto (as linhas vêm ordenadas por produto)
+                if products >= batch_size:
+                    created += cls._save_batch(batch, period, since)
+                    batch, products = [], 0
+                    if progress:
+                        progress(created)
+                products += 1
+            batch.append(row)
+        if batch:
+            created += cls._save_batch(batch, period, since)
+            if progress:
+                progress(created)
+        return created
+
+    @classmethod
+    def _save_batch(cls, rows, period, since):
+        """Grava as fotografias de um lote de linhas (produto, início do período, líquido), ordenadas."""
+        product_ids = {product_id for product_id, _, _ in rows}
+        balances = {}
+        if since:
+            latest = cls.objects.filter(product_id=OuterRef('product_id')).order_by('-period_end').values('period_end')[:1]
+            balances = dict(
+                cls.objects.filter(product_id__in=product_ids, period_end=Subquery(latest))
+                .values_list('product_id', 'quantity')
+            )
+
+        snapshots = []
+        for product_id, period_start, net in rows:
+            balances[product_id] = balances.get(product_id, 0) + net
+            snapshots.append(cls(
+                product_id=product_id,
+                period=period,
+                period_end=_next_period_start(period_start, period),
+                quantity=balances[product_id],
+            ))
+        cls.objects.bulk_create(snapshots)
+        return len(snapshots)
+
+
+PERIOD_TRUNCS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+def _period_start(moment, period):
+    """Início (no fuso atual) do período que contém `moment`."""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'week':
+        return start - timedelta(days=start.weekday())
+    if period == 'month':
+        return start.replace(day=1)
+    return start
+
+
+def _next_period_start(start, period):
+    """Início do período seguinte ao que começa em `start`."""
+    if period == 'day':
+        return start + timedelta(days=1)
+    if period == 'week':
+        return start + timedelta(weeks=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
@@ -0,0 +1,124 @@
+"""
+Conferência do estoque (`Stock.quantity`) com o saldo das movimentações (`StockMovement`).
+
+O saldo de cada produto é calculado no banco, com uma única consulta agrupada
+sobre as movimentações não canceladas (`StockMovement.signed_quantity`), e lido
+em streaming junto com os estoques, ambos ordenados por produto: a comparação é
+um merge das duas sequências, sem carregar movimentações nem estoques inteiros
+na memória.
+"""
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Stock, StockMovement
+
+
+class StockDrift:
+    """Diferença entre o estoque registrado de um produto e o saldo das suas movimentações."""
+
+    __slots__ = ("product_id", "quantity", "ledger")
+
+    def __init__(self, product_id, quantity, ledger):
+        self.product_id = product_id
+        self.quantity = quantity  # None: produto com movimentações, mas sem registro de estoque
+        self.ledger = ledger
+
+    @property
+    def difference(self):
+        """Estoque registrado menos o saldo das movimentações."""
+        return (self.quantity or 0) - self.ledger
+
+
+def ledger_totals(product_ids=None):
+    """Saldo das movimentações não canceladas por produto: (id do produto, saldo), ordenado por produto."""
+    movements = StockMovement.objects.filter(is_cancelled=False)
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+    return (
+        movements.values('product_id')
+        .annotate(total=Sum(StockMovement.signed_quantity()))
+        .order_by('product_id')
+        .values_list('product_id', 'total')
+    )
+
+
+def iter_drift(chunk_size=2000, progress=None):
+    """
+    Percorre os estoques e os saldos das movimentações, ambos ordenados por
+    produto, e gera um `StockDrift` para cada produto em que não coincidem.
+
+    Args:
+        chunk_size (int): Linhas lidas por vez de cada consulta.
+        progress (callable): Chamado com a quantidade de estoques conferidos a cada `chunk_size`.
+    """
+    ledger = ledger_totals().iterator(chunk_size=chunk_size)
+    stocks = Stock.objects.order_by('product_id').values_list('product_id', 'quantity').iterator(chunk_size=chunk_size)
+
+    ledger_row = next(ledger, None)
+    checked = 0
+    for product_id, quantity in stocks:
+        # Saldos de produtos sem registro de estoque
+        while ledger_row is not None and ledger_row[0] < product_id:
+            if ledger_row[1]:
+                yield StockDrift(ledger_row[0], None, ledger_row[1])
+            ledger_row = next(ledger, None)
+
+        total = 0
+        if ledger_row is not None and ledger_row[0] == product_id:
+            total = ledger_row[1]
+            ledger_row = next(ledger, None)
+        if quantity != total:
+            yield StockDrift(product_id, quantity, total)
+
+        checked += 1
+        if progress and checked % chunk_size == 0:
+            progress(checked)
+
+    while ledger_row is not None:
+        if ledger_row[1]:
+            yield StockDrift(ledger_row[0], None, ledger_row[1])
+        ledger_row = next(ledger, None)
+    if progress and checked % chunk_size:
+        progress(checked)
+
+
+def fix_drift(product_ids, dry_run=False):
+    """
+    Iguala o estoque dos produtos ao saldo das suas movimentações.
+
+    Os estoques são bloqueados (na ordem do id do produto) e o
+    saldo é recalculado dentro da mesma transação, então diferenças transitórias
+    vistas durante a conferência não são "corrigidas". Saldos menores que a
+    quantidade reservada (incluindo negativos) não são aplicados.
+
+    Args:
+        product_ids (list): Produtos a corrigir.
+        dry_run (bool): Calcula as correções e desfaz a transação, sem gravar.
+
+    Returns:
+        tuple[list[StockDrift], list[StockDrift]]: Diferenças corrigidas e ignoradas.
+    """
+    now = timezone.now()
+    fixed, skipped = [], []
+    with transaction.atomic():
+        stocks = list(Stock.objects.select_for_update().filter(product_id__in=product_ids).order_by('product_id'))
+        totals = dict(ledger_totals(product_ids))
+
+        changed = []
+        for stock in stocks:
+            drift = StockDrift(stock.product_id, stock.quantity, totals.get(stock.product_id, 0))
+            if not drift.difference:
+                continue
+            if drift.ledger < stock.reserved:
+                skipped.append(drift)
+                continue
+            stock.quantity = drift.ledger
+            stock.last_updated = now  # bulk_update não aplica o auto_now de last_updated
+            changed.append(stock)
+            fixed.append(drift)
+        Stock.objects.bulk_update(changed, ['quantity', 'last_updated'])
+
+        if dry_run:
+            transaction.set_rollback(True)
+    return fixed, skipped
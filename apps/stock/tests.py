@@ -1,3 +1,428 @@
-from django.test import TestCase
+import multiprocessing
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models.signals import pre_save
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+# O app de estoque ainda não está em INSTALLED_APPS; os modelos só são importados nos testes
+STOCK_INSTALLED = apps.is_installed('apps.stock')
+ORDERS_INSTALLED = STOCK_INSTALLED and apps.is_installed('apps.orders')
+
+
+def _create_stocks(*quantities):
+    """Cria um produto com estoque para cada quantidade (sem validação de produto)."""
+    from apps.products.models import Category, Product
+    from apps.stock.models import Stock
+
+    category, _ = Category.objects.get_or_create(abbreviation='TST', name='Teste')
+    start = Product.objects.count()
+    products = Product.objects.bulk_create(
+        Product(category=category, description=f'Produto {index}', cost_price=1, sale_price=2,
+                internal_code=f'TST{index:04d}')
+        for index in range(start, start + len(quantities))
+    )
+    Stock.objects.bulk_create(Stock(product=product, quantity=qty) for product, qty in zip(products, quantities))
+    return [product.pk for product in products]
+
+
+def _buy_until_sold_out(product_id, results):
+    """Processo comprador: baixa uma unidade por vez até faltar estoque; envia (vendidas, erro)."""
+    from apps.stock.models import Stock
+
+    sold, error = 0, None
+    try:
+        while not Stock.try_decrement({product_id: 1}):
+            sold += 1
+    except Exception as e:  # Ex: violação da restrição de quantidade positiva
+        error = repr(e)
+    finally:
+        connections.close_all()
+        results.put((sold, error))
+
+
+@skipUnless(STOCK_INSTALLED, "App de estoque não instalado")
+class StockTryDecrementTests(TestCase):
+    """Testa a baixa otimista de estoque (`Stock.try_decrement`)."""
+
+    def setUp(self):
+        from apps.stock.models import Stock
+        self.Stock = Stock
+        self.first, self.second = _create_stocks(5, 2)
+
+    def _quantities(self):
+        return list(self.Stock.objects.order_by('product_id').values_list('quantity', flat=True))
+
+    def test_decrements_when_available(self):
+        self.assertEqual(self.Stock.try_decrement({self.first: 5, self.second: 1}), [])
+        self.assertEqual(self._quantities(), [0, 1])
+
+    def test_all_or_nothing_when_any_is_insufficient(self):
+        self.assertEqual(self.Stock.try_decrement({self.first: 1, self.second: 3}), [self.second])
+        self.assertEqual(self._quantities(), [5, 2])
+
+    def test_product_without_stock_fails(self):
+        self.assertEqual(self.Stock.try_decrement({self.first: 1, 999999: 1}), [999999])
+        self.assertEqual(self._quantities(), [5, 2])
+
+    def test_decrement_many_records_movements(self):
+        user = get_user_model().objects.create_user(username='estoque', password='x')
+
+        movements = self.Stock.decrement_many({self.first: 2, self.second: 2}, user=user, reference_id='ORDER-1')
+
+        self.assertEqual([(m.product_id, m.quantity, m.movement_type) for m in movements],
+                         [(self.first, 2, 'OUT'), (self.second, 2, 'OUT')])
+        with self.assertRaises(ValidationError):
+            self.Stock.decrement_many({self.first: 4}, user=user)
+        self.assertEqual(self._quantities(), [3, 0])
+
+    def test_decrement_many_is_a_single_update(self):
+        user = get_user_model().objects.create_user(username='estoque', password='x')
+        products = _create_stocks(*[10] * 50)
+        quantities = {product_id: 1 + index % 3 for index, product_id in enumerate(products)}
+        reserved = {products[0]: 1, products[1]: 5}
+        self.Stock.objects.filter(product_id__in=reserved).update(reserved=5)
+
+        # Um UPDATE para os 50 estoques e um INSERT das movimentações (mais 2 pares de savepoint)
+        with self.assertNumQueries(6):
+            self.Stock.decrement_many(quantities, user=user, reserved=reserved)
+
+        stocks = dict(self.Stock.objects.filter(product_id__in=products).values_list('product_id', 'quantity'))
+        self.assertEqual(stocks, {product_id: 10 - qty for product_id, qty in quantities.items()})
+        # products[0]: 1 baixado da reserva e 4 mantidos; products[1]: 2 baixados e a sobra (3) liberada
+        self.assertEqual(
+            list(self.Stock.objects.filter(product_id__in=products[:2]).order_by('product_id').values_list('reserved', flat=True)),
+            [4, 0],
+        )
+
+    def test_decrement_many_reports_each_failed_product(self):
+        user = get_user_model().objects.create_user(username='estoque', password='x')
+        self.Stock.objects.filter(product_id=self.first).update(reserved=2)
+
+        with self.assertRaises(ValidationError) as raised:
+            self.Stock.decrement_many({self.first: 5, self.second: 3, 999999: 1}, user=user, reserved={self.first: 1})
+
+        self.assertEqual(len(raised.exception.messages), 3)
+        self.assertIn("Disponível: 3, Necessário: 5", raised.exception.messages[0])
+        self.assertEqual(self._quantities(), [5, 2])
+        self.assertEqual(self.Stock.objects.get(product_id=self.first).reserved, 2)
+
+    def test_manual_adjustment(self):
+        user = get_user_model().objects.create_user(username='estoque', password='x')
+
+        self.assertEqual(self.Stock.adjust(self.first, -5, user).movement_type, 'ADJUSTMENT')
+        self.assertEqual(self.Stock.adjust(self.second, 3, user).movement_type, 'IN')
+        with self.assertRaises(ValidationError):
+            self.Stock.adjust(self.first, -1, user)
+        self.assertEqual(self._quantities(), [0, 5])
+
+
+@skipUnless(ORDERS_INSTALLED, "Apps de estoque e pedidos não instalados")
+class StockReservationTests(TestCase):
+    """Testa as reservas de estoque dos pedidos (`StockReservation`)."""
+
+    def setUp(self):
+        from apps.stock.models import Stock, StockReservation
+        self.Stock, self.StockReservation = Stock, StockReservation
+        self.first, self.second = _create_stocks(5, 2)
+        self.order = self._order({self.first: 3, self.second: 2})
+        self.user = get_user_model().objects.create_user(username='estoque', password='x')
+
+    def _order(self, quantities):
+        from apps.orders.models import Order, OrderItem
+        order = Order.objects.create()
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product_id=product_id, quantity=qty, historical_price=2)
+            for product_id, qty in quantities.items()
+        )
+        return order
+
+    def _stocks(self):
+        return list(self.Stock.objects.order_by('product_id').values_list('quantity', 'reserved', 'available'))
+
+    def test_reservation_holds_stock_without_decrementing(self):
+        self.StockReservation.reserve_order(self.order)
+
+        self.assertEqual(self._stocks(), [(5, 3, 2), (2, 2, 0)])
+        self.assertEqual(self.Stock.try_decrement({self.first: 3}), [self.first])
+        with self.assertRaises(ValidationError):
+            self.StockReservation.reserve_order(self._order({self.second: 1}))
+        self.assertEqual(list(self.Stock.objects.filter(available__gt=0).values_list('product_id', flat=True)),
+                         [self.first])
+
+    def test_reserving_a_large_order_takes_constant_queries(self):
+        products = _create_stocks(*[10] * 50)
+        order = self._order({product_id: 2 for product_id in products})
+
+        # Reservas ativas a liberar, itens, um UPDATE dos estoques e um INSERT das reservas (mais 3 pares de savepoint)
+        with self.assertNumQueries(10):
+            self.StockReservation.reserve_order(order)
+
+        self.assertEqual(set(self.Stock.objects.filter(product_id__in=products).values_list('reserved', flat=True)), {2})
+
+    def test_reserving_again_replaces_active_reservations(self):
+        self.StockReservation.reserve_order(self.order)
+        self.StockReservation.reserve_order(self.order)
+
+        self.assertEqual(self._stocks(), [(5, 3, 2), (2, 2, 0)])
+        self.assertEqual(self.order.reservations.filter(status='released').count(), 2)
+
+    def test_confirmation_consumes_reservations(self):
+        self.StockReservation.reserve_order(self.order)
+
+        reserved = self.StockReservation.consume_order(self.order)
+        self.Stock.decrement_many({self.first: 4, self.second: 2}, user=self.user, reserved=reserved)
+
+        self.assertEqual(self._stocks(), [(1, 0, 1), (0, 0, 0)])
+        self.assertEqual(self.order.reservations.filter(status='consumed').count(), 2)
+
+    def test_sweeper_releases_expired_reservations_in_batches(self):
+        self.StockReservation.reserve_order(self.order, ttl=0)
+        other = self._order({self.first: 1})
+        self.StockReservation.reserve_order(other)
+        self.StockReservation.objects.filter(order=self.order).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        out = StringIO()
+        call_command('release_expired_reservations', batch_size=1, stdout=out)
+
+        self.assertIn("2 reserva(s) vencida(s) liberada(s)", out.getvalue())
+        self.assertEqual(self._stocks(), [(5, 1, 4), (2, 0, 2)])
+        self.assertEqual(self.order.reservations.filter(status='expired').count(), 2)
+
+    def test_deleting_order_releases_reservations(self):
+        self.StockReservation.reserve_order(self.order)
+        self.order.delete()
+        self.assertEqual(self._stocks(), [(5, 0, 5), (2, 0, 2)])
+
+
+@skipUnless(STOCK_INSTALLED, "App de estoque não instalado")
+class StockSnapshotTests(TestCase):
+    """Testa as fotografias de saldo (`StockSnapshot`) e o saldo em uma data."""
+
+    def setUp(self):
+        from apps.stock.models import StockMovement, StockSnapshot
+        self.StockMovement, self.StockSnapshot = StockMovement, StockSnapshot
+        self.first, self.second = _create_stocks(0, 0)
+        self.user = get_user_model().objects.create_user(username='estoque', password='x')
+        self.day = timezone.make_aware(datetime(2024, 3, 1))
+        # (dia, produto, tipo, quantidade, cancelada)
+        for day, product_id, movement_type, quantity, cancelled in (
+            (0, self.first, 'IN', 10, False),
+            (0, self.first, 'OUT', 3, False),
+            (1, self.first, 'OUT', 4, True),
+            (1, self.second, 'IN', 5, False),
+            (2, self.first, 'RETURN', 1, False),
+            (2, self.first, 'ADJUSTMENT', 2, False),
+            (4, self.second, 'OUT', 1, False),
+        ):
+            self._move(day, product_id, movement_type, quantity, cancelled)
+
+    def _move(self, day, product_id, movement_type, quantity, cancelled=False):
+        movement = self.StockMovement.objects.create(
+            product_id=product_id, movement_type=movement_type, quantity=quantity,
+            user=self.user, is_cancelled=cancelled,
+        )
+        created_at = self.day + timedelta(days=day, hours=12)
+        self.StockMovement.objects.filter(pk=movement.pk).update(created_at=created_at)
+
+    def _at(self, day):
+        return self.day + timedelta(days=day)
+
+    def test_build_aggregates_closed_periods(self):
+        created = self.StockSnapshot.build(until=self._at(3) + timedelta(hours=5))
+
+        self.assertEqual(created, 3)
+        snapshots = self.StockSnapshot.objects.order_by('product_id', 'period_end')
+        self.assertEqual(
+            [(s.product_id, s.period_end, s.quantity) for s in snapshots],
+            [(self.first, self._at(1), 7), (self.first, self._at(3), 6), (self.second, self._at(2), 5)],
+        )
+
+    def test_incremental_build_continues_from_last_snapshot(self):
+        self.StockSnapshot.build(until=self._at(2))
+        self.assertEqual(self.StockSnapshot.build(until=self._at(5)), 2)
+        self.assertEqual(self.StockSnapshot.build(until=self._at(5)), 0)
+
+        latest = self.StockSnapshot.objects.filter(product_id=self.second).order_by('-period_end').first()
+        self.assertEqual((latest.period_end, latest.quantity), (self._at(5), 4))
+
+    def test_quantity_at_reads_snapshot_plus_delta(self):
+        self.StockSnapshot.build(until=self._at(2))
+
+        for day in (0, 1, 2, 3, 6):
+            for product_id in (self.first, self.second):
+                expected = sum(
+                    quantity if movement_type in self.StockMovement.INBOUND_TYPES else -quantity
+                    for movement_type, quantity in self.StockMovement.objects.filter(
+                        product_id=product_id, is_cancelled=False, created_at__lt=self._at(day)
+                    ).values_list('movement_type', 'quantity')
+                )
+                with self.assertNumQueries(2):
+                    self.assertEqual(self.StockSnapshot.quantity_at(product_id, self._at(day)), expected)
+
+    def _snapshots(self):
+        return list(self.StockSnapshot.objects.order_by('product_id', 'period_end').values_list(
+            'product_id', 'period_end', 'quantity'))
+
+    def test_cancelling_movement_corrects_later_snapshots(self):
+        self.StockSnapshot.build(until=self._at(5))
+        movement = self.StockMovement.objects.get(product_id=self.first, movement_type='IN')
+
+        movement.is_cancelled = True
+        movement.save()
+
+        corrected = self._snapshots()
+        self.assertEqual(
+            [quantity for product_id, _, quantity in corrected if product_id == self.first], [-3, -4]
+        )
+        self.assertEqual(self.StockSnapshot.quantity_at(self.first, self._at(6)), -4)
+        self.StockSnapshot.build(until=self._at(5), rebuild=True)
+        self.assertEqual(self._snapshots(), corrected)
+
+        movement.is_cancelled = False
+        movement.save(update_fields=['is_cancelled'])
+        self.assertEqual(self.StockSnapshot.quantity_at(self.first, self._at(6)), 6)
+
+    def test_concurrent_cancellations_shift_snapshots_once(self):
+        self.StockSnapshot.build(until=self._at(5))
+        mine = self.StockMovement.objects.get(product_id=self.first, movement_type='IN')
+        theirs = self.StockMovement.objects.get(pk=mine.pk)
+
+        def cancel_theirs_first(sender, instance, **kwargs):
+            # Outra requisição cancela a mesma movimentação durante o nosso save
+            if instance is mine:
+                pre_save.disconnect(cancel_theirs_first, sender=self.StockMovement)
+                theirs.is_cancelled = True
+                theirs.save()
+
+        pre_save.connect(cancel_theirs_first, sender=self.StockMovement)
+        self.addCleanup(pre_save.disconnect, cancel_theirs_first, sender=self.StockMovement)
+        mine.is_cancelled = True
+        mine.save()
+
+        self.assertEqual(self.StockSnapshot.quantity_at(self.first, self._at(6)), -4)
+
+    def test_bulk_cancellation_requires_rebuild(self):
+        self.StockSnapshot.build(until=self._at(5))
+        self.StockMovement.objects.filter(product_id=self.second, movement_type='IN').update(is_cancelled=True)
+        self.assertEqual(self.StockSnapshot.quantity_at(self.second, self._at(6)), 4)
+
+        call_command('build_stock_snapshots', rebuild=True, stdout=StringIO())
+
+        self.assertEqual(self.StockSnapshot.quantity_at(self.second, self._at(6)), -1)
+
+    def test_command_with_monthly_period(self):
+        out = StringIO()
+        call_command('build_stock_snapshots', period='month', stdout=out)
+
+        self.assertIn("2 fotografia(s) de estoque criada(s)", out.getvalue())
+        self.assertEqual(
+            set(self.StockSnapshot.objects.values_list('period_end', 'quantity')),
+            {(timezone.make_aware(datetime(2024, 4, 1)), 6),
+             (timezone.make_aware(datetime(2024, 4, 1)), 4)},
+        )
+
+
+@skipUnless(STOCK_INSTALLED, "App de estoque não instalado")
+class ReconcileStockTests(TestCase):
+    """Testa a conferência do estoque com as movimentações (`manage.py reconcile_stock`)."""
+
+    def setUp(self):
+        from apps.stock.models import Stock, StockMovement
+        self.Stock = Stock
+        self.ok, self.drifted, self.reserved, self.orphan = _create_stocks(7, 9, 5, 0)
+        Stock.objects.filter(product_id=self.reserved).update(reserved=4)
+        Stock.objects.filter(product_id=self.orphan).delete()
+        user = get_user_model().objects.create_user(username='estoque', password='x')
+        StockMovement.objects.bulk_create(
+            StockMovement(product_id=product_id, movement_type=movement_type, quantity=quantity,
+                          user=user, is_cancelled=cancelled)
+            for product_id, movement_type, quantity, cancelled in (
+                (self.ok, 'IN', 10, False),
+                (self.ok, 'OUT', 3, False),
+                (self.drifted, 'IN', 10, False),
+                (self.drifted, 'OUT', 4, False),
+                (self.drifted, 'OUT', 5, True),
+                (self.reserved, 'IN', 3, False),
+                (self.orphan, 'RETURN', 2, False),
+            )
+        )
+
+    def _reconcile(self, **options):
+        out = StringIO()
+        call_command('reconcile_stock', batch_size=1, stdout=out, **options)
+        return out.getvalue()
+
+    def _quantities(self):
+        return dict(self.Stock.objects.values_list('product_id', 'quantity'))
+
+    def test_reports_drift_without_changing_stock(self):
+        from apps.stock.reconciliation import iter_drift
+
+        drifts = [(d.product_id, d.quantity, d.ledger) for d in iter_drift(chunk_size=2)]
+        self.assertEqual(drifts, [(self.drifted, 9, 6), (self.reserved, 5, 3), (self.orphan, None, 2)])
+
+        output = self._reconcile()
+        self.assertIn(f"Produto #{self.drifted}: estoque 9, saldo das movimentações 6 (diferença +3)", output)
+        self.assertIn("3/3 estoque(s) conferido(s)", output)
+        self.assertIn("3 diferença(s) encontrada(s), 1 produto(s) com movimentações sem registro de estoque", output)
+        self.assertEqual(self._quantities()[self.drifted], 9)
+
+    def test_dry_run_does_not_write(self):
+        output = self._reconcile(fix=True, dry_run=True)
+
+        self.assertIn("1 estoque(s) seriam corrigido(s), 1 ignorado(s)", output)
+        self.assertEqual(self._quantities()[self.drifted], 9)
+
+    def test_fix_sets_stock_to_ledger_except_below_reserved(self):
+        output = self._reconcile(fix=True)
+
+        self.assertIn("1 estoque(s) corrigido(s), 1 ignorado(s)", output)
+        self.assertEqual(self._quantities(), {self.ok: 7, self.drifted: 6, self.reserved: 5})
+        # Restam apenas o estoque com reserva maior que o saldo e o produto sem estoque
+        self.assertIn("2 diferença(s) encontrada(s)", self._reconcile())
+
+
+@skipUnless(STOCK_INSTALLED, "App de estoque não instalado")
+class StockConcurrencyStressTests(TransactionTestCase):
+    """
+    Vários processos disputando o mesmo estoque não podem vender mais do que existe.
+    Roda em qualquer banco compartilhável entre processos (PostgreSQL, SQLite em arquivo).
+    """
+
+    PROCESSES = 8
+    INITIAL_QUANTITY = 200
+
+    def setUp(self):
+        # Verificado aqui, e não em um decorador: o banco de testes só existe após a importação do módulo
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("Processos filhos não compartilham um banco SQLite em memória")
+
+    def test_concurrent_buyers_never_oversell(self):
+        from apps.stock.models import Stock
+
+        (product_id,) = _create_stocks(self.INITIAL_QUANTITY)
+        connections.close_all()  # Cada processo abre a sua própria conexão
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        workers = [
+            context.Process(target=_buy_until_sold_out, args=(product_id, results))
+            for _ in range(self.PROCESSES)
+        ]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join(timeout=60)
+
+        self.assertEqual([error for _, error in outcomes if error], [])
+        self.assertEqual(sum(sold for sold, _ in outcomes), self.INITIAL_QUANTITY)
+        self.assertEqual(Stock.objects.get(product_id=product_id).quantity, 0)
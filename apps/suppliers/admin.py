@@ -1,6 +1,7 @@
 # apps/suppliers/admin.py
 from django.contrib import admin
 from django.utils.html import format_html
+from apps.addresses.models import prefetch_primary_address
 from .models import Supplier
 
 @admin.register(Supplier)
@@ -142,6 +143,10 @@ class SupplierAdmin(admin.ModelAdmin):
             return ", ".join(filter(None, parts)) or "-"
         return "-"
     address_short_display.short_description = "Localização"
+
+    def get_queryset(self, request):
+        # Endereço pré-carregado para address_short_display/address_display (sem uma consulta por linha)
+        return super().get_queryset(request).prefetch_related(prefetch_primary_address())
     
     def has_add_permission(self, request):
         return False # Mantém desabilitada a criação
@@ -8,6 +8,7 @@ from django.http import HttpResponseRedirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 
+from apps.addresses.models import prefetch_primary_address
 from .models import Supplier
 from .forms import SupplierForm
 import logging
@@ -48,7 +49,7 @@ class SupplierListView(LoginRequiredMixin, ListView):
             
             queryset = queryset.filter(query_conditions)
         
-        return queryset.prefetch_related('addresses')
+        return queryset.prefetch_related(prefetch_primary_address())
 
     def get_context_data(self, **kwargs):
         """Adiciona parâmetros de busca e filtro ao contexto."""
@@ -0,0 +1,29 @@
+from django.contrib import admin
+from .models import EnrichmentJob, LookupCacheEntry
+
+
+@admin.register(LookupCacheEntry)
+class LookupCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("kind", "key", "found", "expires_at", "updated_at")
+    list_filter = ("kind", "found")
+    search_fields = ("key",)
+    readonly_fields = ("kind", "key", "data", "found", "expires_at", "created_at", "updated_at")
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(EnrichmentJob)
+class EnrichmentJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "content_type", "object_id", "tax_id", "status", "attempts", "available_at", "finished_at")
+    list_filter = ("status", "content_type")
+    search_fields = ("tax_id",)
+    readonly_fields = (
+        "content_type", "object_id", "tax_id", "update_address", "attempts",
+        "last_error", "created_at", "updated_at", "finished_at",
+    )
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
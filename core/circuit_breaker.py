@@ -0,0 +1,128 @@
+## Circuit breaker por provedor externo, com estado compartilhado via cache do Django.
+import hashlib
+import logging
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30  # segundos
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de um provedor, identificado pelo template da sua URL.
+
+    - Fechado: as requisições passam normalmente. Cada falha consecutiva
+      (timeout, erro de conexão, 5xx, resposta ilegível) incrementa um contador;
+      qualquer sucesso o zera.
+    - Aberto: após `LOOKUP_BREAKER_FAILURE_THRESHOLD` falhas consecutivas, o
+      provedor é ignorado por `LOOKUP_BREAKER_RESET_TIMEOUT` segundos.
+    - Meio-aberto: terminado o intervalo, apenas uma requisição de teste é
+      liberada (entre todos os processos). Se ela tiver sucesso o circuito
+      fecha; se falhar, ele volta a abrir por mais um intervalo.
+
+    O estado fica no cache padrão do Django, de modo que é compartilhado entre
+    os processos quando o cache configurado também é (Redis, Memcached, banco).
+    As transições de abertura e fechamento são registradas no log junto com
+    contadores acumulados.
+    """
+
+    def __init__(
+        self,
+        url_template: str,
+        failure_threshold: int | None = None,
+        reset_timeout: float | None = None,
+        name: str | None = None,
+    ):
+        self.url_template = url_template
+        self.name = name or urlsplit(url_template).netloc or url_template
+        self.failure_threshold = failure_threshold or int(
+            getattr(settings, "LOOKUP_BREAKER_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)
+        )
+        self.reset_timeout = reset_timeout or float(
+            getattr(settings, "LOOKUP_BREAKER_RESET_TIMEOUT", DEFAULT_RESET_TIMEOUT)
+        )
+        digest = hashlib.md5(url_template.encode()).hexdigest()[:16]
+        self._key_prefix = f"lookup_breaker:{digest}"
+
+    @property
+    def state(self) -> str:
+        """Estado atual do circuito: "closed", "open" ou "half_open"."""
+        open_until = cache.get(self._key("open_until"))
+        if open_until is None:
+            return CLOSED
+        return OPEN if time.time() < open_until else HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """
+        Indica se uma requisição ao provedor pode ser feita agora.
+
+        No estado meio-aberto, retorna True apenas para o primeiro processo que
+        reservar a requisição de teste.
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            return cache.add(self._key("probe"), True, timeout=self.reset_timeout)
+        return False
+
+    def record_success(self):
+        """Registra uma resposta saudável, fechando o circuito se necessário."""
+        was_open = cache.get(self._key("open_until")) is not None
+        cache.delete_many([self._key("failures"), self._key("open_until"), self._key("probe")])
+        if was_open:
+            closed_count = self._incr("closed_count")
+            logger.warning(
+                f"Circuit breaker de {self.name} FECHADO: provedor voltou a responder "
+                f"(fechamentos: {closed_count})."
+            )
+
+    def record_failure(self):
+        """Registra uma falha, abrindo (ou reabrindo) o circuito ao atingir o limite."""
+        if self.state == HALF_OPEN:
+            self._open(reason="falha na requisição de teste")
+            return
+        failures = self._incr("failures")
+        if failures >= self.failure_threshold and cache.get(self._key("open_until")) is None:
+            self._open(reason=f"{failures} falhas consecutivas")
+
+    def _open(self, reason: str):
+        cache.set(self._key("open_until"), time.time() + self.reset_timeout, timeout=None)
+        cache.delete_many([self._key("failures"), self._key("probe")])
+        opened_count = self._incr("opened_count")
+        logger.warning(
+            f"Circuit breaker de {self.name} ABERTO por {self.reset_timeout:g}s: {reason} "
+            f"(aberturas: {opened_count})."
+        )
+
+    def stats(self) -> dict:
+        """Retorna o estado e os contadores acumulados deste circuito."""
+        return {
+            "state": self.state,
+            "failures": cache.get(self._key("failures"), 0),
+            "opened_count": cache.get(self._key("opened_count"), 0),
+            "closed_count": cache.get(self._key("closed_count"), 0),
+        }
+
+    def _key(self, suffix: str) -> str:
+        return f"{self._key_prefix}:{suffix}"
+
+    def _incr(self, suffix: str) -> int:
+        key = self._key(suffix)
+        cache.add(key, 0, timeout=None)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # A chave expirou/foi removida entre o add() e o incr().
+            cache.set(key, 1, timeout=None)
+            return 1
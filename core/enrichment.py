@@ -0,0 +1,141 @@
+## Fila de enriquecimento cadastral por CNPJ, processada fora do ciclo de salvamento.
+import logging
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from core import jobs
+from core.lookup_cache import lookup_cache
+from core.models import EnrichmentJob
+from core.services import fetch_company_data
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 60  # segundos
+DEFAULT_STALE_AFTER = 60 * 10  # segundos
+
+# Enviado por `apply_company_data` (Cliente, Fornecedor) ao gravar os dados da API com
+# `update()`, que não dispara `post_save`. Argumentos: sender (modelo), instance, fields.
+company_data_applied = Signal()
+
+
+def is_enrichment_deferred(defer_enrichment: bool | None = None) -> bool:
+    """
+    Indica se o enriquecimento por CNPJ deve ser feito em segundo plano.
+
+    Args:
+        defer_enrichment: Valor explícito passado ao `save()`. Se None, usa
+                          `COMPANY_ENRICHMENT_MODE` ("sync" ou "deferred").
+    """
+    if defer_enrichment is not None:
+        return defer_enrichment
+    return getattr(settings, "COMPANY_ENRICHMENT_MODE", "sync") == "deferred"
+
+
+def enqueue_enrichment(
+    instance, tax_id: str, update_address: bool = True, refresh: bool = False
+) -> EnrichmentJob:
+    """
+    Enfileira o enriquecimento de um Cliente/Fornecedor já salvo.
+
+    Se já houver uma tarefa pendente para o mesmo registro, ela é reaproveitada
+    (com o CNPJ e a opção de endereço atualizados) em vez de criar outra.
+    Com `refresh=True`, o CNPJ é removido do cache de consultas para que a
+    tarefa consulte as APIs novamente.
+    """
+    if refresh:
+        lookup_cache.delete("cnpj", tax_id)
+    content_type = ContentType.objects.get_for_model(instance)
+    job = EnrichmentJob.objects.filter(
+        content_type=content_type, object_id=instance.pk, status="pending"
+    ).first()
+    if job:
+        job.tax_id = tax_id
+        job.update_address = update_address
+        job.attempts = 0
+        job.available_at = timezone.now()
+        job.save(update_fields=["tax_id", "update_address", "attempts", "available_at", "updated_at"])
+    else:
+        job = EnrichmentJob.objects.create(
+            content_type=content_type,
+            object_id=instance.pk,
+            tax_id=tax_id,
+            update_address=update_address,
+        )
+    logger.info(f"Enriquecimento do CNPJ {tax_id} enfileirado para {content_type.model} ID {instance.pk}.")
+    return job
+
+
+def claim_jobs(limit: int = 20) -> list[EnrichmentJob]:
+    """
+    Reserva até `limit` tarefas disponíveis, marcando-as como "em execução".
+
+    Tarefas "em execução" há mais de `ENRICHMENT_STALE_AFTER` segundos (worker
+    interrompido) voltam a ser elegíveis (ver `core.jobs.claim`).
+    """
+    stale_after = int(getattr(settings, "ENRICHMENT_STALE_AFTER", DEFAULT_STALE_AFTER))
+    return jobs.claim(
+        EnrichmentJob.objects.all(),
+        Q(status="pending", available_at__lte=timezone.now()),
+        order_by=("available_at", "id"),
+        limit=limit,
+        stale_after=stale_after,
+    )
+
+
+def run_job(job: EnrichmentJob) -> bool:
+    """
+    Executa uma tarefa: consulta o CNPJ e aplica os dados ao registro.
+
+    Falhas temporárias (APIs indisponíveis, erros inesperados) são reagendadas
+    com espera exponencial até `ENRICHMENT_MAX_ATTEMPTS` tentativas. CNPJs que
+    as APIs informam como inexistentes, registros removidos e erros de
+    validação marcam a tarefa como falha definitiva.
+
+    Returns:
+        True se a tarefa foi concluída com sucesso.
+    """
+    job.attempts += 1
+    target = job.content_object
+    if target is None:
+        return _finish(job, "failed", "Registro não encontrado (removido após o enfileiramento).")
+
+    try:
+        company_data = fetch_company_data(job.tax_id)
+        if company_data is None:
+            if lookup_cache.get("cnpj", job.tax_id) is None:
+                return _finish(job, "failed", "CNPJ não encontrado nas APIs.")
+            return _retry(job, "Nenhuma API de CNPJ retornou dados.")
+        target.apply_company_data(company_data, update_address=job.update_address)
+    except ValidationError as e:
+        return _finish(job, "failed", f"Erro de validação: {e}")
+    except Exception as e:
+        logger.exception(f"Erro inesperado ao processar a tarefa de enriquecimento {job.pk}.")
+        return _retry(job, f"Erro inesperado: {e}")
+
+    return _finish(job, "done")
+
+
+def _retry(job: EnrichmentJob, error: str) -> bool:
+    max_attempts = int(getattr(settings, "ENRICHMENT_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+    retry_delay = int(getattr(settings, "ENRICHMENT_RETRY_DELAY", DEFAULT_RETRY_DELAY))
+    jobs.retry(job, error, max_attempts, retry_delay, error_field="last_error")
+    if job.status == "failed":
+        logger.error(f"Tarefa de enriquecimento {job.pk} falhou (CNPJ {job.tax_id}): {job.last_error}")
+    else:
+        logger.warning(f"Tarefa de enriquecimento {job.pk} reagendada para {job.available_at}: {error}")
+    return False
+
+
+def _finish(job: EnrichmentJob, status: str, error: str = "") -> bool:
+    jobs.finish(job, status, error, error_field="last_error", update_fields=("attempts",))
+    if status == "done":
+        logger.info(f"Tarefa de enriquecimento {job.pk} concluída (CNPJ {job.tax_id}).")
+    else:
+        logger.error(f"Tarefa de enriquecimento {job.pk} falhou (CNPJ {job.tax_id}): {error}")
+    return status == "done"
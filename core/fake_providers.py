@@ -0,0 +1,281 @@
+## Servidor HTTP local que imita as APIs de CEP/CNPJ, para testes de regressão e de carga.
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Dados devolvidos para chaves específicas; as demais são sintetizadas (ou "não encontradas").
+DEFAULT_FIXTURES = {
+    "cep": {
+        "01001000": {"street": "Praça da Sé", "neighborhood": "Sé", "city": "São Paulo", "state": "SP"},
+        "20040002": {"street": "Rua da Assembleia", "neighborhood": "Centro", "city": "Rio de Janeiro", "state": "RJ"},
+    },
+    "cnpj": {
+        "20612379000106": {
+            "full_name": "EMPRESA FICTICIA LTDA",
+            "preferred_name": "FICTICIA",
+            "zip_code": "01001000",
+            "street": "PRACA DA SE",
+            "number": "100",
+            "neighborhood": "SE",
+            "city": "SAO PAULO",
+            "state": "SP",
+            "state_registration": "110042490114",
+        },
+    },
+    # Chaves sempre respondidas como "não encontrado"
+    "not_found": ["99999999", "00000000000000"],
+}
+
+SYNTHETIC_CITIES = [
+    ("São Paulo", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"),
+    ("Curitiba", "PR"), ("Porto Alegre", "RS"), ("Salvador", "BA"), ("Recife", "PE"),
+]
+
+ROUTES = [
+    ("viacep.com.br", re.compile(r"^/viacep\.com\.br/ws/(\d{8})/json/?$"), "cep"),
+    ("brasilapi.com.br", re.compile(r"^/brasilapi\.com\.br/api/cep/v1/(\d{8})/?$"), "cep"),
+    ("open.cnpja.com", re.compile(r"^/open\.cnpja\.com/office/(\d{14})/?$"), "cnpj"),
+    ("publica.cnpj.ws", re.compile(r"^/publica\.cnpj\.ws/cnpj/(\d{14})/?$"), "cnpj"),
+]
+
+
+class FakeProviderConfig:
+    """
+    Comportamento do servidor falso.
+
+    Latências em segundos; taxas entre 0 e 1. Os dicionários `provider_*`
+    sobrescrevem os valores globais por provedor (ex: {"viacep.com.br": 1.0}).
+    Uma requisição "travada" (`hang_rate`) espera `hang_seconds` antes de
+    responder, simulando um timeout do lado do cliente.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+        synthesize: bool = True,
+        fixtures: dict | None = None,
+        provider_latency: dict | None = None,
+        provider_error_rate: dict | None = None,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.synthesize = synthesize
+        self.fixtures = fixtures if fixtures is not None else DEFAULT_FIXTURES
+        self.provider_latency = provider_latency or {}
+        self.provider_error_rate = provider_error_rate or {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_counts = {}
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clientes que desistem por timeout fecham a conexão no meio da resposta.
+        pass
+
+
+class FakeProviderServer:
+    """
+    Servidor com as rotas dos provedores prefixadas pelo host original.
+
+    Exemplo: "GET /viacep.com.br/ws/01001000/json/" responde no formato do
+    ViaCEP. Use junto com `LOOKUP_PROVIDER_BASE_URL = server.url` para que
+    `core.services` consulte este servidor em vez das APIs reais.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: FakeProviderConfig | None = None):
+        self.config = config or FakeProviderConfig()
+        self.httpd = _QuietHTTPServer((host, port), _handler_for(self.config))
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_counts(self) -> dict:
+        """Quantidade de requisições recebidas por provedor."""
+        with self.config.lock:
+            return dict(self.config.request_counts)
+
+    def start(self):
+        """Inicia o servidor em uma thread de segundo plano."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-providers", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def _handler_for(config: FakeProviderConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Mantém a conexão aberta (keep-alive)
+
+        def do_GET(self):
+            for provider, pattern, kind in ROUTES:
+                match = pattern.match(self.path)
+                if match:
+                    self._respond(provider, kind, match.group(1))
+                    return
+            self._send(404, {"error": "rota desconhecida"})
+
+        def _respond(self, provider, kind, key):
+            with config.lock:
+                config.request_counts[provider] = config.request_counts.get(provider, 0) + 1
+                roll = config.random.random()
+                jitter = config.random.uniform(0, config.jitter) if config.jitter else 0
+
+            error_rate = config.provider_error_rate.get(provider, config.error_rate)
+            if roll < config.hang_rate:
+                time.sleep(config.hang_seconds)
+            time.sleep(config.provider_latency.get(provider, config.latency) + jitter)
+
+            if config.hang_rate <= roll < config.hang_rate + error_rate:
+                self._send(503, {"error": "serviço indisponível (simulado)"})
+                return
+
+            record = _lookup(config, kind, key)
+            status, payload = RENDERERS[provider](key, record)
+            self._send(status, payload)
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"Provedor falso: {format % args}")
+
+    return Handler
+
+
+def _lookup(config: FakeProviderConfig, kind: str, key: str) -> dict | None:
+    fixtures = config.fixtures
+    if key in fixtures.get("not_found", []):
+        return None
+    if key in fixtures.get(kind, {}):
+        return fixtures[kind][key]
+    if not config.synthesize:
+        return None
+    city, state = SYNTHETIC_CITIES[int(key) % len(SYNTHETIC_CITIES)]
+    if kind == "cep":
+        return {"street": f"Rua Sintética {key[-3:]}", "neighborhood": "Centro", "city": city, "state": state}
+    return {
+        "full_name": f"EMPRESA SINTETICA {key[:8]} LTDA",
+        "preferred_name": f"SINTETICA {key[:8]}",
+        "zip_code": "01001000",
+        "street": f"RUA SINTETICA {key[-3:]}",
+        "number": str(int(key[-4:]) % 1000 or 1),
+        "neighborhood": "CENTRO",
+        "city": city.upper(),
+        "state": state,
+        "state_registration": "",
+    }
+
+
+def _render_viacep(key, record):
+    if record is None:
+        return 200, {"erro": True}
+    return 200, {
+        "cep": f"{key[:5]}-{key[5:]}",
+        "logradouro": record["street"],
+        "complemento": "",
+        "bairro": record["neighborhood"],
+        "localidade": record["city"],
+        "uf": record["state"],
+    }
+
+
+def _render_brasilapi(key, record):
+    if record is None:
+        return 404, {"name": "CepPromiseError", "message": "Todos os serviços de CEP retornaram erro."}
+    return 200, {
+        "cep": key,
+        "state": record["state"],
+        "city": record["city"],
+        "neighborhood": record["neighborhood"],
+        "street": record["street"],
+        "service": "fake",
+    }
+
+
+def _render_cnpja(key, record):
+    if record is None:
+        return 404, {"code": 404, "message": "Not Found"}
+    registrations = []
+    if record.get("state_registration"):
+        registrations.append(
+            {"number": record["state_registration"], "enabled": True, "type": {"text": "IE Normal"}}
+        )
+    return 200, {
+        "taxId": key,
+        "alias": record["preferred_name"],
+        "company": {"name": record["full_name"]},
+        "address": {
+            "zip": record["zip_code"],
+            "street": record["street"],
+            "number": record["number"],
+            "district": record["neighborhood"],
+            "city": record["city"],
+            "state": record["state"],
+        },
+        "registrations": registrations,
+    }
+
+
+def _render_cnpjws(key, record):
+    if record is None:
+        return 404, {"status": 404, "titulo": "Não Encontrado", "detalhes": "CNPJ inválido"}
+    state_registrations = []
+    if record.get("state_registration"):
+        state_registrations.append({"inscricao_estadual": record["state_registration"], "ativo": True})
+    return 200, {
+        "razao_social": record["full_name"],
+        "estabelecimento": {
+            "cnpj": key,
+            "nome_fantasia": record["preferred_name"],
+            "tipo_logradouro": "",
+            "logradouro": record["street"],
+            "numero": record["number"],
+            "bairro": record["neighborhood"],
+            "cep": record["zip_code"],
+            "cidade": {"nome": record["city"]},
+            "estado": {"sigla": record["state"]},
+            "inscricoes_estaduais": state_registrations,
+        },
+    }
+
+
+RENDERERS = {
+    "viacep.com.br": _render_viacep,
+    "brasilapi.com.br": _render_brasilapi,
+    "open.cnpja.com": _render_cnpja,
+    "publica.cnpj.ws": _render_cnpjws,
+}
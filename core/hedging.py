@@ -0,0 +1,103 @@
+## Execução "hedged" de consultas redundantes: a primeira resposta válida vence.
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Retorna o pool de threads compartilhado das consultas, criando-o no primeiro uso."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, "LOOKUP_HEDGE_MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+                    thread_name_prefix="lookup",
+                )
+    return _executor
+
+
+def first_successful(tasks, is_success, hedge_delay: float | None = None, executor=None):
+    """
+    Executa tarefas redundantes em ordem de prioridade e retorna o primeiro sucesso.
+
+    O comportamento depende de `hedge_delay`:
+    - None: modo sequencial. As tarefas rodam na thread atual, uma após a outra.
+    - 0: modo paralelo. Todas as tarefas são disparadas ao mesmo tempo.
+    - > 0: modo "hedged". A próxima tarefa é disparada se as que estão em
+      andamento não responderem dentro de `hedge_delay` segundos, ou
+      imediatamente quando uma delas termina sem sucesso.
+
+    Quando uma tarefa vence, as que ainda não começaram são canceladas e as que
+    já estão em andamento são abandonadas (seu resultado é descartado; elas
+    terminam em segundo plano, limitadas pelos próprios timeouts).
+
+    Args:
+        tasks: Lista de callables sem argumentos, em ordem de prioridade.
+               Não devem levantar exceções; falhas devem virar resultados.
+        is_success: Função que recebe um resultado e indica se ele é válido.
+        hedge_delay: Atraso (segundos) antes de disparar a próxima tarefa.
+        executor: Pool de threads a usar (padrão: `get_executor()`).
+
+    Returns:
+        Uma tupla (vencedor, resultados). `vencedor` é o primeiro resultado
+        válido ou None; `resultados` contém todos os resultados recebidos até
+        o retorno, em ordem de chegada.
+    """
+    results = []
+    if hedge_delay is None:
+        for task in tasks:
+            result = task()
+            results.append(result)
+            if is_success(result):
+                return result, results
+        return None, results
+
+    executor = executor or get_executor()
+    remaining = list(tasks)
+    pending = set()
+
+    def launch_next():
+        pending.add(executor.submit(_run_task, remaining.pop(0)))
+
+    launch_next()
+    while remaining and hedge_delay == 0:
+        launch_next()
+
+    while pending:
+        done, _ = wait(pending, timeout=hedge_delay if remaining else None, return_when=FIRST_COMPLETED)
+        if not done:
+            # Nenhuma resposta dentro do atraso: dispara a próxima tarefa em paralelo.
+            launch_next()
+            continue
+
+        for future in done:
+            pending.discard(future)
+            result = future.result()
+            results.append(result)
+            if is_success(result):
+                for loser in pending:
+                    loser.cancel()
+                return result, results
+            if remaining:
+                launch_next()
+
+    return None, results
+
+
+def _run_task(task):
+    """Executa uma tarefa no pool, liberando conexões de banco abertas pela thread."""
+    try:
+        return task()
+    finally:
+        connections.close_all()
@@ -0,0 +1,146 @@
+## Mecânica comum das filas de tarefas gravadas no banco (enriquecimento por CNPJ, relatórios em segundo plano).
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def claim(queryset, ready: Q, order_by: tuple, limit: int, stale_after: int, **claimed) -> list:
+    """
+    Reserva até `limit` tarefas de `queryset`, marcando-as como "em execução".
+
+    São elegíveis as tarefas que atendem a `ready` e as "em execução" sem
+    atualização há mais de `stale_after` segundos (worker interrompido). Em
+    bancos com suporte, as linhas são bloqueadas com SKIP LOCKED, permitindo
+    vários workers em paralelo.
+
+    Args:
+        claimed: Campos gravados junto com a situação (ex.: progresso zerado).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            queryset.select_for_update(skip_locked=True)
+            .filter(ready | Q(status="running", updated_at__lt=now - timedelta(seconds=stale_after)))
+            .order_by(*order_by)[:limit]
+        )
+        queryset.filter(pk__in=[job.pk for job in jobs]).update(status="running", updated_at=now, **claimed)
+    for job in jobs:
+        job.status = "running"
+        for field, value in claimed.items():
+            setattr(job, field, value)
+    return jobs
+
+
+def finish(job, status: str, error: str = "", error_field: str = "error", update_fields: tuple = ()) -> bool:
+    """
+    Encerra a tarefa com a situação `status` ("done" ou "failed"), gravando o
+    erro em `error_field`, `finished_at` e os campos extras de `update_fields`.
+
+    Returns:
+        True se a tarefa foi concluída com sucesso.
+    """
+    job.status = status
+    setattr(job, error_field, error)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", error_field, "finished_at", "updated_at", *update_fields])
+    return status == "done"
+
+
+def retry(job, error: str, max_attempts: int, retry_delay: int, error_field: str = "error") -> bool:
+    """
+    Devolve a tarefa à fila com espera exponencial (`retry_delay * 2 ** (tentativas - 1)`
+    segundos a partir de agora), ou a marca como falha após `max_attempts` tentativas.
+
+    Returns:
+        False (a tarefa não foi concluída).
+    """
+    if job.attempts >= max_attempts:
+        return finish(
+            job, "failed", f"{error} Limite de {max_attempts} tentativas atingido.",
+            error_field=error_field, update_fields=("attempts",),
+        )
+
+    job.status = "pending"
+    setattr(job, error_field, error)
+    job.available_at = timezone.now() + timedelta(seconds=retry_delay * 2 ** (job.attempts - 1))
+    job.save(update_fields=["status", "attempts", error_field, "available_at", "updated_at"])
+    return False
+
+
+class JobQueueCommand(BaseCommand):
+    """
+    Base dos comandos que processam uma fila de tarefas (`--once`, `--batch-size`,
+    `--sleep` e `--status`). As subclasses definem o modelo, a reserva e a
+    execução das tarefas e as mensagens exibidas.
+    """
+
+    model = None
+    batch_size = 20
+    sleep = 5
+    empty_message = "Fila vazia."
+    summary = "{processed} tarefa(s) processada(s), {succeeded} concluída(s)."
+
+    def claim_jobs(self, limit: int) -> list:
+        raise NotImplementedError
+
+    def run_job(self, job) -> bool:
+        raise NotImplementedError
+
+    def describe(self, job, succeeded: bool) -> str:
+        raise NotImplementedError
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa as tarefas disponíveis e encerra (padrão: executa continuamente).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=self.batch_size,
+            help=f"Quantidade de tarefas reservadas por vez (padrão: {self.batch_size}).",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=self.sleep,
+            help=f"Espera, em segundos, quando a fila está vazia (padrão: {self.sleep}).",
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Apenas exibe a quantidade de tarefas por situação.",
+        )
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            self._write_status()
+            return
+
+        processed = succeeded = 0
+        while True:
+            jobs = self.claim_jobs(options["batch_size"])
+            for job in jobs:
+                processed += 1
+                done = self.run_job(job)
+                succeeded += done
+                self.stdout.write(self.describe(job, done))
+            if not jobs:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(self.summary.format(processed=processed, succeeded=succeeded)))
+
+    def _write_status(self):
+        rows = self.model.objects.values("status").annotate(total=Count("id")).order_by("status")
+        labels = dict(self.model.STATUS_CHOICES)
+        if not rows:
+            self.stdout.write(self.empty_message)
+        for row in rows:
+            self.stdout.write(f"{labels.get(row['status'], row['status'])}: {row['total']}")
@@ -0,0 +1,222 @@
+## Cache em duas camadas para as consultas externas de CEP e CNPJ.
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from core import lookup_metrics
+
+logger = logging.getLogger(__name__)
+
+# Sentinela retornada por `LookupCache.get` quando a chave não está em nenhuma camada.
+# `None` é um valor válido em cache (resposta "não encontrado").
+MISSING = object()
+
+DEFAULT_TTL = 60 * 60 * 24 * 7  # 7 dias
+DEFAULT_NEGATIVE_TTL = 60 * 60  # 1 hora
+DEFAULT_LOCAL_MAX_SIZE = 2048
+DEFAULT_LOCAL_TTL = 60 * 5  # 5 minutos
+
+
+class LookupCache:
+    """
+    Cache de consultas externas com uma LRU em memória na frente de uma tabela.
+
+    - Camada 1: LRU por processo, limitada em tamanho e com TTL curto, para que
+      remoções feitas por outros processos (ex: comando `lookup_cache --purge`)
+      sejam percebidas rapidamente.
+    - Camada 2: tabela `core.LookupCacheEntry`, compartilhada entre processos,
+      com TTL longo para respostas positivas e TTL curto para respostas
+      "não encontrado" (cache negativo).
+
+    As chaves são sempre `(kind, key)`, onde `kind` é "cep" ou "cnpj" e `key`
+    é o valor normalizado (apenas dígitos). Falhas de banco de dados nunca
+    propagam: o cache se comporta como um "miss" e a consulta segue para as APIs.
+    """
+
+    def __init__(self, ttl=None, negative_ttl=None, local_max_size=None, local_ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, "LOOKUP_CACHE_TTL", DEFAULT_TTL)
+        self.negative_ttl = (
+            negative_ttl
+            if negative_ttl is not None
+            else getattr(settings, "LOOKUP_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL)
+        )
+        self.local_max_size = (
+            local_max_size
+            if local_max_size is not None
+            else getattr(settings, "LOOKUP_CACHE_LOCAL_MAX_SIZE", DEFAULT_LOCAL_MAX_SIZE)
+        )
+        self.local_ttl = (
+            local_ttl
+            if local_ttl is not None
+            else getattr(settings, "LOOKUP_CACHE_LOCAL_TTL", DEFAULT_LOCAL_TTL)
+        )
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def get(self, kind: str, key: str, count: bool = True):
+        """
+        Busca uma consulta no cache.
+
+        Args:
+            kind: Tipo da consulta ("cep" ou "cnpj").
+            key: Chave normalizada.
+            count: Contabiliza a leitura nas estatísticas (acertos/falhas). Leituras
+                repetidas de uma mesma consulta, como a espera da coalescência entre
+                processos, usam False para não distorcer as métricas.
+
+        Returns:
+            O dicionário em cache, `None` para uma resposta "não encontrado" em
+            cache, ou `MISSING` se a chave não estiver em nenhuma camada.
+        """
+        value = self._get_local(kind, key)
+        if value is not MISSING:
+            if count:
+                self._count(kind, "local_hits" if value is not None else "negative_hits")
+            return value
+
+        value = self._get_db(kind, key)
+        if value is not MISSING:
+            if count:
+                self._count(kind, "db_hits" if value is not None else "negative_hits")
+            return value
+
+        if count:
+            self._count(kind, "misses")
+        return MISSING
+
+    def set(self, kind: str, key: str, data: dict | None):
+        """
+        Armazena o resultado de uma consulta nas duas camadas.
+
+        Args:
+            kind: Tipo da consulta ("cep" ou "cnpj").
+            key: Chave normalizada.
+            data: Dados retornados pela API, ou None para registrar que a chave
+                  não existe (cache negativo).
+        """
+        ttl = self.ttl if data is not None else self.negative_ttl
+        expires_at = timezone.now() + timedelta(seconds=ttl)
+        self._set_local(kind, key, data, ttl)
+
+        from core.models import LookupCacheEntry
+
+        try:
+            LookupCacheEntry.objects.update_or_create(
+                kind=kind,
+                key=key,
+                defaults={"data": data, "found": data is not None, "expires_at": expires_at},
+            )
+        except DatabaseError as e:
+            logger.error(f"Erro ao gravar consulta {kind} {key} no cache persistente: {e}")
+
+    def delete(self, kind: str, key: str):
+        """Remove uma chave das duas camadas."""
+        with self._lock:
+            self._local.pop((kind, key), None)
+
+        from core.models import LookupCacheEntry
+
+        try:
+            LookupCacheEntry.objects.filter(kind=kind, key=key).delete()
+        except DatabaseError as e:
+            logger.error(f"Erro ao remover consulta {kind} {key} do cache persistente: {e}")
+
+    def purge(self, kind: str | None = None, expired_only: bool = True) -> int:
+        """
+        Remove registros da tabela de cache e limpa a LRU deste processo.
+
+        Args:
+            kind: Restringe a remoção a um tipo de consulta. None remove todos.
+            expired_only: Se True, remove apenas registros expirados.
+
+        Returns:
+            A quantidade de registros removidos da tabela.
+        """
+        from core.models import LookupCacheEntry
+
+        queryset = LookupCacheEntry.objects.all()
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        if expired_only:
+            queryset = queryset.filter(expires_at__lte=timezone.now())
+        deleted, _ = queryset.delete()
+        self.clear_local()
+        return deleted
+
+    def clear_local(self):
+        """Esvazia a LRU deste processo e zera os contadores."""
+        with self._lock:
+            self._local.clear()
+            self._counters.clear()
+
+    def stats(self) -> dict:
+        """
+        Retorna os contadores de acertos e falhas deste processo, por tipo.
+
+        Os mesmos eventos também são agregados entre processos em `core.lookup_metrics`.
+
+        Exemplo: {"cep": {"local_hits": 10, "db_hits": 2, "negative_hits": 1, "misses": 3}}
+        """
+        with self._lock:
+            return {kind: dict(counters) for kind, counters in self._counters.items()}
+
+    def _get_local(self, kind, key):
+        with self._lock:
+            entry = self._local.get((kind, key))
+            if entry is None:
+                return MISSING
+            data, expires = entry
+            if expires <= time.monotonic():
+                del self._local[(kind, key)]
+                return MISSING
+            self._local.move_to_end((kind, key))
+            return data
+
+    def _set_local(self, kind, key, data, ttl):
+        if self.local_max_size <= 0:
+            return
+        expires = time.monotonic() + min(ttl, self.local_ttl)
+        with self._lock:
+            self._local[(kind, key)] = (data, expires)
+            self._local.move_to_end((kind, key))
+            while len(self._local) > self.local_max_size:
+                self._local.popitem(last=False)
+
+    def _get_db(self, kind, key):
+        from core.models import LookupCacheEntry
+
+        try:
+            entry = (
+                LookupCacheEntry.objects.filter(
+                    kind=kind, key=key, expires_at__gt=timezone.now()
+                )
+                .only("data", "found", "expires_at")
+                .first()
+            )
+        except DatabaseError as e:
+            logger.error(f"Erro ao ler consulta {kind} {key} do cache persistente: {e}")
+            return MISSING
+
+        if entry is None:
+            return MISSING
+
+        data = entry.data if entry.found else None
+        remaining = (entry.expires_at - timezone.now()).total_seconds()
+        self._set_local(kind, key, data, remaining)
+        return data
+
+    def _count(self, kind, counter):
+        with self._lock:
+            counters = self._counters.setdefault(kind, {})
+            counters[counter] = counters.get(counter, 0) + 1
+        lookup_metrics.record_cache(kind, counter)
+
+
+lookup_cache = LookupCache()
@@ -0,0 +1,166 @@
+## Métricas das consultas externas de CEP/CNPJ, agregadas no cache do Django.
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "lookup_metrics"
+
+# Limites superiores (ms) dos intervalos do histograma de latência
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+PROVIDER_OUTCOMES = (
+    "success",  # Resposta com dados válidos
+    "not_found",  # Provedor respondeu que a chave não existe
+    "timeout",
+    "connection_error",
+    "http_error",  # Respostas 4xx/5xx (exceto 404)
+    "parse_error",  # JSON inválido ou formato desconhecido
+    "skipped",  # Circuit breaker aberto: nenhuma requisição feita
+)
+CACHE_OUTCOMES = ("local_hits", "db_hits", "negative_hits", "misses")
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "LOOKUP_METRICS_ENABLED", True)
+
+
+def record_provider_call(provider: str, outcome: str, elapsed: float | None = None):
+    """
+    Registra o resultado (e a latência, em segundos) de uma chamada a um provedor.
+
+    Os contadores ficam no cache padrão do Django e, portanto, são agregados
+    entre processos quando o cache é compartilhado (Redis, Memcached, banco).
+    """
+    if not is_enabled():
+        return
+    _incr(f"provider:{provider}:{outcome}")
+    if elapsed is not None:
+        elapsed_ms = elapsed * 1000
+        bucket = next((str(limit) for limit in LATENCY_BUCKETS_MS if elapsed_ms <= limit), "inf")
+        _incr(f"provider:{provider}:latency:{bucket}")
+        _incr(f"provider:{provider}:latency_sum_ms", round(elapsed_ms))
+
+
+def record_cache(kind: str, outcome: str):
+    """Registra um acerto ou falha do cache de consultas ("cep" ou "cnpj")."""
+    if not is_enabled():
+        return
+    _incr(f"cache:{kind}:{outcome}")
+
+
+def snapshot(providers: list[str], kinds: list[str]) -> dict:
+    """
+    Retorna as métricas acumuladas dos provedores e dos tipos de consulta informados.
+
+    Exemplo:
+        {"providers": {"viacep.com.br": {"outcomes": {...}, "errors": 2, "latency": {...}}},
+         "cache": {"cep": {"local_hits": 10, ..., "hit_ratio": 0.8}}}
+    """
+    keys = []
+    for provider in providers:
+        keys += [_key(f"provider:{provider}:{outcome}") for outcome in PROVIDER_OUTCOMES]
+        keys += [_key(f"provider:{provider}:latency:{bucket}") for bucket in _bucket_names()]
+        keys.append(_key(f"provider:{provider}:latency_sum_ms"))
+    for kind in kinds:
+        keys += [_key(f"cache:{kind}:{outcome}") for outcome in CACHE_OUTCOMES]
+    values = cache.get_many(keys)
+
+    def value(suffix):
+        return values.get(_key(suffix), 0)
+
+    result = {"providers": {}, "cache": {}}
+    for provider in providers:
+        outcomes = {outcome: value(f"provider:{provider}:{outcome}") for outcome in PROVIDER_OUTCOMES}
+        buckets = {bucket: value(f"provider:{provider}:latency:{bucket}") for bucket in _bucket_names()}
+        count = sum(buckets.values())
+        result["providers"][provider] = {
+            "outcomes": outcomes,
+            "errors": sum(outcomes[o] for o in ("timeout", "connection_error", "http_error", "parse_error")),
+            "latency": {
+                "buckets_ms": buckets,
+                "count": count,
+                "sum_ms": value(f"provider:{provider}:latency_sum_ms"),
+                "mean_ms": round(value(f"provider:{provider}:latency_sum_ms") / count, 1) if count else None,
+                "p50_ms": _percentile(buckets, count, 0.50),
+                "p95_ms": _percentile(buckets, count, 0.95),
+                "p99_ms": _percentile(buckets, count, 0.99),
+            },
+        }
+    for kind in kinds:
+        counts = {outcome: value(f"cache:{kind}:{outcome}") for outcome in CACHE_OUTCOMES}
+        total = sum(counts.values())
+        hits = total - counts["misses"]
+        result["cache"][kind] = {**counts, "hit_ratio": round(hits / total, 4) if total else None}
+    return result
+
+
+def reset(providers: list[str], kinds: list[str]):
+    """Zera as métricas dos provedores e tipos de consulta informados."""
+    keys = []
+    for provider in providers:
+        keys += [_key(f"provider:{provider}:{outcome}") for outcome in PROVIDER_OUTCOMES]
+        keys += [_key(f"provider:{provider}:latency:{bucket}") for bucket in _bucket_names()]
+        keys.append(_key(f"provider:{provider}:latency_sum_ms"))
+    for kind in kinds:
+        keys += [_key(f"cache:{kind}:{outcome}") for outcome in CACHE_OUTCOMES]
+    cache.delete_many(keys)
+
+
+def render_prometheus(data: dict) -> str:
+    """Formata um `snapshot()` no formato texto de exposição do Prometheus."""
+    lines = [
+        "# TYPE lookup_provider_requests_total counter",
+    ]
+    for provider, stats in data["providers"].items():
+        for outcome, total in stats["outcomes"].items():
+            lines.append(f'lookup_provider_requests_total{{provider="{provider}",outcome="{outcome}"}} {total}')
+    lines.append("# TYPE lookup_provider_latency_ms histogram")
+    for provider, stats in data["providers"].items():
+        cumulative = 0
+        for bucket, total in stats["latency"]["buckets_ms"].items():
+            cumulative += total
+            le = "+Inf" if bucket == "inf" else bucket
+            lines.append(f'lookup_provider_latency_ms_bucket{{provider="{provider}",le="{le}"}} {cumulative}')
+        lines.append(f'lookup_provider_latency_ms_sum{{provider="{provider}"}} {stats["latency"]["sum_ms"]}')
+        lines.append(f'lookup_provider_latency_ms_count{{provider="{provider}"}} {stats["latency"]["count"]}')
+    lines.append("# TYPE lookup_cache_requests_total counter")
+    for kind, stats in data["cache"].items():
+        for outcome in CACHE_OUTCOMES:
+            lines.append(f'lookup_cache_requests_total{{kind="{kind}",outcome="{outcome}"}} {stats[outcome]}')
+    return "\n".join(lines) + "\n"
+
+
+def _bucket_names() -> list[str]:
+    return [str(limit) for limit in LATENCY_BUCKETS_MS] + ["inf"]
+
+
+def _percentile(buckets: dict, count: int, quantile: float):
+    """Estima um percentil pelo limite superior do intervalo do histograma (None para "inf")."""
+    if not count:
+        return None
+    cumulative = 0
+    for bucket, total in buckets.items():
+        cumulative += total
+        if cumulative >= quantile * count:
+            return None if bucket == "inf" else int(bucket)
+    return None
+
+
+def _key(suffix: str) -> str:
+    return f"{KEY_PREFIX}:{suffix}"
+
+
+def _incr(suffix: str, delta: int = 1):
+    key = _key(suffix)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, delta)
+    except ValueError:
+        # A chave foi removida entre o add() e o incr() (ex: reset concorrente).
+        cache.set(key, delta, timeout=None)
+    except Exception as e:
+        # Métricas nunca podem derrubar uma consulta.
+        logger.debug(f"Falha ao registrar métrica {key}: {e}")
@@ -0,0 +1,66 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services import _fetch_address_data_from_apis, _fetch_company_data_from_apis
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão e a latência das consultas de CEP/CNPJ contra o servidor de "
+        "`run_fake_providers` (LOOKUP_PROVIDER_BASE_URL). As respostas não passam pelo "
+        "cache de consultas nem são gravadas nele."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=["cep", "cnpj"], default="cep", help="Tipo de consulta (padrão: cep).")
+        parser.add_argument("--requests", type=int, default=200, help="Total de consultas (padrão: 200).")
+        parser.add_argument("--concurrency", type=int, default=8, help="Consultas simultâneas (padrão: 8).")
+        parser.add_argument("--seed", type=int, default=0, help="Semente para gerar as chaves consultadas.")
+        parser.add_argument(
+            "--live",
+            action="store_true",
+            help="Permite rodar sem LOOKUP_PROVIDER_BASE_URL, consultando as APIs reais com chaves aleatórias.",
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "LOOKUP_PROVIDER_BASE_URL", ""):
+            if not options["live"]:
+                raise CommandError(
+                    "LOOKUP_PROVIDER_BASE_URL não definida: as consultas iriam para as APIs reais. "
+                    "Aponte-a para `run_fake_providers` ou use --live."
+                )
+            self.stderr.write(self.style.WARNING("--live: as consultas irão para as APIs reais."))
+
+        rng = random.Random(options["seed"])
+        length = 8 if options["kind"] == "cep" else 14
+        keys = ["".join(rng.choice("0123456789") for _ in range(length)) for _ in range(max(options["requests"], 1))]
+        # Direto nos provedores: os dados do benchmark (sintéticos, no servidor falso)
+        # não podem chegar ao cache de consultas usado pelos formulários.
+        fetch = _fetch_address_data_from_apis if options["kind"] == "cep" else _fetch_company_data_from_apis
+
+        def run(key):
+            started = time.monotonic()
+            data, _ = fetch(key)
+            return time.monotonic() - started, data is not None
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(run, keys))
+        elapsed = time.monotonic() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        found = sum(1 for _, ok in results if ok)
+
+        def percentile(q):
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000
+
+        self.stdout.write(
+            f"{len(results)} consulta(s) de {options['kind'].upper()} em {elapsed:.2f}s "
+            f"({len(results) / elapsed:.1f}/s), {found} com dados.\n"
+            f"Latência: p50 {percentile(0.5):.0f} ms, p95 {percentile(0.95):.0f} ms, "
+            f"p99 {percentile(0.99):.0f} ms, máx {latencies[-1] * 1000:.0f} ms."
+        )
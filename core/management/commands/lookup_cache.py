@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core.lookup_cache import lookup_cache
+from core.models import LookupCacheEntry
+from core.services import fetch_address_data, fetch_company_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Gerencia o cache persistente de consultas de CEP/CNPJ: exibe estatísticas, "
+        "remove registros expirados (ou todos) e reconsulta chaves nas APIs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=[kind for kind, _ in LookupCacheEntry.KIND_CHOICES],
+            help="Restringe a operação a um tipo de consulta.",
+        )
+        parser.add_argument(
+            "--purge",
+            action="store_true",
+            help="Remove os registros expirados.",
+        )
+        parser.add_argument(
+            "--purge-all",
+            action="store_true",
+            help="Remove todos os registros (expirados ou não).",
+        )
+        parser.add_argument(
+            "--refresh",
+            nargs="+",
+            metavar="CHAVE",
+            help="Reconsulta as chaves informadas (CEP com 8 dígitos ou CNPJ com 14) nas APIs.",
+        )
+        parser.add_argument(
+            "--refresh-expired",
+            action="store_true",
+            help="Reconsulta nas APIs as chaves cujos registros já expiraram.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=500,
+            help="Quantidade máxima de chaves reconsultadas por --refresh-expired (padrão: 500).",
+        )
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+
+        if options["refresh"]:
+            for raw_key in options["refresh"]:
+                key = "".join(filter(str.isdigit, raw_key))
+                self._refresh(self._kind_for_key(key, kind), key)
+
+        if options["refresh_expired"]:
+            expired = LookupCacheEntry.objects.filter(expires_at__lte=timezone.now())
+            if kind:
+                expired = expired.filter(kind=kind)
+            for entry_kind, key in expired.values_list("kind", "key")[: options["limit"]]:
+                self._refresh(entry_kind, key)
+
+        if options["purge"] or options["purge_all"]:
+            deleted = lookup_cache.purge(kind=kind, expired_only=not options["purge_all"])
+            self.stdout.write(self.style.SUCCESS(f"{deleted} registro(s) removido(s) do cache."))
+
+        self._write_stats(kind)
+
+    def _kind_for_key(self, key, kind):
+        inferred = {8: "cep", 14: "cnpj"}.get(len(key))
+        if not inferred or (kind and kind != inferred):
+            raise CommandError(f"Chave inválida para reconsulta: '{key}'.")
+        return inferred
+
+    def _refresh(self, kind, key):
+        fetch = fetch_address_data if kind == "cep" else fetch_company_data
+        data = fetch(key, refresh=True)
+        status = "encontrado" if data else "sem dados"
+        self.stdout.write(f"{kind.upper()} {key}: {status}")
+
+    def _write_stats(self, kind):
+        now = timezone.now()
+        queryset = LookupCacheEntry.objects.all()
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        rows = (
+            queryset.values("kind")
+            .annotate(
+                total=Count("id"),
+                negative=Count("id", filter=Q(found=False)),
+                expired=Count("id", filter=Q(expires_at__lte=now)),
+            )
+            .order_by("kind")
+        )
+        if not rows:
+            self.stdout.write("Cache de consultas vazio.")
+            return
+        for row in rows:
+            self.stdout.write(
+                f"{row['kind'].upper()}: {row['total']} registro(s), "
+                f"{row['negative']} negativo(s), {row['expired']} expirado(s)"
+            )
@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import lookup_metrics
+from core.services import CEP_PROVIDERS, CNPJ_PROVIDERS, provider_breaker, provider_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Exibe as métricas das consultas externas de CEP/CNPJ: latência e desfechos por "
+        "provedor, estado dos circuit breakers e taxa de acerto do cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Exibe as métricas em JSON.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Zera as métricas após exibi-las.",
+        )
+
+    def handle(self, *args, **options):
+        names = provider_names()
+        providers = [name for kind_providers in names.values() for name in kind_providers]
+        data = lookup_metrics.snapshot(providers, list(names))
+        breakers = {
+            breaker.name: breaker.state
+            for breaker in map(provider_breaker, CEP_PROVIDERS + CNPJ_PROVIDERS)
+        }
+
+        if options["json"]:
+            for provider, state in breakers.items():
+                data["providers"][provider]["circuit_breaker"] = state
+            self.stdout.write(json.dumps(data, indent=2))
+        else:
+            self._write_table(data, breakers)
+
+        if options["reset"]:
+            lookup_metrics.reset(providers, list(names))
+            self.stdout.write(self.style.SUCCESS("Métricas zeradas."))
+
+    def _write_table(self, data, breakers):
+        self.stdout.write("Provedores:")
+        for provider, stats in data["providers"].items():
+            outcomes = stats["outcomes"]
+            latency = stats["latency"]
+            self.stdout.write(
+                f"  {provider} [{breakers.get(provider, '-')}]: "
+                f"{latency['count']} chamada(s), {outcomes['success']} sucesso(s), "
+                f"{outcomes['not_found']} não encontrado(s), {outcomes['timeout']} timeout(s), "
+                f"{outcomes['connection_error']} erro(s) de conexão, {outcomes['http_error']} erro(s) HTTP, "
+                f"{outcomes['parse_error']} erro(s) de formato, {outcomes['skipped']} ignorada(s)"
+            )
+            if latency["count"]:
+                self.stdout.write(
+                    f"    latência: média {latency['mean_ms']} ms, "
+                    f"p50 {self._bound(latency['p50_ms'])}, p95 {self._bound(latency['p95_ms'])}, "
+                    f"p99 {self._bound(latency['p99_ms'])}"
+                )
+
+        self.stdout.write("Cache de consultas:")
+        for kind, stats in data["cache"].items():
+            ratio = f"{stats['hit_ratio']:.1%}" if stats["hit_ratio"] is not None else "-"
+            self.stdout.write(
+                f"  {kind.upper()}: taxa de acerto {ratio} "
+                f"(memória {stats['local_hits']}, banco {stats['db_hits']}, "
+                f"negativos {stats['negative_hits']}, falhas {stats['misses']})"
+            )
+
+    def _bound(self, value):
+        return f"<= {value} ms" if value is not None else f"> {lookup_metrics.LATENCY_BUCKETS_MS[-1]} ms"
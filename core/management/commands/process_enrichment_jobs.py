@@ -0,0 +1,23 @@
+from core.enrichment import claim_jobs, run_job
+from core.jobs import JobQueueCommand
+from core.models import EnrichmentJob
+
+
+class Command(JobQueueCommand):
+    help = (
+        "Processa a fila de enriquecimento por CNPJ (Clientes e Fornecedores salvos no "
+        "modo diferido), preenchendo razão social, nome fantasia, IE e endereço."
+    )
+    model = EnrichmentJob
+    empty_message = "Fila de enriquecimento vazia."
+
+    def claim_jobs(self, limit):
+        return claim_jobs(limit=limit)
+
+    def run_job(self, job):
+        return run_job(job)
+
+    def describe(self, job, succeeded):
+        if succeeded:
+            return f"Tarefa {job.pk} (CNPJ {job.tax_id}): concluída"
+        return f"Tarefa {job.pk} (CNPJ {job.tax_id}): {job.get_status_display().lower()} - {job.last_error}"
@@ -0,0 +1,88 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.fake_providers import DEFAULT_FIXTURES, FakeProviderConfig, FakeProviderServer, RENDERERS
+
+
+def _provider_values(pairs, option):
+    """Converte ["viacep.com.br=0.5", ...] em {"viacep.com.br": 0.5}."""
+    values = {}
+    for pair in pairs or []:
+        provider, _, value = pair.partition("=")
+        if provider not in RENDERERS or not value:
+            raise CommandError(f"{option}: use PROVEDOR=VALOR, com PROVEDOR em {', '.join(RENDERERS)}.")
+        values[provider] = float(value)
+    return values
+
+
+class Command(BaseCommand):
+    help = (
+        "Inicia um servidor HTTP local que imita ViaCEP, BrasilAPI, CNPJá e CNPJ.ws, com "
+        "latência, taxa de erros e dados configuráveis. Aponte LOOKUP_PROVIDER_BASE_URL "
+        "para o endereço exibido."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: 127.0.0.1).")
+        parser.add_argument("--port", type=int, default=8765, help="Porta de escuta (padrão: 8765).")
+        parser.add_argument("--latency", type=float, default=0.0, help="Latência base, em segundos.")
+        parser.add_argument("--jitter", type=float, default=0.0, help="Variação aleatória máxima somada à latência.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 503 (0 a 1).")
+        parser.add_argument(
+            "--hang-rate", type=float, default=0.0, help="Fração de requisições que travam (simula timeout)."
+        )
+        parser.add_argument(
+            "--hang-seconds", type=float, default=30.0, help="Duração das requisições travadas (padrão: 30)."
+        )
+        parser.add_argument(
+            "--provider-latency", nargs="+", metavar="PROVEDOR=SEGUNDOS",
+            help="Latência por provedor (ex: viacep.com.br=1.5).",
+        )
+        parser.add_argument(
+            "--provider-error-rate", nargs="+", metavar="PROVEDOR=TAXA",
+            help="Taxa de erros por provedor (ex: open.cnpja.com=1).",
+        )
+        parser.add_argument(
+            "--fixtures",
+            help="Arquivo JSON com as chaves 'cep', 'cnpj' e 'not_found' (mesmo formato de DEFAULT_FIXTURES).",
+        )
+        parser.add_argument(
+            "--no-synthesize",
+            action="store_true",
+            help="Responde 'não encontrado' para chaves fora das fixtures (padrão: gera dados sintéticos).",
+        )
+        parser.add_argument("--seed", type=int, help="Semente do gerador aleatório (resultados reprodutíveis).")
+
+    def handle(self, *args, **options):
+        fixtures = DEFAULT_FIXTURES
+        if options["fixtures"]:
+            try:
+                with open(options["fixtures"], encoding="utf-8") as f:
+                    fixtures = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Não foi possível ler as fixtures: {e}")
+
+        config = FakeProviderConfig(
+            latency=options["latency"],
+            jitter=options["jitter"],
+            error_rate=options["error_rate"],
+            hang_rate=options["hang_rate"],
+            hang_seconds=options["hang_seconds"],
+            synthesize=not options["no_synthesize"],
+            fixtures=fixtures,
+            provider_latency=_provider_values(options["provider_latency"], "--provider-latency"),
+            provider_error_rate=_provider_values(options["provider_error_rate"], "--provider-error-rate"),
+            seed=options["seed"],
+        )
+        server = FakeProviderServer(options["host"], options["port"], config)
+        self.stdout.write(
+            self.style.SUCCESS(f"Provedores falsos em {server.url} (LOOKUP_PROVIDER_BASE_URL={server.url}).")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            self.stdout.write(f"Requisições recebidas: {server.request_counts}")
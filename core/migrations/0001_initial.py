@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-17 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LookupCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cep', 'CEP'), ('cnpj', 'CNPJ')], max_length=4, verbose_name='Tipo')),
+                ('key', models.CharField(max_length=14, verbose_name='Chave')),
+                ('data', models.JSONField(blank=True, null=True, verbose_name='Dados')),
+                ('found', models.BooleanField(default=True, verbose_name='Encontrado')),
+                ('expires_at', models.DateTimeField(verbose_name='Expira em')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Consulta em Cache',
+                'verbose_name_plural': 'Consultas em Cache',
+                'ordering': ['kind', 'key'],
+                'indexes': [models.Index(fields=['expires_at'], name='lookup_cache_expires_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='lookup_cache_kind_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-17 16:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrichmentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('tax_id', models.CharField(max_length=14, verbose_name='CNPJ')),
+                ('update_address', models.BooleanField(default=True, help_text='Preenche o endereço com os dados da API (falso se o formulário já informou um).', verbose_name='Atualizar Endereço')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em execução'), ('done', 'Concluída'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='Situação')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Erro')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Disponível em')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizada em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizada em')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Tarefa de Enriquecimento',
+                'verbose_name_plural': 'Tarefas de Enriquecimento',
+                'ordering': ['available_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='enrichment_job_queue_idx'), models.Index(fields=['content_type', 'object_id'], name='enrichment_job_target_idx')],
+            },
+        ),
+    ]
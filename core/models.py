@@ -0,0 +1,103 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils import timezone
+
+
+class LookupCacheEntry(models.Model):
+    """
+    Resultado persistido de uma consulta externa de CEP ou CNPJ.
+
+    Funciona como a segunda camada do cache de consultas (`core.lookup_cache`),
+    compartilhada entre todos os processos da aplicação. Cada registro é
+    identificado pelo tipo de consulta e pela chave normalizada (apenas dígitos).
+
+    Registros com `found=False` representam respostas "não encontrado" das APIs
+    (cache negativo) e não possuem `data`.
+    """
+
+    KIND_CHOICES = [
+        ("cep", "CEP"),
+        ("cnpj", "CNPJ"),
+    ]
+
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES, verbose_name="Tipo")
+    key = models.CharField(max_length=14, verbose_name="Chave")
+    data = models.JSONField(null=True, blank=True, verbose_name="Dados")
+    found = models.BooleanField(default=True, verbose_name="Encontrado")
+    expires_at = models.DateTimeField(verbose_name="Expira em")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Consulta em Cache"
+        verbose_name_plural = "Consultas em Cache"
+        ordering = ["kind", "key"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "key"], name="lookup_cache_kind_key_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="lookup_cache_expires_idx"),
+        ]
+
+    def __str__(self):
+        status = "" if self.found else " (não encontrado)"
+        return f"{self.get_kind_display()} {self.key}{status}"
+
+    @property
+    def is_expired(self) -> bool:
+        """Indica se o registro já passou da data de expiração."""
+        return self.expires_at <= timezone.now()
+
+
+class EnrichmentJob(models.Model):
+    """
+    Tarefa pendente de enriquecimento cadastral a partir do CNPJ.
+
+    Criada quando um Cliente ou Fornecedor Pessoa Jurídica é salvo no modo
+    diferido (`COMPANY_ENRICHMENT_MODE = "deferred"`): o registro é gravado
+    imediatamente e a consulta às APIs de CNPJ é feita depois, pelo comando
+    `process_enrichment_jobs`, que preenche razão social, nome fantasia,
+    inscrição estadual e endereço. O alvo é referenciado por uma relação
+    genérica, como em `apps.addresses.models.Address`.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pendente"),
+        ("running", "Em execução"),
+        ("done", "Concluída"),
+        ("failed", "Falhou"),
+    ]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey("content_type", "object_id")
+    tax_id = models.CharField(max_length=14, verbose_name="CNPJ")
+    update_address = models.BooleanField(
+        default=True,
+        verbose_name="Atualizar Endereço",
+        help_text="Preenche o endereço com os dados da API (falso se o formulário já informou um).",
+    )
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default="pending", verbose_name="Situação"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentativas")
+    last_error = models.TextField(blank=True, verbose_name="Último Erro")
+    available_at = models.DateTimeField(default=timezone.now, verbose_name="Disponível em")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criada em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizada em")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finalizada em")
+
+    class Meta:
+        verbose_name = "Tarefa de Enriquecimento"
+        verbose_name_plural = "Tarefas de Enriquecimento"
+        ordering = ["available_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="enrichment_job_queue_idx"),
+            models.Index(fields=["content_type", "object_id"], name="enrichment_job_target_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type.model} #{self.object_id} - CNPJ {self.tax_id} ({self.get_status_display()})"
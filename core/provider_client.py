@@ -0,0 +1,176 @@
+## Cliente HTTP compartilhado pelas consultas às APIs externas de CEP/CNPJ.
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 5
+DEFAULT_MAX_RETRIES = 1
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_BACKOFF_JITTER = 0.2
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_POOL_TIMEOUT = 2
+DEFAULT_MAX_RETRY_AFTER = 2
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class CappedRetry(Retry):
+    """
+    `Retry` que respeita o cabeçalho `Retry-After` dos provedores, limitado a
+    `retry_after_max` segundos: um provedor não pode suspender a requisição
+    do usuário por tempo indeterminado.
+    """
+
+    def __init__(self, *args, retry_after_max: float = DEFAULT_MAX_RETRY_AFTER, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after_max = retry_after_max
+
+    def new(self, **kw) -> "CappedRetry":
+        retry = super().new(**kw)
+        retry.retry_after_max = self.retry_after_max
+        return retry
+
+    def get_retry_after(self, response) -> float | None:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.retry_after_max)
+
+
+class ProviderClient:
+    """
+    Mantém uma `requests.Session` com pool de conexões (keep-alive) por host.
+
+    Cada provedor (viacep.com.br, brasilapi.com.br, open.cnpja.com,
+    publica.cnpj.ws) recebe sua própria sessão, criada sob demanda no primeiro
+    uso, de forma que as conexões TCP/TLS são reaproveitadas entre consultas
+    do mesmo processo.
+
+    Configurações (settings):
+    - `LOOKUP_HTTP_CONNECT_TIMEOUT` / `LOOKUP_HTTP_READ_TIMEOUT`: timeouts em segundos.
+    - `LOOKUP_HTTP_MAX_RETRIES`: novas tentativas em falhas de conexão e
+      respostas 429/5xx. Timeouts de leitura não são repetidos, para não
+      multiplicar a espera do usuário. O `Retry-After` dos provedores é
+      respeitado até `LOOKUP_HTTP_MAX_RETRY_AFTER` segundos.
+    - `LOOKUP_HTTP_BACKOFF_FACTOR` / `LOOKUP_HTTP_BACKOFF_JITTER`: espera
+      exponencial com variação aleatória entre tentativas.
+    - `LOOKUP_HTTP_MAX_CONNECTIONS`: limite de conexões simultâneas por host,
+      que pode ser sobrescrito por host em `LOOKUP_HTTP_HOST_MAX_CONNECTIONS`.
+    - `LOOKUP_HTTP_POOL_TIMEOUT`: espera máxima, em segundos, por uma conexão
+      livre quando o limite do host está atingido; esgotada, a consulta falha
+      com `requests.ConnectionError` em vez de bloquear o worker.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Executa um GET usando a sessão do host da URL.
+
+        Args:
+            url: URL completa a ser consultada.
+            **kwargs: Repassados para `Session.get`. Se `timeout` não for
+                      informado, usa os timeouts de conexão/leitura configurados.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session_for(url)
+        slots = self._slots[self._host_key(url)]
+        pool_timeout = float(getattr(settings, "LOOKUP_HTTP_POOL_TIMEOUT", DEFAULT_POOL_TIMEOUT))
+        if not slots.acquire(timeout=pool_timeout):
+            raise requests.ConnectionError(
+                f"Nenhuma conexão livre com {urlsplit(url).netloc} após {pool_timeout}s."
+            )
+        try:
+            return session.get(url, **kwargs)
+        except requests.ConnectionError as e:
+            # Com `max_retries` configurado, o requests embrulha timeouts de leitura
+            # em ConnectionError; devolve o tipo correto para quem classifica o erro.
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            if isinstance(reason, ReadTimeoutError):
+                raise requests.ReadTimeout(e, request=e.request, response=e.response) from e
+            raise
+        finally:
+            slots.release()
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        """Tupla (timeout de conexão, timeout de leitura) usada por padrão."""
+        return (
+            float(getattr(settings, "LOOKUP_HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+            float(getattr(settings, "LOOKUP_HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+        )
+
+    def session_for(self, url: str) -> requests.Session:
+        """Retorna (criando se necessário) a sessão associada ao host da URL."""
+        host_key = self._host_key(url)
+        session = self._sessions.get(host_key)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host_key)
+            if session is None:
+                parts = urlsplit(url)
+                session, max_connections = self._build_session(parts.scheme, parts.netloc)
+                self._slots[host_key] = threading.BoundedSemaphore(max_connections)
+                self._sessions[host_key] = session
+            return session
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def close(self):
+        """Fecha todas as sessões (e conexões abertas) deste processo."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._slots.clear()
+
+    def _build_session(self, scheme: str, host: str) -> tuple[requests.Session, int]:
+        max_retries = int(getattr(settings, "LOOKUP_HTTP_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+        retry = CappedRetry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET"]),
+            backoff_factor=float(getattr(settings, "LOOKUP_HTTP_BACKOFF_FACTOR", DEFAULT_BACKOFF_FACTOR)),
+            backoff_jitter=float(getattr(settings, "LOOKUP_HTTP_BACKOFF_JITTER", DEFAULT_BACKOFF_JITTER)),
+            respect_retry_after_header=True,
+            retry_after_max=float(getattr(settings, "LOOKUP_HTTP_MAX_RETRY_AFTER", DEFAULT_MAX_RETRY_AFTER)),
+            raise_on_status=False,
+        )
+        host_limits = getattr(settings, "LOOKUP_HTTP_HOST_MAX_CONNECTIONS", {}) or {}
+        max_connections = int(
+            host_limits.get(host, getattr(settings, "LOOKUP_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+        )
+        # O limite de conexões simultâneas é aplicado em `get`, com espera limitada;
+        # `pool_block` bloquearia sem prazo com o pool esgotado.
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_connections,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount(f"{scheme}://{host}", adapter)
+        session.headers.update({"Accept": "application/json"})
+        logger.debug(f"Sessão HTTP criada para {host} (máx. {max_connections} conexões).")
+        return session, max_connections
+
+
+provider_client = ProviderClient()
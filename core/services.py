@@ -1,11 +1,36 @@
 ## operações externas ou serviços específicos, como chamadas de API, integração com terceiros, envio de notificações, etc.
 import requests
 import logging
+import time
+from functools import partial
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from core import lookup_metrics
+from core.circuit_breaker import CircuitBreaker
+from core.hedging import first_successful
+from core.lookup_cache import MISSING, lookup_cache
+from core.provider_client import provider_client
+from core.singleflight import single_flight
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_HEDGE_DELAY = 0.8
+
+# Templates das URLs dos provedores, em ordem de preferência. O template também
+# identifica o provedor no circuit breaker (`core.circuit_breaker`).
+CNPJ_PROVIDERS = [
+    "https://open.cnpja.com/office/{key}",
+    "https://publica.cnpj.ws/cnpj/{key}",
+]
+CEP_PROVIDERS = [
+    "https://viacep.com.br/ws/{key}/json/",
+    "https://brasilapi.com.br/api/cep/v1/{key}",
+]
 
-def fetch_company_data(tax_id: str) -> dict | None:
+
+def fetch_company_data(tax_id: str, refresh: bool = False) -> dict | None:
     """
     Consulta CNPJ em APIs públicas e retorna os dados formatados.
 
@@ -15,8 +40,14 @@ def fetch_company_data(tax_id: str) -> dict | None:
     dados válidos é utilizado. Os dados são limpos e formatados para um dicionário
     consistente.
 
+    Os resultados (inclusive respostas "CNPJ não encontrado") são armazenados no
+    cache de consultas (`core.lookup_cache`), compartilhado entre processos.
+    Consultas simultâneas ao mesmo CNPJ são coalescidas (`core.singleflight`).
+
     Args:
         tax_id: String contendo o CNPJ a ser consultado (pode incluir formatação).
+        refresh: Se True, ignora o valor em cache e consulta as APIs novamente,
+                 atualizando o cache com a nova resposta.
 
     Returns:
         Um dicionário com os dados da empresa ('full_name', 'preferred_name',
@@ -31,115 +62,133 @@ def fetch_company_data(tax_id: str) -> dict | None:
         logger.warning(f"Tentativa de buscar CNPJ inválido ou vazio: '{tax_id}'")
         return None
 
-    apis = [
-        f"https://open.cnpja.com/office/{tax_id}",
-        f"https://publica.cnpj.ws/cnpj/{tax_id}",
-    ]
-
-    for api_url in apis:
-        try:
-            response = requests.get(api_url, timeout=5)
-            response.raise_for_status()  # Levanta HTTPError para bad responses (4xx ou 5xx)
-            data = response.json()
-
-            # Verifica se a API retornou um erro específico (ex: CNPJ not found)
-            if data and ("erro" in data or data.get("status") == "ERROR"):
-                logger.info(
-                    f"API {api_url} retornou erro para CNPJ {tax_id}: {data.get('message') or data.get('error') or data}"
+    peek = None
+    if not refresh:
+        cached_data = lookup_cache.get("cnpj", tax_id)
+        if cached_data is not MISSING:
+            return cached_data
+        peek = partial(lookup_cache.get, "cnpj", tax_id, count=False)
+
+    return single_flight.do(
+        f"cnpj:{tax_id}", partial(_fetch_and_cache, "cnpj", tax_id, _fetch_company_data_from_apis), peek=peek
+    )
+
+
+def _fetch_and_cache(kind: str, key: str, fetch_from_apis) -> dict | None:
+    """
+    Consulta as APIs e grava a resposta no cache de consultas.
+
+    Falhas das APIs não são cacheadas; apenas dados válidos ou respostas
+    "não encontrado" de todos os provedores.
+    """
+    data, not_found = fetch_from_apis(key)
+    if data or not_found:
+        lookup_cache.set(kind, key, data)
+    return data
+
+
+def _fetch_company_data_from_apis(tax_id: str) -> tuple[dict | None, bool]:
+    """
+    Consulta o CNPJ (já normalizado) nas APIs públicas, sem passar pelo cache.
+
+    Returns:
+        Uma tupla (dados, não_encontrado). `dados` é o dicionário formatado ou
+        None. `não_encontrado` é True apenas quando todas as APIs responderam
+        explicitamente que o CNPJ não existe, o que permite o cache negativo
+        sem confundir "não existe" com "API fora do ar".
+    """
+    return _query_providers(CNPJ_PROVIDERS, "CNPJ", tax_id, _parse_company_payload)
+
+
+def _parse_company_payload(data: dict, tax_id: str) -> dict | None:
+    """
+    Converte a resposta de uma API de CNPJ para o dicionário padrão do sistema.
+
+    Returns:
+        O dicionário formatado, ou None se a resposta não tiver um formato conhecido.
+    """
+    # Extrai a Inscrição Estadual (IE) ativa ou retorna ""
+    state_registration = ""
+
+    # API 1 (open.cnpja.com) - Dados geralmente em chaves 'company', 'address', 'registrations'
+    if "company" in data and "address" in data:
+        active_registration = next(
+            (
+                reg
+                for reg in data.get("registrations", [])
+                if reg.get("enabled")
+                and reg.get("type", {}).get("text") == "IE Normal"
+            ),
+            None,
+        )
+        if active_registration:
+            state_registration = active_registration.get("number", "")
+
+        return {
+            "full_name": (
+                data.get("company", {}).get("name") or ""
+            ).title(),
+            "preferred_name": (data.get("alias") or "").title(),
+            "zip_code": data.get("address", {}).get("zip", ""),
+            "street": (data.get("address", {}).get("street") or "")
+            .title()
+            .strip(),
+            "number": data.get("address", {}).get("number", ""),
+            "neighborhood": (
+                data.get("address", {}).get("district") or ""
+            ).title(),
+            "city": (data.get("address", {}).get("city") or "").title(),
+            "state": data.get("address", {}).get("state", ""),
+            "state_registration": state_registration,
+        }
+
+    # API 2 (publica.cnpj.ws) - Dados geralmente na chave 'estabelecimento'
+    if "estabelecimento" in data:
+        active_registration = next(
+            (
+                ie
+                for ie in data.get("estabelecimento", {}).get(
+                    "inscricoes_estaduais", []
                 )
-                continue
-
-            if data:
-                # Extrai a Inscrição Estadual (IE) ativa ou retorna ""
-                state_registration = ""
-
-                # API 1 (open.cnpja.com) - Dados geralmente em chaves 'company', 'address', 'registrations'
-                if "company" in data and "address" in data:
-                    active_registration = next(
-                        (
-                            reg
-                            for reg in data.get("registrations", [])
-                            if reg.get("enabled")
-                            and reg.get("type", {}).get("text") == "IE Normal"
-                        ),
-                        None,
-                    )
-                    if active_registration:
-                        state_registration = active_registration.get("number", "")
-
-                    return {
-                        "full_name": (
-                            data.get("company", {}).get("name") or ""
-                        ).title(),
-                        "preferred_name": (data.get("alias") or "").title(),
-                        "zip_code": data.get("address", {}).get("zip", ""),
-                        "street": (data.get("address", {}).get("street") or "")
-                        .title()
-                        .strip(),
-                        "number": data.get("address", {}).get("number", ""),
-                        "neighborhood": (
-                            data.get("address", {}).get("district") or ""
-                        ).title(),
-                        "city": (data.get("address", {}).get("city") or "").title(),
-                        "state": data.get("address", {}).get("state", ""),
-                        "state_registration": state_registration,
-                    }
-
-                # API 2 (publica.cnpj.ws) - Dados geralmente na chave 'estabelecimento'
-                elif "estabelecimento" in data:
-                    active_registration = next(
-                        (
-                            ie
-                            for ie in data.get("estabelecimento", {}).get(
-                                "inscricoes_estaduais", []
-                            )
-                            if ie.get("ativo")
-                        ),
-                        None,
-                    )
-                    if active_registration:
-                        state_registration = active_registration.get(
-                            "inscricao_estadual", ""
-                        )
-
-                    return {
-                        "full_name": (data.get("razao_social", "")).title(),
-                        "preferred_name": (
-                            data.get("estabelecimento", {}).get("nome_fantasia", "")
-                        ).title(),
-                        "zip_code": data.get("estabelecimento", {}).get("cep", ""),
-                        "street": (
-                            f"{data.get('estabelecimento', {}).get('tipo_logradouro', '')} {data.get('estabelecimento', {}).get('logradouro', '')}"
-                        )
-                        .title()
-                        .strip(),
-                        "number": data.get("estabelecimento", {}).get("numero", ""),
-                        "neighborhood": (
-                            data.get("estabelecimento", {}).get("bairro", "")
-                        ).title(),
-                        "city": (
-                            data.get("estabelecimento", {})
-                            .get("cidade", {})
-                            .get("nome", "")
-                        ).title(),
-                        "state": data.get("estabelecimento", {})
-                        .get("estado", {})
-                        .get("sigla", ""),
-                        "state_registration": state_registration,
-                    }
-
-        except requests.RequestException as e:
-            logger.error(f"Erro ao consultar API {api_url} para CNPJ {tax_id}: {e}")
-        except Exception as e:
-            logger.error(
-                f"Erro inesperado ao processar resposta da API {api_url} para CNPJ {tax_id}: {e}"
+                if ie.get("ativo")
+            ),
+            None,
+        )
+        if active_registration:
+            state_registration = active_registration.get(
+                "inscricao_estadual", ""
             )
 
-    logger.warning(f"Não foi possível obter dados para o CNPJ {tax_id} de nenhuma API.")
+        return {
+            "full_name": (data.get("razao_social", "")).title(),
+            "preferred_name": (
+                data.get("estabelecimento", {}).get("nome_fantasia", "")
+            ).title(),
+            "zip_code": data.get("estabelecimento", {}).get("cep", ""),
+            "street": (
+                f"{data.get('estabelecimento', {}).get('tipo_logradouro', '')} {data.get('estabelecimento', {}).get('logradouro', '')}"
+            )
+            .title()
+            .strip(),
+            "number": data.get("estabelecimento", {}).get("numero", ""),
+            "neighborhood": (
+                data.get("estabelecimento", {}).get("bairro", "")
+            ).title(),
+            "city": (
+                data.get("estabelecimento", {})
+                .get("cidade", {})
+                .get("nome", "")
+            ).title(),
+            "state": data.get("estabelecimento", {})
+            .get("estado", {})
+            .get("sigla", ""),
+            "state_registration": state_registration,
+        }
+
     return None
 
 
-def fetch_address_data(zip_code: str) -> dict | None:
+def fetch_address_data(zip_code: str, refresh: bool = False) -> dict | None:
     """
     Consulta CEP em APIs públicas e retorna os dados formatados.
 
@@ -148,8 +197,14 @@ def fetch_address_data(zip_code: str) -> dict | None:
     para aumentar a robustez. O primeiro endpoint que retornar dados válidos é
     utilizado. Os dados são limpos e formatados para um dicionário consistente.
 
+    Os resultados (inclusive respostas "CEP não encontrado") são armazenados no
+    cache de consultas (`core.lookup_cache`), compartilhado entre processos.
+    Consultas simultâneas ao mesmo CEP são coalescidas (`core.singleflight`).
+
     Args:
         zip_code: String contendo o CEP a ser consultado (pode incluir formatação).
+        refresh: Se True, ignora o valor em cache e consulta as APIs novamente,
+                 atualizando o cache com a nova resposta.
 
     Returns:
         Um dicionário com os dados do endereço ('zip_code', 'street',
@@ -163,43 +218,194 @@ def fetch_address_data(zip_code: str) -> dict | None:
         logger.warning(f"Tentativa de buscar CEP inválido ou vazio: '{zip_code}'")
         return None
 
-    apis = [
-        f"https://viacep.com.br/ws/{zip_code}/json/",
-        f"https://brasilapi.com.br/api/cep/v1/{zip_code}",
-    ]
-
-    for api_url in apis:
-        try:
-            response = requests.get(api_url, timeout=5)
-            response.raise_for_status()  # Levanta HTTPError para bad responses (4xx ou 5xx)
-            data = response.json()
-
-            # Verifica se a API retornou um erro específico (ex: CEP not found)
-            if data and ("erro" in data or data.get("status") == "ERROR"):
-                logger.info(
-                    f"API {api_url} retornou erro para CEP {zip_code}: {data.get('message') or data.get('error') or data}"
-                )
-                continue
-            if (
-                data and "cep" in data
-            ):  # ViaCEP usa "cep", BrasilAPI usa "cep" também, mas a presença garante dado
-                return {
-                    "zip_code": zip_code,
-                    "street": data.get("logradouro", "") or data.get("street", ""),
-                    "neighborhood": data.get("bairro", "")
-                    or data.get("neighborhood", ""),
-                    "city": data.get("localidade", "") or data.get("city", ""),
-                    "state": data.get("uf", "") or data.get("state", ""),
-                }
-
-        except requests.RequestException as e:
-            logger.error(f"Erro ao consultar API {api_url} para CEP {zip_code}: {e}")
-        except Exception as e:
-            logger.error(
-                f"Erro inesperado ao processar resposta da API {api_url} para CEP {zip_code}: {e}"
-            )
+    peek = None
+    if not refresh:
+        cached_data = lookup_cache.get("cep", zip_code)
+        if cached_data is not MISSING:
+            return cached_data
+        peek = partial(lookup_cache.get, "cep", zip_code, count=False)
 
-    logger.warning(
-        f"Não foi possível obter dados para o CEP {zip_code} de nenhuma API."
+    return single_flight.do(
+        f"cep:{zip_code}", partial(_fetch_and_cache, "cep", zip_code, _fetch_address_data_from_apis), peek=peek
     )
+
+
+def _fetch_address_data_from_apis(zip_code: str) -> tuple[dict | None, bool]:
+    """
+    Consulta o CEP (já normalizado) nas APIs públicas, sem passar pelo cache.
+
+    Returns:
+        Uma tupla (dados, não_encontrado), com a mesma semântica de
+        `_fetch_company_data_from_apis`.
+    """
+    return _query_providers(CEP_PROVIDERS, "CEP", zip_code, _parse_address_payload)
+
+
+def _parse_address_payload(data: dict, zip_code: str) -> dict | None:
+    """
+    Converte a resposta de uma API de CEP para o dicionário padrão do sistema.
+
+    Returns:
+        O dicionário formatado, ou None se a resposta não tiver um formato conhecido.
+    """
+    # ViaCEP usa "cep", BrasilAPI usa "cep" também, mas a presença garante dado
+    if "cep" not in data:
+        return None
+    return {
+        "zip_code": zip_code,
+        "street": data.get("logradouro", "") or data.get("street", ""),
+        "neighborhood": data.get("bairro", "")
+        or data.get("neighborhood", ""),
+        "city": data.get("localidade", "") or data.get("city", ""),
+        "state": data.get("uf", "") or data.get("state", ""),
+    }
+
+
+def _query_providers(providers: list[str], label: str, key: str, parse) -> tuple[dict | None, bool]:
+    """
+    Consulta uma lista de APIs redundantes e retorna a primeira resposta válida.
+
+    A estratégia é definida por `LOOKUP_HEDGE_MODE`:
+    - "sequential" (padrão): uma API por vez, na ordem da lista.
+    - "hedged": a próxima API é disparada se a anterior não responder em
+      `LOOKUP_HEDGE_DELAY` segundos (ou falhar antes disso).
+    - "parallel": todas as APIs são disparadas ao mesmo tempo.
+
+    Provedores com o circuit breaker aberto são pulados sem nenhuma requisição.
+
+    Args:
+        providers: Templates das URLs (com o marcador `{key}`), em ordem de preferência.
+        label: "CEP" ou "CNPJ", usado nas mensagens de log.
+        key: Valor normalizado consultado.
+        parse: Função (dados_json, key) -> dict | None que normaliza a resposta.
+
+    Returns:
+        Uma tupla (dados, não_encontrado), como em `_fetch_company_data_from_apis`.
+    """
+    tasks = [partial(_query_provider, url_template, label, key, parse) for url_template in providers]
+    winner, results = first_successful(
+        tasks, is_success=lambda result: result[0] is not None, hedge_delay=_hedge_delay()
+    )
+    if winner:
+        return winner
+
+    logger.warning(f"Não foi possível obter dados para o {label} {key} de nenhuma API.")
+    all_not_found = len(results) == len(providers) and all(result[1] for result in results)
+    return None, all_not_found
+
+
+def _query_provider(url_template: str, label: str, key: str, parse) -> tuple[dict | None, bool]:
+    """
+    Consulta uma única API e normaliza a resposta, respeitando seu circuit breaker.
+
+    Nunca levanta exceções: erros de rede ou de formato são registrados no log
+    e retornados como (None, False). Respostas "não encontrado" contam como
+    sucesso para o circuit breaker, pois o provedor está respondendo. A
+    latência e o resultado de cada chamada são registrados em `core.lookup_metrics`.
+
+    Returns:
+        (dados, False) em caso de sucesso, (None, True) se a API responder que
+        a chave não existe, ou (None, False) em caso de falha ou circuito aberto.
+    """
+    breaker = provider_breaker(url_template)
+    if not breaker.allow_request():
+        logger.info(f"API {breaker.name} ignorada para {label} {key}: circuit breaker aberto.")
+        lookup_metrics.record_provider_call(breaker.name, "skipped")
+        return None, False
+
+    api_url = provider_url_template(url_template).format(key=key)
+    started = time.monotonic()
+    result, outcome = _request_provider(api_url, label, key, parse)
+    lookup_metrics.record_provider_call(breaker.name, outcome, time.monotonic() - started)
+
+    if outcome in ("success", "not_found"):
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    return result
+
+
+def _request_provider(api_url: str, label: str, key: str, parse) -> tuple[tuple[dict | None, bool], str]:
+    """
+    Executa a requisição a uma API e classifica o resultado.
+
+    Returns:
+        Uma tupla (resultado, desfecho), onde `resultado` segue o formato de
+        `_query_provider` e `desfecho` é um dos valores de
+        `core.lookup_metrics.PROVIDER_OUTCOMES`.
+    """
+    try:
+        response = provider_client.get(api_url)
+        if response.status_code == 404:
+            logger.info(f"API {api_url} não encontrou o {label} {key}.")
+            return (None, True), "not_found"
+        response.raise_for_status()  # Levanta HTTPError para bad responses (4xx ou 5xx)
+        data = response.json()
+
+        # Verifica se a API retornou um erro específico (ex: CEP/CNPJ not found)
+        if data and ("erro" in data or data.get("status") == "ERROR"):
+            logger.info(
+                f"API {api_url} retornou erro para {label} {key}: {data.get('message') or data.get('error') or data}"
+            )
+            return (None, True), "not_found"
+
+        if data:
+            parsed = parse(data, key)
+            if parsed:
+                return (parsed, False), "success"
+        logger.error(f"Resposta em formato desconhecido da API {api_url} para {label} {key}.")
+        return (None, False), "parse_error"
+
+    except requests.Timeout as e:
+        logger.error(f"Tempo esgotado ao consultar API {api_url} para {label} {key}: {e}")
+        outcome = "timeout"
+    except requests.HTTPError as e:
+        logger.error(f"Erro HTTP ao consultar API {api_url} para {label} {key}: {e}")
+        outcome = "http_error"
+    except requests.RequestException as e:
+        logger.error(f"Erro ao consultar API {api_url} para {label} {key}: {e}")
+        outcome = "connection_error"
+    except Exception as e:
+        logger.error(
+            f"Erro inesperado ao processar resposta da API {api_url} para {label} {key}: {e}"
+        )
+        outcome = "parse_error"
+    return (None, False), outcome
+
+
+def provider_url_template(url_template: str) -> str:
+    """
+    Retorna o template efetivo de um provedor, considerando `LOOKUP_PROVIDER_BASE_URL`.
+
+    Quando a configuração está definida (ex: "http://127.0.0.1:8765", servidor de
+    `manage.py run_fake_providers`), "https://viacep.com.br/ws/{key}/json/" vira
+    "http://127.0.0.1:8765/viacep.com.br/ws/{key}/json/".
+    """
+    base_url = getattr(settings, "LOOKUP_PROVIDER_BASE_URL", "")
+    if not base_url:
+        return url_template
+    parts = urlsplit(url_template)
+    return f"{base_url.rstrip('/')}/{parts.netloc}{parts.path}"
+
+
+def provider_breaker(url_template: str) -> CircuitBreaker:
+    """Retorna o circuit breaker do template efetivo de um provedor, nomeado pelo host original."""
+    return CircuitBreaker(provider_url_template(url_template), name=urlsplit(url_template).netloc)
+
+
+def provider_names() -> dict[str, list[str]]:
+    """Retorna os nomes (hosts) dos provedores de cada tipo de consulta, em ordem de preferência."""
+    return {
+        "cep": [urlsplit(template).netloc for template in CEP_PROVIDERS],
+        "cnpj": [urlsplit(template).netloc for template in CNPJ_PROVIDERS],
+    }
+
+
+def _hedge_delay() -> float | None:
+    """Converte `LOOKUP_HEDGE_MODE`/`LOOKUP_HEDGE_DELAY` no argumento de `first_successful`."""
+    mode = getattr(settings, "LOOKUP_HEDGE_MODE", "sequential")
+    if mode == "parallel":
+        return 0
+    if mode == "hedged":
+        return max(float(getattr(settings, "LOOKUP_HEDGE_DELAY", DEFAULT_HEDGE_DELAY)), 0.001)
     return None
@@ -0,0 +1,105 @@
+## Coalescência de consultas idênticas simultâneas ("single-flight").
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.lookup_cache import MISSING
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_TIMEOUT = 15  # segundos
+DEFAULT_WAIT_TIMEOUT = 8  # segundos
+POLL_INTERVAL = 0.1  # segundos
+
+
+class SingleFlight:
+    """
+    Garante que apenas uma consulta por chave esteja em andamento ao mesmo tempo.
+
+    - No mesmo processo: a primeira thread a pedir uma chave executa a
+      consulta; as demais aguardam o mesmo `Future` e recebem o mesmo
+      resultado (ou a mesma exceção).
+    - Entre processos: a thread que executa a consulta tenta reservar um lock
+      curto no cache do Django (`cache.add`). Se outro processo já tiver o
+      lock, ela aguarda o resultado aparecer no cache de consultas (via
+      `peek`) até o lock ser liberado ou `LOOKUP_SINGLEFLIGHT_WAIT_TIMEOUT`
+      segundos, e só então consulta por conta própria.
+
+    O lock expira sozinho após `LOOKUP_SINGLEFLIGHT_LOCK_TIMEOUT` segundos,
+    para que um processo que morra no meio da consulta não bloqueie a chave.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn, peek=None):
+        """
+        Executa `fn()` para a chave, coalescendo chamadas simultâneas.
+
+        Args:
+            key: Chave normalizada da consulta (ex: "cnpj:20612379000106").
+            fn: Callable sem argumentos que faz a consulta.
+            peek: Callable opcional sem argumentos que retorna o valor já
+                  disponível no cache compartilhado, ou `MISSING`. Sem ele, não
+                  há espera entre processos.
+
+        Returns:
+            O resultado de `fn()` (ou de `peek()`, se outro processo obteve o valor).
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._run_with_process_lock(key, fn, peek)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _run_with_process_lock(self, key, fn, peek):
+        if peek is None:
+            return fn()
+
+        lock_key = f"singleflight:{key}"
+        token = uuid.uuid4().hex
+        lock_timeout = float(getattr(settings, "LOOKUP_SINGLEFLIGHT_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT))
+        if cache.add(lock_key, token, timeout=lock_timeout):
+            try:
+                return fn()
+            finally:
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+
+        logger.debug(f"Consulta de {key} já em andamento em outro processo; aguardando o resultado.")
+        deadline = time.monotonic() + float(
+            getattr(settings, "LOOKUP_SINGLEFLIGHT_WAIT_TIMEOUT", DEFAULT_WAIT_TIMEOUT)
+        )
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            value = peek()
+            if value is not MISSING:
+                return value
+            if cache.get(lock_key) is None:
+                break
+        return fn()
+
+
+single_flight = SingleFlight()
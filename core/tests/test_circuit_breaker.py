@@ -0,0 +1,115 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from core.services import CEP_PROVIDERS, _fetch_address_data_from_apis
+
+PATH_PROVIDER_CLIENT = "core.services.provider_client"
+TEMPLATE = "https://viacep.com.br/ws/{key}/json/"
+ADDRESS_PAYLOAD = {"cep": "01001-000", "logradouro": "Praça da Sé", "bairro": "Sé",
+                   "localidade": "São Paulo", "uf": "SP"}
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """Testa as transições de estado do `CircuitBreaker`."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(TEMPLATE, failure_threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow_request())
+        self.assertEqual(breaker.stats()["opened_count"], 1)
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(TEMPLATE, failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_state_is_shared_between_instances(self):
+        """Instâncias diferentes (ex: outro processo) enxergam o mesmo estado via cache."""
+        CircuitBreaker(TEMPLATE, failure_threshold=1, reset_timeout=60).record_failure()
+        self.assertEqual(CircuitBreaker(TEMPLATE).state, OPEN)
+        self.assertEqual(CircuitBreaker("https://brasilapi.com.br/api/cep/v1/{key}").state, CLOSED)
+
+    def test_half_open_allows_a_single_probe(self):
+        breaker = CircuitBreaker(TEMPLATE, failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+    def test_probe_success_closes_and_failure_reopens(self):
+        breaker = CircuitBreaker(TEMPLATE, failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        breaker.allow_request()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.stats()["opened_count"], 2)
+
+        time.sleep(0.06)
+        breaker.allow_request()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.stats()["closed_count"], 1)
+
+
+@override_settings(LOOKUP_HEDGE_MODE="sequential", LOOKUP_BREAKER_FAILURE_THRESHOLD=2,
+                   LOOKUP_BREAKER_RESET_TIMEOUT=60)
+class CircuitBreakerServiceTests(SimpleTestCase):
+    """Testa a integração do circuit breaker com as consultas de `core.services`."""
+
+    def setUp(self):
+        cache.clear()
+
+    def _response(self, status_code, payload=None):
+        response = MagicMock(status_code=status_code)
+        response.json.return_value = payload or {}
+        return response
+
+    def test_failing_provider_is_skipped_once_open(self):
+        """Com o ViaCEP fora do ar, após o limite de falhas só a BrasilAPI é chamada."""
+        def fake_get(url):
+            if "viacep" in url:
+                raise requests.Timeout("timeout")
+            return self._response(200, ADDRESS_PAYLOAD)
+
+        with patch(PATH_PROVIDER_CLIENT) as mock_client:
+            mock_client.get.side_effect = fake_get
+            for _ in range(3):
+                data, _ = _fetch_address_data_from_apis("01001000")
+                self.assertEqual(data["city"], "São Paulo")
+
+        called_hosts = [call.args[0].split("/")[2] for call in mock_client.get.call_args_list]
+        self.assertEqual(called_hosts.count("viacep.com.br"), 2)
+        self.assertEqual(called_hosts.count("brasilapi.com.br"), 3)
+        self.assertEqual(CircuitBreaker(CEP_PROVIDERS[0]).state, OPEN)
+
+    def test_not_found_answers_do_not_open_the_circuit(self):
+        with patch(PATH_PROVIDER_CLIENT) as mock_client:
+            mock_client.get.return_value = self._response(404)
+            for _ in range(3):
+                self.assertEqual(_fetch_address_data_from_apis("99999999"), (None, True))
+        self.assertEqual(CircuitBreaker(CEP_PROVIDERS[0]).state, CLOSED)
+
+    def test_skipped_provider_prevents_negative_caching(self):
+        """Um provedor pulado não conta como "não encontrado"."""
+        CircuitBreaker(CEP_PROVIDERS[0]).record_failure()
+        CircuitBreaker(CEP_PROVIDERS[0]).record_failure()
+        with patch(PATH_PROVIDER_CLIENT) as mock_client:
+            mock_client.get.return_value = self._response(404)
+            self.assertEqual(_fetch_address_data_from_apis("99999999"), (None, False))
+        mock_client.get.assert_called_once()
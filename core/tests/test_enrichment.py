@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.customers.models import Customer
+from apps.suppliers.models import Supplier
+from core.enrichment import claim_jobs, run_job
+from core.lookup_cache import lookup_cache
+from core.models import EnrichmentJob
+
+PATH_FETCH_CUSTOMER = "apps.customers.models.fetch_company_data"
+PATH_FETCH_SUPPLIER = "apps.suppliers.models.fetch_company_data"
+PATH_FETCH_ENRICHMENT = "core.enrichment.fetch_company_data"
+
+CNPJ_VALID = "20612379000106"
+COMPANY_DATA = {
+    "full_name": "Empresa Enriquecida Ltda",
+    "preferred_name": "Enriquecida",
+    "zip_code": "01001000",
+    "street": "Praça Da Sé",
+    "number": "1",
+    "neighborhood": "Sé",
+    "city": "São Paulo",
+    "state": "SP",
+    "state_registration": "123456789",
+}
+
+
+class DeferredEnrichmentSaveTests(TestCase):
+    """Testa o salvamento de Clientes/Fornecedores PJ no modo diferido."""
+
+    def test_deferred_save_does_not_call_api_and_enqueues_job(self):
+        with patch(PATH_FETCH_CUSTOMER) as mock_fetch:
+            customer = Customer(customer_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID)
+            customer.save(defer_enrichment=True)
+        mock_fetch.assert_not_called()
+        job = EnrichmentJob.objects.get()
+        self.assertEqual((job.content_object, job.tax_id, job.status), (customer, CNPJ_VALID, "pending"))
+        self.assertTrue(job.update_address)
+
+    @override_settings(COMPANY_ENRICHMENT_MODE="deferred")
+    def test_setting_enables_deferred_mode_and_form_address_is_kept(self):
+        with patch(PATH_FETCH_SUPPLIER) as mock_fetch:
+            supplier = Supplier(supplier_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID)
+            supplier.save(address_data={"zip_code": "20040002", "street": "Rua A", "neighborhood": "Centro",
+                                        "city": "Rio De Janeiro", "state": "RJ"})
+        mock_fetch.assert_not_called()
+        self.assertFalse(EnrichmentJob.objects.get().update_address)
+
+    def test_resaving_reuses_pending_job(self):
+        customer = Customer(customer_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID)
+        customer.save(defer_enrichment=True)
+        customer.save(defer_enrichment=True)
+        self.assertEqual(EnrichmentJob.objects.count(), 1)
+
+    def test_sync_save_calls_api_only_once(self):
+        with patch(PATH_FETCH_CUSTOMER, return_value=None) as mock_fetch:
+            Customer(customer_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID).save()
+        mock_fetch.assert_called_once_with(CNPJ_VALID)
+        self.assertFalse(EnrichmentJob.objects.exists())
+
+
+class EnrichmentWorkerTests(TestCase):
+    """Testa o processamento das tarefas pela fila e pelo comando `process_enrichment_jobs`."""
+
+    def setUp(self):
+        lookup_cache.clear_local()
+        self.supplier = Supplier(supplier_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID)
+        self.supplier.save(defer_enrichment=True)
+
+    def test_worker_fills_company_data_and_address(self):
+        with patch(PATH_FETCH_ENRICHMENT, return_value=COMPANY_DATA):
+            call_command("process_enrichment_jobs", "--once", stdout=StringIO())
+
+        self.supplier.refresh_from_db()
+        self.assertEqual(self.supplier.full_name, "Empresa Enriquecida Ltda")
+        self.assertEqual(self.supplier.preferred_name, "Enriquecida")
+        self.assertEqual(self.supplier.state_registration, "123456789")
+        self.assertEqual(self.supplier.address.city, "São Paulo")
+        job = EnrichmentJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ("done", 1))
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(ENRICHMENT_MAX_ATTEMPTS=2, ENRICHMENT_RETRY_DELAY=60)
+    def test_api_failure_is_retried_then_failed(self):
+        with patch(PATH_FETCH_ENRICHMENT, return_value=None):
+            [job] = claim_jobs()
+            self.assertFalse(run_job(job))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ("pending", 1))
+            self.assertGreater(job.available_at, timezone.now() + timedelta(seconds=30))
+            self.assertEqual(claim_jobs(), [])  # Ainda não disponível
+
+            EnrichmentJob.objects.update(available_at=timezone.now())
+            [job] = claim_jobs()
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 2))
+
+    def test_cnpj_not_found_fails_without_retry(self):
+        lookup_cache.set("cnpj", CNPJ_VALID, None)
+        with patch(PATH_FETCH_ENRICHMENT, return_value=None):
+            [job] = claim_jobs()
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 1))
+
+    def test_stale_running_job_is_reclaimed(self):
+        EnrichmentJob.objects.update(status="running", updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(len(claim_jobs()), 1)
+
+    def test_status_option(self):
+        out = StringIO()
+        call_command("process_enrichment_jobs", "--status", stdout=out)
+        self.assertIn("Pendente: 1", out.getvalue())
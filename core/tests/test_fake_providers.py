@@ -0,0 +1,89 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from core import lookup_metrics
+from core.fake_providers import FakeProviderConfig, FakeProviderServer
+from core.lookup_cache import lookup_cache
+from core.models import LookupCacheEntry
+from core.services import fetch_address_data, fetch_company_data
+
+CNPJ_FIXTURE = "20612379000106"
+
+
+class FakeProviderIntegrationTests(TestCase):
+    """Testa `core.services` de ponta a ponta contra o servidor local de provedores falsos."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeProviderServer(config=FakeProviderConfig(seed=1)).start()
+        cls.settings_override = override_settings(
+            LOOKUP_PROVIDER_BASE_URL=cls.server.url,
+            LOOKUP_HEDGE_MODE="sequential",
+            LOOKUP_HTTP_READ_TIMEOUT=0.3,
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        lookup_cache.clear_local()
+        config = self.server.config
+        config.latency = 0
+        config.provider_latency = {}
+        config.provider_error_rate = {}
+        config.request_counts.clear()
+
+    def test_address_lookup_uses_viacep_shape(self):
+        data = fetch_address_data("01001-000")
+        self.assertEqual(data["city"], "São Paulo")
+        self.assertEqual(data["street"], "Praça da Sé")
+        self.assertEqual(self.server.request_counts, {"viacep.com.br": 1})
+
+    def test_company_lookup_uses_cnpja_shape(self):
+        data = fetch_company_data(CNPJ_FIXTURE)
+        self.assertEqual(data["full_name"], "Empresa Ficticia Ltda")
+        self.assertEqual(data["state_registration"], "110042490114")
+        self.assertEqual(data["city"], "Sao Paulo")
+
+    def test_falls_back_to_cnpjws_when_cnpja_fails(self):
+        self.server.config.provider_error_rate = {"open.cnpja.com": 1}
+        data = fetch_company_data(CNPJ_FIXTURE)
+        self.assertEqual(data["full_name"], "Empresa Ficticia Ltda")
+        self.assertEqual(data["state_registration"], "110042490114")
+        self.assertEqual(self.server.request_counts["publica.cnpj.ws"], 1)
+
+    def test_not_found_is_negatively_cached(self):
+        self.assertIsNone(fetch_address_data("99999999"))
+        self.assertTrue(LookupCacheEntry.objects.filter(kind="cep", key="99999999", found=False).exists())
+
+    def test_slow_provider_times_out_and_falls_back(self):
+        self.server.config.provider_latency = {"viacep.com.br": 1.0}
+        data = fetch_address_data("20040002")
+        self.assertEqual(data["city"], "Rio de Janeiro")
+        stats = lookup_metrics.snapshot(["viacep.com.br", "brasilapi.com.br"], [])["providers"]
+        self.assertEqual(stats["viacep.com.br"]["outcomes"]["timeout"], 1)
+        self.assertEqual(stats["brasilapi.com.br"]["outcomes"]["success"], 1)
+
+    def test_synthetic_keys_and_benchmark_command(self):
+        out = StringIO()
+        with patch.object(lookup_cache, "set") as cache_set:
+            call_command("benchmark_lookups", "--kind", "cep", "--requests", "10", "--concurrency", "2", stdout=out)
+        self.assertIn("10 consulta(s) de CEP", out.getvalue())
+        self.assertIn("10 com dados", out.getvalue())
+        cache_set.assert_not_called()  # Dados sintéticos não chegam ao cache de consultas
+
+    def test_benchmark_refuses_real_apis_without_live_flag(self):
+        with override_settings(LOOKUP_PROVIDER_BASE_URL=""):
+            with self.assertRaises(CommandError):
+                call_command("benchmark_lookups", "--requests", "1", stdout=StringIO())
+        self.assertEqual(self.server.request_counts, {})
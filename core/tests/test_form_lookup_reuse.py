@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.customers.models import Customer
+from apps.suppliers.models import Supplier
+from core.lookup_cache import lookup_cache
+
+PATH_FETCH_COMPANY_APIS = "core.services._fetch_company_data_from_apis"
+
+CNPJ_VALID = "20612379000106"
+COMPANY_DATA = {
+    "full_name": "Empresa Do Formulario Ltda",
+    "preferred_name": "Formulario",
+    "zip_code": "01001000",
+    "street": "Praça Da Sé",
+    "number": "1",
+    "neighborhood": "Sé",
+    "city": "São Paulo",
+    "state": "SP",
+    "state_registration": "",
+}
+
+
+class FormLookupReuseTests(TestCase):
+    """Testa que o save reaproveita a consulta de CNPJ feita pelo formulário."""
+
+    def setUp(self):
+        lookup_cache.clear_local()
+
+    def _search_cnpj(self, url_name, **params):
+        response = self.client.get(reverse(url_name), {"tax_id": "20.612.379/0001-06", **params})
+        self.assertEqual(response.status_code, 200)
+        # Simula o POST do formulário atendido por outro processo (sem a LRU local)
+        lookup_cache.clear_local()
+
+    def test_customer_save_reuses_form_lookup(self):
+        with patch(PATH_FETCH_COMPANY_APIS, return_value=(COMPANY_DATA, False)) as mock_apis:
+            self._search_cnpj("customers:search_cnpj")
+            Customer(customer_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID).save()
+        mock_apis.assert_called_once_with(CNPJ_VALID)
+        self.assertEqual(Customer.objects.get().full_name, "Empresa Do Formulario Ltda")
+
+    def test_supplier_save_reuses_form_lookup(self):
+        with patch(PATH_FETCH_COMPANY_APIS, return_value=(COMPANY_DATA, False)) as mock_apis:
+            self._search_cnpj("suppliers:search_cnpj")
+            Supplier(supplier_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID).save()
+        mock_apis.assert_called_once_with(CNPJ_VALID)
+
+    def test_refresh_company_data_forces_new_lookup(self):
+        updated = dict(COMPANY_DATA, preferred_name="Atualizada")
+        with patch(PATH_FETCH_COMPANY_APIS, side_effect=[(COMPANY_DATA, False), (updated, False)]) as mock_apis:
+            self._search_cnpj("customers:search_cnpj")
+            customer = Customer(customer_type="CORP", full_name="Digitado", tax_id=CNPJ_VALID)
+            customer.save(refresh_company_data=True)
+        self.assertEqual(mock_apis.call_count, 2)
+        self.assertEqual(Customer.objects.get().preferred_name, "Atualizada")
+
+    def test_search_endpoint_refresh_parameter(self):
+        with patch(PATH_FETCH_COMPANY_APIS, return_value=(COMPANY_DATA, False)) as mock_apis:
+            self._search_cnpj("customers:search_cnpj")
+            self._search_cnpj("customers:search_cnpj")
+            self._search_cnpj("customers:search_cnpj", refresh="1")
+        self.assertEqual(mock_apis.call_count, 2)
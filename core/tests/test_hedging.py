@@ -0,0 +1,113 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.hedging import first_successful
+from core.services import _fetch_address_data_from_apis
+
+PATH_PROVIDER_CLIENT = "core.services.provider_client"
+
+
+def _slow(result, seconds, calls=None, name=None):
+    """Cria uma tarefa que demora `seconds` e registra a chamada em `calls`."""
+    def task():
+        if calls is not None:
+            calls.append(name)
+        time.sleep(seconds)
+        return result
+    return task
+
+
+def _is_success(result):
+    return result is not None
+
+
+class FirstSuccessfulTests(SimpleTestCase):
+    """Testa as estratégias sequencial, hedged e paralela de `first_successful`."""
+
+    def test_sequential_stops_at_first_success(self):
+        calls = []
+        winner, results = first_successful(
+            [_slow(None, 0, calls, "a"), _slow("b", 0, calls, "b"), _slow("c", 0, calls, "c")],
+            _is_success,
+        )
+        self.assertEqual(winner, "b")
+        self.assertEqual(results, [None, "b"])
+        self.assertEqual(calls, ["a", "b"])
+
+    def test_hedged_fires_secondary_when_primary_is_slow(self):
+        """Com o primário lento, o secundário é disparado após o atraso e vence."""
+        started = time.monotonic()
+        winner, _ = first_successful(
+            [_slow("primary", 1.0), _slow("secondary", 0)], _is_success, hedge_delay=0.05
+        )
+        self.assertEqual(winner, "secondary")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_hedged_does_not_fire_secondary_when_primary_is_fast(self):
+        calls = []
+        winner, _ = first_successful(
+            [_slow("primary", 0, calls, "primary"), _slow("secondary", 0, calls, "secondary")],
+            _is_success,
+            hedge_delay=0.5,
+        )
+        self.assertEqual(winner, "primary")
+        self.assertEqual(calls, ["primary"])
+
+    def test_hedged_fires_secondary_immediately_when_primary_fails(self):
+        started = time.monotonic()
+        winner, results = first_successful(
+            [_slow(None, 0), _slow("secondary", 0)], _is_success, hedge_delay=5
+        )
+        self.assertEqual(winner, "secondary")
+        self.assertEqual(results, [None, "secondary"])
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_parallel_starts_all_tasks_at_once(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        def task(result):
+            def run():
+                barrier.wait()  # Só passa se as duas tarefas estiverem rodando juntas
+                return result
+            return run
+
+        winner, _ = first_successful([task("a"), task("b")], _is_success, hedge_delay=0)
+        self.assertIn(winner, ("a", "b"))
+
+    def test_returns_none_when_all_fail(self):
+        winner, results = first_successful([_slow(None, 0), _slow(None, 0)], _is_success, hedge_delay=0.01)
+        self.assertIsNone(winner)
+        self.assertEqual(results, [None, None])
+
+
+@override_settings(LOOKUP_HEDGE_MODE="parallel")
+class HedgedServiceTests(SimpleTestCase):
+    """Testa a agregação dos resultados dos provedores em `core.services`."""
+
+    def setUp(self):
+        cache.clear()  # Zera o estado dos circuit breakers
+
+    def _response(self, status_code, payload=None):
+        response = MagicMock(status_code=status_code)
+        response.json.return_value = payload or {}
+        return response
+
+    def test_all_providers_not_found_is_reported(self):
+        with patch(PATH_PROVIDER_CLIENT) as mock_client:
+            mock_client.get.side_effect = [self._response(200, {"erro": True}), self._response(404)]
+            self.assertEqual(_fetch_address_data_from_apis("99999999"), (None, True))
+
+    def test_first_valid_answer_wins(self):
+        payload = {"cep": "01001-000", "logradouro": "Praça da Sé", "bairro": "Sé",
+                   "localidade": "São Paulo", "uf": "SP"}
+        with patch(PATH_PROVIDER_CLIENT) as mock_client:
+            mock_client.get.side_effect = lambda url: (
+                self._response(200, payload) if "viacep" in url else self._response(500)
+            )
+            data, not_found = _fetch_address_data_from_apis("01001000")
+        self.assertFalse(not_found)
+        self.assertEqual(data["city"], "São Paulo")
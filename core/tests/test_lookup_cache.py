@@ -0,0 +1,184 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.lookup_cache import MISSING, LookupCache, lookup_cache
+from core.models import LookupCacheEntry
+from core.services import fetch_address_data, fetch_company_data
+
+PATH_FETCH_COMPANY_APIS = "core.services._fetch_company_data_from_apis"
+PATH_FETCH_ADDRESS_APIS = "core.services._fetch_address_data_from_apis"
+
+CNPJ_VALID = "20612379000106"
+COMPANY_DATA = {
+    "full_name": "Empresa Cache Ltda",
+    "preferred_name": "Cache",
+    "zip_code": "01001000",
+    "street": "Praça Da Sé",
+    "number": "1",
+    "neighborhood": "Sé",
+    "city": "São Paulo",
+    "state": "SP",
+    "state_registration": "",
+}
+ADDRESS_DATA = {
+    "zip_code": "01001000",
+    "street": "Praça da Sé",
+    "neighborhood": "Sé",
+    "city": "São Paulo",
+    "state": "SP",
+}
+
+
+class LookupCacheServiceTests(TestCase):
+    """Testa o cache de consultas usado por `fetch_company_data` e `fetch_address_data`."""
+
+    def setUp(self):
+        lookup_cache.clear_local()
+
+    def test_company_lookup_is_cached_after_first_call(self):
+        """A segunda consulta ao mesmo CNPJ não deve chamar as APIs."""
+        with patch(PATH_FETCH_COMPANY_APIS, return_value=(COMPANY_DATA, False)) as mock_apis:
+            self.assertEqual(fetch_company_data("20.612.379/0001-06"), COMPANY_DATA)
+            self.assertEqual(fetch_company_data(CNPJ_VALID), COMPANY_DATA)
+        mock_apis.assert_called_once_with(CNPJ_VALID)
+        self.assertTrue(LookupCacheEntry.objects.filter(kind="cnpj", key=CNPJ_VALID, found=True).exists())
+
+    def test_database_tier_is_shared_when_local_tier_is_empty(self):
+        """Simula outro processo: sem LRU local, o valor vem da tabela."""
+        with patch(PATH_FETCH_ADDRESS_APIS, return_value=(ADDRESS_DATA, False)) as mock_apis:
+            fetch_address_data("01001-000")
+            lookup_cache.clear_local()
+            self.assertEqual(fetch_address_data("01001000"), ADDRESS_DATA)
+        mock_apis.assert_called_once()
+        self.assertEqual(lookup_cache.stats()["cep"], {"db_hits": 1})
+
+    def test_not_found_answer_is_negatively_cached(self):
+        """Respostas "não encontrado" de todas as APIs são cacheadas como None."""
+        with patch(PATH_FETCH_ADDRESS_APIS, return_value=(None, True)) as mock_apis:
+            self.assertIsNone(fetch_address_data("99999999"))
+            self.assertIsNone(fetch_address_data("99999999"))
+        mock_apis.assert_called_once()
+        entry = LookupCacheEntry.objects.get(kind="cep", key="99999999")
+        self.assertFalse(entry.found)
+        self.assertIsNone(entry.data)
+
+    def test_provider_failure_is_not_cached(self):
+        """Falhas de rede/API não podem ser confundidas com "não encontrado"."""
+        with patch(PATH_FETCH_COMPANY_APIS, return_value=(None, False)) as mock_apis:
+            fetch_company_data(CNPJ_VALID)
+            fetch_company_data(CNPJ_VALID)
+        self.assertEqual(mock_apis.call_count, 2)
+        self.assertFalse(LookupCacheEntry.objects.exists())
+
+    def test_refresh_bypasses_cached_value(self):
+        """`refresh=True` consulta as APIs novamente e atualiza o cache."""
+        updated = dict(COMPANY_DATA, preferred_name="Nova Fantasia")
+        with patch(PATH_FETCH_COMPANY_APIS, side_effect=[(COMPANY_DATA, False), (updated, False)]):
+            fetch_company_data(CNPJ_VALID)
+            self.assertEqual(fetch_company_data(CNPJ_VALID, refresh=True), updated)
+        self.assertEqual(fetch_company_data(CNPJ_VALID), updated)
+
+    def test_expired_database_entry_is_a_miss(self):
+        """Registros expirados na tabela não são usados."""
+        LookupCacheEntry.objects.create(
+            kind="cep", key="01001000", data=ADDRESS_DATA,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        with patch(PATH_FETCH_ADDRESS_APIS, return_value=(ADDRESS_DATA, False)) as mock_apis:
+            fetch_address_data("01001000")
+        mock_apis.assert_called_once()
+
+
+    @override_settings(LOOKUP_SINGLEFLIGHT_WAIT_TIMEOUT=2)
+    def test_waiting_for_another_process_counts_a_single_miss(self):
+        """As leituras de espera da coalescência entre processos não entram nas estatísticas."""
+        lock_key = f"singleflight:cep:{ADDRESS_DATA['zip_code']}"
+        cache.add(lock_key, "outro-processo")
+        self.addCleanup(cache.delete, lock_key)
+        threading.Timer(
+            0.5, lambda: lookup_cache._set_local("cep", ADDRESS_DATA["zip_code"], ADDRESS_DATA, 60)
+        ).start()
+
+        with patch(PATH_FETCH_ADDRESS_APIS) as mock_apis:
+            self.assertEqual(fetch_address_data(ADDRESS_DATA["zip_code"]), ADDRESS_DATA)
+
+        mock_apis.assert_not_called()
+        self.assertEqual(lookup_cache.stats()["cep"], {"misses": 1})
+
+
+class LookupCacheLocalTierTests(TestCase):
+    """Testa a LRU em memória do `LookupCache` isoladamente."""
+
+    def test_local_tier_is_bounded(self):
+        """A LRU descarta a chave menos usada quando atinge o tamanho máximo."""
+        cache = LookupCache(local_max_size=2)
+        cache.set("cep", "00000001", {"city": "A"})
+        cache.set("cep", "00000002", {"city": "B"})
+        cache.get("cep", "00000001")  # Torna "00000001" a mais recente
+        cache.set("cep", "00000003", {"city": "C"})
+
+        self.assertEqual(set(cache._local), {("cep", "00000001"), ("cep", "00000003")})
+
+    def test_local_tier_respects_ttl(self):
+        """Entradas locais expiram após o TTL local, voltando a consultar a tabela."""
+        cache = LookupCache(local_ttl=0)
+        cache.set("cep", "00000001", {"city": "A"})
+        self.assertEqual(cache.get("cep", "00000001"), {"city": "A"})
+        self.assertEqual(cache.stats()["cep"], {"db_hits": 1})
+
+    def test_uncounted_reads(self):
+        """Leituras com `count=False` não alteram as estatísticas."""
+        cache = LookupCache()
+        cache.get("cep", "00000001", count=False)
+        cache.set("cep", "00000001", {"city": "A"})
+        self.assertEqual(cache.get("cep", "00000001", count=False), {"city": "A"})
+        self.assertEqual(cache.stats(), {})
+
+    def test_missing_key_returns_sentinel(self):
+        """Chaves ausentes retornam `MISSING`, distinto de um None em cache."""
+        cache = LookupCache()
+        self.assertIs(cache.get("cnpj", CNPJ_VALID), MISSING)
+        cache.set("cnpj", CNPJ_VALID, None)
+        self.assertIsNone(cache.get("cnpj", CNPJ_VALID))
+
+
+class LookupCacheCommandTests(TestCase):
+    """Testa o comando de gerenciamento `lookup_cache`."""
+
+    def setUp(self):
+        lookup_cache.clear_local()
+        now = timezone.now()
+        LookupCacheEntry.objects.create(
+            kind="cep", key="01001000", data=ADDRESS_DATA, expires_at=now + timedelta(days=1)
+        )
+        LookupCacheEntry.objects.create(
+            kind="cep", key="99999999", found=False, expires_at=now - timedelta(days=1)
+        )
+        LookupCacheEntry.objects.create(
+            kind="cnpj", key=CNPJ_VALID, data=COMPANY_DATA, expires_at=now - timedelta(days=1)
+        )
+
+    def test_purge_removes_only_expired_entries(self):
+        out = StringIO()
+        call_command("lookup_cache", "--purge", stdout=out)
+        self.assertIn("2 registro(s) removido(s)", out.getvalue())
+        self.assertEqual(list(LookupCacheEntry.objects.values_list("key", flat=True)), ["01001000"])
+
+    def test_purge_all_with_kind(self):
+        call_command("lookup_cache", "--purge-all", "--kind", "cep", stdout=StringIO())
+        self.assertEqual(list(LookupCacheEntry.objects.values_list("kind", flat=True)), ["cnpj"])
+
+    def test_refresh_expired_refetches_keys(self):
+        with patch(PATH_FETCH_ADDRESS_APIS, return_value=(None, True)) as mock_cep, \
+                patch(PATH_FETCH_COMPANY_APIS, return_value=(COMPANY_DATA, False)) as mock_cnpj:
+            call_command("lookup_cache", "--refresh-expired", stdout=StringIO())
+        mock_cep.assert_called_once_with("99999999")
+        mock_cnpj.assert_called_once_with(CNPJ_VALID)
+        self.assertFalse(LookupCacheEntry.objects.filter(expires_at__lte=timezone.now()).exists())
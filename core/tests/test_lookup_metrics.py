@@ -0,0 +1,129 @@
+import json
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import lookup_metrics
+from core.lookup_cache import lookup_cache
+from core.services import _fetch_address_data_from_apis
+
+PATH_PROVIDER_CLIENT = "core.services.provider_client"
+ADDRESS_PAYLOAD = {"cep": "01001-000", "logradouro": "Praça da Sé", "bairro": "Sé",
+                   "localidade": "São Paulo", "uf": "SP"}
+
+
+def _response(status_code, payload=None):
+    response = MagicMock(status_code=status_code)
+    response.json.return_value = payload or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(f"{status_code}")
+    return response
+
+
+@override_settings(LOOKUP_HEDGE_MODE="sequential")
+class ProviderMetricsTests(SimpleTestCase):
+    """Testa o registro de desfechos e latências por provedor em `core.services`."""
+
+    def setUp(self):
+        cache.clear()
+
+    def _snapshot(self):
+        return lookup_metrics.snapshot(["viacep.com.br", "brasilapi.com.br"], ["cep"])
+
+    def test_outcomes_are_classified_per_provider(self):
+        responses = {
+            "viacep.com.br": [requests.Timeout("t"), _response(503), _response(200, {"x": 1}), _response(404)],
+            "brasilapi.com.br": [_response(200, ADDRESS_PAYLOAD)] * 3 + [_response(404)],
+        }
+
+        def fake_get(url):
+            result = responses[url.split("/")[2]].pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with patch(PATH_PROVIDER_CLIENT) as mock_client:
+            mock_client.get.side_effect = fake_get
+            for _ in range(4):
+                _fetch_address_data_from_apis("01001000")
+
+        viacep = self._snapshot()["providers"]["viacep.com.br"]
+        self.assertEqual(
+            {k: v for k, v in viacep["outcomes"].items() if v},
+            {"timeout": 1, "http_error": 1, "parse_error": 1, "not_found": 1},
+        )
+        self.assertEqual(viacep["errors"], 3)
+        self.assertEqual(viacep["latency"]["count"], 4)
+        self.assertEqual(self._snapshot()["providers"]["brasilapi.com.br"]["outcomes"]["success"], 3)
+
+    def test_latency_histogram_and_percentiles(self):
+        for elapsed in (0.01, 0.02, 0.3, 6):
+            lookup_metrics.record_provider_call("viacep.com.br", "success", elapsed)
+        latency = self._snapshot()["providers"]["viacep.com.br"]["latency"]
+        self.assertEqual(latency["buckets_ms"]["50"], 2)
+        self.assertEqual(latency["buckets_ms"]["500"], 1)
+        self.assertEqual(latency["buckets_ms"]["10000"], 1)
+        self.assertEqual(latency["p50_ms"], 50)
+        self.assertEqual(latency["p95_ms"], 10000)
+        self.assertEqual(latency["sum_ms"], 6330)
+
+    @override_settings(LOOKUP_METRICS_ENABLED=False)
+    def test_disabled_metrics_are_not_recorded(self):
+        lookup_metrics.record_provider_call("viacep.com.br", "success", 0.1)
+        self.assertEqual(self._snapshot()["providers"]["viacep.com.br"]["latency"]["count"], 0)
+
+
+class LookupStatsEndpointTests(TestCase):
+    """Testa o endpoint de métricas, o comando `lookup_stats` e a taxa de acerto do cache."""
+
+    def setUp(self):
+        cache.clear()
+        lookup_cache.clear_local()
+
+    def test_cache_hit_ratio(self):
+        lookup_cache.get("cep", "01001000")  # miss
+        lookup_cache.set("cep", "01001000", {"city": "São Paulo"})
+        lookup_cache.get("cep", "01001000")  # acerto em memória
+        lookup_cache.clear_local()
+        lookup_cache.get("cep", "01001000")  # acerto no banco
+        lookup_cache.get("cep", "01001000")  # acerto em memória
+        stats = lookup_metrics.snapshot([], ["cep"])["cache"]["cep"]
+        self.assertEqual((stats["local_hits"], stats["db_hits"], stats["misses"]), (2, 1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.75)
+
+    def test_endpoint_is_staff_only(self):
+        response = self.client.get(reverse("lookup_metrics"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_endpoint_json_and_text(self):
+        staff = get_user_model().objects.create_user(username="staff", password="x", is_staff=True)
+        self.client.force_login(staff)
+        lookup_metrics.record_provider_call("viacep.com.br", "timeout", 3.1)
+
+        data = self.client.get(reverse("lookup_metrics")).json()
+        self.assertEqual(data["providers"]["viacep.com.br"]["outcomes"]["timeout"], 1)
+        self.assertIn("cnpj", data["cache"])
+
+        text = self.client.get(reverse("lookup_metrics"), {"format": "text"}).content.decode()
+        self.assertIn('lookup_provider_requests_total{provider="viacep.com.br",outcome="timeout"} 1', text)
+        self.assertIn('lookup_provider_latency_ms_bucket{provider="viacep.com.br",le="+Inf"} 1', text)
+
+    def test_lookup_stats_command(self):
+        lookup_metrics.record_provider_call("publica.cnpj.ws", "success", 0.2)
+        out = StringIO()
+        call_command("lookup_stats", "--json", "--reset", stdout=out)
+        payload = out.getvalue().rsplit("}", 1)[0] + "}"
+        data = json.loads(payload)
+        self.assertEqual(data["providers"]["publica.cnpj.ws"]["outcomes"]["success"], 1)
+        self.assertEqual(data["providers"]["publica.cnpj.ws"]["circuit_breaker"], "closed")
+        self.assertEqual(lookup_metrics.snapshot(["publica.cnpj.ws"], [])["providers"]["publica.cnpj.ws"]["latency"]["count"], 0)
+
+        out = StringIO()
+        call_command("lookup_stats", stdout=out)
+        self.assertIn("publica.cnpj.ws [closed]", out.getvalue())
@@ -0,0 +1,89 @@
+import threading
+from unittest.mock import Mock, patch
+
+import requests
+
+from django.test import SimpleTestCase, override_settings
+
+from core.provider_client import ProviderClient
+
+
+class ProviderClientTests(SimpleTestCase):
+    """Testa o pool de sessões HTTP por provedor."""
+
+    def setUp(self):
+        self.client_http = ProviderClient()
+        self.addCleanup(self.client_http.close)
+
+    def test_session_is_reused_per_host(self):
+        """URLs do mesmo host compartilham a sessão; hosts diferentes não."""
+        first = self.client_http.session_for("https://viacep.com.br/ws/01001000/json/")
+        second = self.client_http.session_for("https://viacep.com.br/ws/20040002/json/")
+        other = self.client_http.session_for("https://brasilapi.com.br/api/cep/v1/01001000")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    @override_settings(
+        LOOKUP_HTTP_MAX_RETRIES=3,
+        LOOKUP_HTTP_MAX_CONNECTIONS=4,
+        LOOKUP_HTTP_HOST_MAX_CONNECTIONS={"open.cnpja.com": 2},
+    )
+    def test_adapter_applies_retry_and_connection_limits(self):
+        """O adapter montado respeita retries e limites de conexão por host."""
+        viacep = self.client_http.session_for("https://viacep.com.br/ws/01001000/json/")
+        cnpja = self.client_http.session_for("https://open.cnpja.com/office/20612379000106")
+
+        viacep_adapter = viacep.get_adapter("https://viacep.com.br/")
+        cnpja_adapter = cnpja.get_adapter("https://open.cnpja.com/")
+
+        self.assertEqual(viacep_adapter.max_retries.total, 3)
+        self.assertEqual(viacep_adapter.max_retries.read, 0)
+        self.assertIn(503, viacep_adapter.max_retries.status_forcelist)
+        self.assertEqual(viacep_adapter._pool_maxsize, 4)
+        self.assertFalse(viacep_adapter._pool_block)
+        self.assertEqual(cnpja_adapter._pool_maxsize, 2)
+
+    @override_settings(LOOKUP_HTTP_CONNECT_TIMEOUT=1.5, LOOKUP_HTTP_READ_TIMEOUT=4)
+    def test_get_uses_configured_timeouts(self):
+        """Sem `timeout` explícito, o GET usa os timeouts de conexão/leitura configurados."""
+        url = "https://viacep.com.br/ws/01001000/json/"
+        session = self.client_http.session_for(url)
+        with patch.object(session, "get") as mock_get:
+            self.client_http.get(url)
+        mock_get.assert_called_once_with(url, timeout=(1.5, 4.0))
+
+    @override_settings(LOOKUP_HTTP_MAX_RETRY_AFTER=1.5)
+    def test_retry_after_is_capped(self):
+        """Um `Retry-After` longo do provedor é limitado a `LOOKUP_HTTP_MAX_RETRY_AFTER`."""
+        session = self.client_http.session_for("https://viacep.com.br/ws/01001000/json/")
+        retry = session.get_adapter("https://viacep.com.br/").max_retries
+        response = Mock(headers={"Retry-After": "3600"}, status=503)
+
+        self.assertEqual(retry.get_retry_after(response), 1.5)
+        self.assertEqual(retry.increment(response=response).get_retry_after(response), 1.5)
+        self.assertEqual(retry.get_retry_after(Mock(headers={"Retry-After": "1"}, status=429)), 1)
+
+    @override_settings(LOOKUP_HTTP_MAX_CONNECTIONS=1, LOOKUP_HTTP_POOL_TIMEOUT=0.05)
+    def test_saturated_host_fails_after_pool_timeout(self):
+        """Com o limite do host atingido, a consulta falha após `LOOKUP_HTTP_POOL_TIMEOUT` em vez de bloquear."""
+        url = "https://viacep.com.br/ws/01001000/json/"
+        session = self.client_http.session_for(url)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_get(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return Mock(status_code=200)
+
+        with patch.object(session, "get", side_effect=slow_get):
+            worker = threading.Thread(target=self.client_http.get, args=(url,))
+            worker.start()
+            started.wait(5)
+            try:
+                with self.assertRaises(requests.ConnectionError):
+                    self.client_http.get(url)
+            finally:
+                release.set()
+                worker.join(5)
+            self.client_http.get(url)  # A conexão liberada volta a ficar disponível
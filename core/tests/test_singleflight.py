@@ -0,0 +1,127 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.lookup_cache import MISSING
+from core.services import fetch_address_data, fetch_company_data
+from core.singleflight import SingleFlight
+
+PATH_FETCH_COMPANY_APIS = "core.services._fetch_company_data_from_apis"
+PATH_FETCH_ADDRESS_APIS = "core.services._fetch_address_data_from_apis"
+PATH_LOOKUP_CACHE = "core.services.lookup_cache"
+
+CNPJ_VALID = "20612379000106"
+THREADS = 20
+
+
+def _run_concurrently(target, count=THREADS):
+    """Dispara `count` threads que chamam `target` ao mesmo tempo e retorna os resultados."""
+    barrier = threading.Barrier(count, timeout=5)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        results[index] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def _slow_upstream(result, seconds=0.2):
+    def fetch(key):
+        time.sleep(seconds)
+        return result
+    return MagicMock(side_effect=fetch)
+
+
+class SingleFlightServiceTests(SimpleTestCase):
+    """Testa que consultas simultâneas à mesma chave geram uma única chamada às APIs."""
+
+    def setUp(self):
+        cache.clear()
+        # Cache de consultas sempre vazio: isola o teste da coalescência do cache em si
+        patcher = patch(PATH_LOOKUP_CACHE)
+        self.mock_lookup_cache = patcher.start()
+        self.mock_lookup_cache.get.return_value = MISSING
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_company_lookups_call_upstream_once(self):
+        upstream = _slow_upstream(({"full_name": "Empresa"}, False))
+        with patch(PATH_FETCH_COMPANY_APIS, upstream):
+            results = _run_concurrently(lambda: fetch_company_data("20.612.379/0001-06"))
+        upstream.assert_called_once_with(CNPJ_VALID)
+        self.assertEqual(results, [{"full_name": "Empresa"}] * THREADS)
+
+    def test_concurrent_address_lookups_call_upstream_once(self):
+        upstream = _slow_upstream(({"city": "São Paulo"}, False))
+        with patch(PATH_FETCH_ADDRESS_APIS, upstream):
+            results = _run_concurrently(lambda: fetch_address_data("01001-000"))
+        upstream.assert_called_once_with("01001000")
+        self.assertEqual(results, [{"city": "São Paulo"}] * THREADS)
+
+    def test_different_keys_are_not_coalesced(self):
+        upstream = _slow_upstream((None, True), seconds=0.05)
+        with patch(PATH_FETCH_ADDRESS_APIS, upstream):
+            _run_concurrently(lambda: fetch_address_data("01001000"), count=2)
+            _run_concurrently(lambda: fetch_address_data("20040002"), count=2)
+        self.assertEqual(upstream.call_count, 2)
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Testa o `SingleFlight` isoladamente."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_exception_is_shared_by_waiting_callers(self):
+        flight = SingleFlight()
+        calls = []
+
+        def failing():
+            calls.append(1)
+            time.sleep(0.1)
+            raise RuntimeError("falhou")
+
+        def call():
+            try:
+                flight.do("key", failing)
+            except RuntimeError as e:
+                return str(e)
+
+        self.assertEqual(_run_concurrently(call, count=5), ["falhou"] * 5)
+        self.assertEqual(len(calls), 1)
+
+    @override_settings(LOOKUP_SINGLEFLIGHT_WAIT_TIMEOUT=2)
+    def test_waits_for_value_fetched_by_another_process(self):
+        """Com o lock reservado por outro processo, aguarda o valor aparecer no cache."""
+        cache.add("singleflight:cep:01001000", "outro-processo")
+        shared = {"value": MISSING}
+        threading.Timer(0.2, lambda: shared.update(value={"city": "São Paulo"})).start()
+
+        fn = MagicMock()
+        result = SingleFlight().do("cep:01001000", fn, peek=lambda: shared["value"])
+
+        self.assertEqual(result, {"city": "São Paulo"})
+        fn.assert_not_called()
+
+    @override_settings(LOOKUP_SINGLEFLIGHT_WAIT_TIMEOUT=2)
+    def test_fetches_itself_when_other_process_releases_without_value(self):
+        cache.add("singleflight:cep:01001000", "outro-processo")
+        threading.Timer(0.2, lambda: cache.delete("singleflight:cep:01001000")).start()
+
+        fn = MagicMock(return_value={"city": "São Paulo"})
+        result = SingleFlight().do("cep:01001000", fn, peek=lambda: MISSING)
+
+        self.assertEqual(result, {"city": "São Paulo"})
+        fn.assert_called_once()
+
+    def test_lock_is_released_after_fetch(self):
+        SingleFlight().do("cep:01001000", lambda: None, peek=lambda: MISSING)
+        self.assertIsNone(cache.get("singleflight:cep:01001000"))
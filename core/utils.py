@@ -1,5 +1,8 @@
-from core.services import fetch_company_data, fetch_address_data
-from django.http import JsonResponse
+from core import lookup_metrics
+from core.services import fetch_company_data, provider_names
+from apps.addresses.models import ZipCodeRecord
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_GET
 import logging
 
@@ -11,7 +14,10 @@ def fetch_company_data_view(request) -> JsonResponse:
     Endpoint Django para buscar dados de uma empresa via CNPJ.
 
     Espera um parâmetro GET 'tax_id' contendo o CNPJ a ser consultado.
-    Delega a busca ao serviço `core.services.fetch_company_data`.
+    Delega a busca ao serviço `core.services.fetch_company_data`, que grava o
+    resultado normalizado no cache de consultas: o `save()` do Cliente/Fornecedor
+    reaproveita esse resultado em vez de consultar as APIs novamente. O parâmetro
+    opcional 'refresh=1' ignora o cache e força uma nova consulta.
     Retorna uma resposta JSON com os dados da empresa em caso de sucesso,
     ou uma mensagem de erro com o status HTTP apropriado em caso de falha
     (400 para CNPJ ausente/inválido, 500 se o serviço não conseguir obter dados).
@@ -28,7 +34,7 @@ def fetch_company_data_view(request) -> JsonResponse:
         return JsonResponse({'error': 'Formato de CNPJ inválido após limpeza. Use apenas números ou formato comum.'}, status=400)
 
 
-    data = fetch_company_data(tax_id)
+    data = fetch_company_data(tax_id, refresh=request.GET.get('refresh') == '1')
 
     if data:
         logger.info(f"Data fetched successfully for CNPJ {tax_id}")
@@ -43,7 +49,8 @@ def fetch_address_data_view(request) -> JsonResponse:
     Endpoint Django para buscar dados de endereço via CEP.
 
     Espera um parâmetro GET 'zip_code' contendo o CEP a ser consultado.
-    Delega a busca ao serviço `core.services.fetch_address_data`.
+    Consulta primeiro a base local de CEPs (`ZipCodeRecord.lookup`), que só
+    recorre ao serviço `core.services.fetch_address_data` quando o CEP não está lá.
     Retorna uma resposta JSON com os dados do endereço em caso de sucesso,
     ou uma mensagem de erro com o status HTTP apropriado em caso de falha
     (400 para CEP ausente/inválido, 500 se o serviço não conseguir obter dados).
@@ -61,7 +68,7 @@ def fetch_address_data_view(request) -> JsonResponse:
          return JsonResponse({'error': 'Formato de CEP inválido após limpeza. Use apenas números ou formato 00000-000.'}, status=400)
 
 
-    data = fetch_address_data(zip_code)
+    data = ZipCodeRecord.lookup(cleaned_zip_code)
 
     if data:
         logger.info(f"Data fetched successfully for CEP {zip_code}")
@@ -69,3 +76,23 @@ def fetch_address_data_view(request) -> JsonResponse:
     else:
         logger.warning(f"Failed to fetch data for CEP {zip_code} from services.")
         return JsonResponse({'error': 'Não foi possível obter os dados para o CEP fornecido.'}, status=500)
+
+
+@require_GET
+@staff_member_required
+def lookup_metrics_view(request):
+    """
+    Endpoint (apenas equipe) com as métricas das consultas externas de CEP/CNPJ.
+
+    Retorna, por provedor, a contagem de respostas por desfecho (sucesso, não
+    encontrado, timeout, erro HTTP, erro de formato, etc.) e o histograma de
+    latência; e, por tipo de consulta, os acertos do cache e a taxa de acerto.
+    Por padrão responde em JSON; com '?format=text', no formato texto do Prometheus.
+    """
+    names = provider_names()
+    data = lookup_metrics.snapshot(
+        [name for providers in names.values() for name in providers], list(names)
+    )
+    if request.GET.get('format') == 'text':
+        return HttpResponse(lookup_metrics.render_prometheus(data), content_type='text/plain; version=0.0.4')
+    return JsonResponse(data)
@@ -160,6 +160,7 @@ INSTALLED_APPS = [
     # 'apps.products',
     # 'apps.stock',
     'apps.suppliers',
+    "core",
 ]
 
 
@@ -232,6 +233,88 @@ MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 
+# --- Cache das Consultas Externas (CEP/CNPJ) ---
+# Tempo de vida (segundos) das respostas positivas e das respostas "não encontrado"
+LOOKUP_CACHE_TTL = int(os.environ.get("LOOKUP_CACHE_TTL") or 60 * 60 * 24 * 7)
+LOOKUP_CACHE_NEGATIVE_TTL = int(os.environ.get("LOOKUP_CACHE_NEGATIVE_TTL") or 60 * 60)
+# LRU em memória de cada processo, na frente da tabela core.LookupCacheEntry
+LOOKUP_CACHE_LOCAL_MAX_SIZE = int(os.environ.get("LOOKUP_CACHE_LOCAL_MAX_SIZE") or 2048)
+LOOKUP_CACHE_LOCAL_TTL = int(os.environ.get("LOOKUP_CACHE_LOCAL_TTL") or 60 * 5)
+
+# --- Cliente HTTP das Consultas Externas (core.provider_client) ---
+LOOKUP_HTTP_CONNECT_TIMEOUT = float(os.environ.get("LOOKUP_HTTP_CONNECT_TIMEOUT") or 3.05)
+LOOKUP_HTTP_READ_TIMEOUT = float(os.environ.get("LOOKUP_HTTP_READ_TIMEOUT") or 5)
+LOOKUP_HTTP_MAX_RETRIES = int(os.environ.get("LOOKUP_HTTP_MAX_RETRIES") or 1)
+LOOKUP_HTTP_BACKOFF_FACTOR = float(os.environ.get("LOOKUP_HTTP_BACKOFF_FACTOR") or 0.3)
+LOOKUP_HTTP_BACKOFF_JITTER = float(os.environ.get("LOOKUP_HTTP_BACKOFF_JITTER") or 0.2)
+# Espera máxima (segundos) pedida por um provedor via Retry-After antes de tentar de novo
+LOOKUP_HTTP_MAX_RETRY_AFTER = float(os.environ.get("LOOKUP_HTTP_MAX_RETRY_AFTER") or 2)
+# Conexões simultâneas por provedor; sobrescreva por host em LOOKUP_HTTP_HOST_MAX_CONNECTIONS
+LOOKUP_HTTP_MAX_CONNECTIONS = int(os.environ.get("LOOKUP_HTTP_MAX_CONNECTIONS") or 10)
+LOOKUP_HTTP_HOST_MAX_CONNECTIONS = {}
+# Espera máxima (segundos) por uma conexão livre quando o limite do provedor está atingido
+LOOKUP_HTTP_POOL_TIMEOUT = float(os.environ.get("LOOKUP_HTTP_POOL_TIMEOUT") or 2)
+# Estratégia entre provedores redundantes: "sequential" (padrão), "hedged" ou "parallel".
+# Em "hedged", o provedor secundário é disparado após LOOKUP_HEDGE_DELAY segundos sem resposta.
+LOOKUP_HEDGE_MODE = os.environ.get("LOOKUP_HEDGE_MODE") or "sequential"
+LOOKUP_HEDGE_DELAY = float(os.environ.get("LOOKUP_HEDGE_DELAY") or 0.8)
+LOOKUP_HEDGE_MAX_WORKERS = int(os.environ.get("LOOKUP_HEDGE_MAX_WORKERS") or 8)
+# Circuit breaker por provedor (core.circuit_breaker): após N falhas consecutivas o
+# provedor é ignorado por LOOKUP_BREAKER_RESET_TIMEOUT segundos.
+LOOKUP_BREAKER_FAILURE_THRESHOLD = int(os.environ.get("LOOKUP_BREAKER_FAILURE_THRESHOLD") or 5)
+LOOKUP_BREAKER_RESET_TIMEOUT = float(os.environ.get("LOOKUP_BREAKER_RESET_TIMEOUT") or 30)
+# Coalescência de consultas simultâneas (core.singleflight): validade do lock entre processos
+# e tempo máximo que um processo espera pela consulta de outro.
+LOOKUP_SINGLEFLIGHT_LOCK_TIMEOUT = float(os.environ.get("LOOKUP_SINGLEFLIGHT_LOCK_TIMEOUT") or 15)
+LOOKUP_SINGLEFLIGHT_WAIT_TIMEOUT = float(os.environ.get("LOOKUP_SINGLEFLIGHT_WAIT_TIMEOUT") or 8)
+# Redireciona as consultas para um servidor local que imita os provedores
+# (ex: "http://127.0.0.1:8765", iniciado com `manage.py run_fake_providers`). Vazio = APIs reais.
+LOOKUP_PROVIDER_BASE_URL = os.environ.get("LOOKUP_PROVIDER_BASE_URL") or ""
+# Métricas de latência/desfecho por provedor e de acertos do cache (core.lookup_metrics)
+LOOKUP_METRICS_ENABLED = (os.environ.get("LOOKUP_METRICS_ENABLED") or "true").lower() == "true"
+
+# Enriquecimento por CNPJ de Clientes/Fornecedores PJ: "sync" (no save) ou "deferred"
+# (fila processada por `manage.py process_enrichment_jobs`).
+COMPANY_ENRICHMENT_MODE = os.environ.get("COMPANY_ENRICHMENT_MODE") or "sync"
+ENRICHMENT_MAX_ATTEMPTS = int(os.environ.get("ENRICHMENT_MAX_ATTEMPTS") or 5)
+ENRICHMENT_RETRY_DELAY = int(os.environ.get("ENRICHMENT_RETRY_DELAY") or 60)
+
+
+# --- Relatórios (apps.reports) ---
+# Registros lidos do banco por bloco nas exportações em streaming (queryset.iterator)
+REPORT_STREAM_CHUNK_SIZE = int(os.environ.get("REPORT_STREAM_CHUNK_SIZE") or 2000)
+# Formatação colunar (pandas) dos blocos lidos com values_list; "false" volta ao caminho linha a linha.
+REPORT_COLUMNAR_ENABLED = (os.environ.get("REPORT_COLUMNAR_ENABLED") or "true").lower() == "true"
+# Linhas por página na pré-visualização dos relatórios
+REPORT_PREVIEW_PAGE_SIZE = int(os.environ.get("REPORT_PREVIEW_PAGE_SIZE") or 25)
+# Relatórios em segundo plano (`manage.py process_report_jobs`): validade dos arquivos gerados,
+# tempo para considerar um worker interrompido e intervalo de atualização do progresso.
+REPORT_JOB_TTL = int(os.environ.get("REPORT_JOB_TTL") or 60 * 60 * 24)
+REPORT_JOB_STALE_AFTER = int(os.environ.get("REPORT_JOB_STALE_AFTER") or 60 * 30)
+REPORT_JOB_PROGRESS_EVERY = int(os.environ.get("REPORT_JOB_PROGRESS_EVERY") or 1000)
+# Cache em memória dos relatórios gerados (mesmo relatório + filtros + formato), invalidado ao
+# salvar/excluir Clientes, Fornecedores e Endereços: limite total e por arquivo (bytes; 0 desativa) e validade.
+REPORT_CACHE_MAX_SIZE = int(os.environ.get("REPORT_CACHE_MAX_SIZE") or 64 * 1024 * 1024)
+REPORT_CACHE_MAX_ENTRY_SIZE = int(os.environ.get("REPORT_CACHE_MAX_ENTRY_SIZE") or 8 * 1024 * 1024)
+REPORT_CACHE_TTL = int(os.environ.get("REPORT_CACHE_TTL") or 60 * 10)
+
+# Validade padrão (segundos) das reservas de estoque dos pedidos; as vencidas são
+# liberadas por `manage.py release_expired_reservations`.
+STOCK_RESERVATION_TTL = int(os.environ.get("STOCK_RESERVATION_TTL") or 60 * 60 * 24)
+
+# --- Cache do Django ---
+# Por padrão usa memória local (um cache por processo). Com vários workers, aponte para
+# um backend compartilhado (ex: "django.core.cache.backends.redis.RedisCache" ou
+# "django.core.cache.backends.db.DatabaseCache") para que o estado dos circuit breakers
+# seja visto por todos os processos.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND") or "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION") or "",
+    }
+}
+
+
 # --- Modelo de Usuário Personalizado e URLs de Autenticação ---
 AUTH_USER_MODEL = "employees.Employee"
 LOGIN_URL = "/auth/login/"
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
+from core.utils import lookup_metrics_view
 
 
 urlpatterns = [
@@ -12,6 +13,7 @@ urlpatterns = [
     # path('products', include('apps.products.urls')),
     path('reports/', include('apps.reports.urls')),
     path('suppliers/', include('apps.suppliers.urls')),
+    path('metrics/lookups/', lookup_metrics_view, name='lookup_metrics'),
 ]
 
 if settings.DEBUG: